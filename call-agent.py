@@ -24,11 +24,18 @@ Arguments:
   --audience / -a   (Optional) Target audience tier ('toddler', 'kids_3_10', 'tweens_teens', 'young_adults', 'adults').
   --keyword / -k    (Optional) Target SEO keyword phrase (e.g. 'dinosaur colouring pages').
   --no-persist      (Optional) Disable Firestore & GCS writes; save all assets and document.json locally.
+  --force           (Optional) Rerun even if a run for the same date, collection and keyword
+                    is already in flight or completed (bypasses the idempotency lease).
+  --resume          (Optional) Document ID of a failed run to resume from its stage checkpoints
+                    (reuses the stored input; skips stages whose outputs already exist).
+  --submit          (Optional) Submit through `POST /jobs` and poll `GET /jobs/{document_id}` instead of
+                    holding a `/run` connection open for the whole run.
 ==============================================================================
 """
 
 import argparse
 import os
+import time
 import requests
 import subprocess
 import uuid
@@ -51,6 +58,30 @@ def get_cloud_token():
         return None
 
 
+JOB_POLL_INTERVAL_SECONDS = 10
+JOB_TERMINAL_STATES = ("completed", "failed")
+
+
+def submit_and_poll(endpoint: str, headers: dict, user_request: dict):
+    print(f"Submitting job to {endpoint}/jobs: {json.dumps(user_request, indent=2)}")
+    response = requests.post(f"{endpoint}/jobs", headers=headers, json=user_request, timeout=60)
+    if response.status_code >= 400:
+        print(f"ERROR ({response.status_code}): {response.text}")
+    response.raise_for_status()
+    document_id = response.json()["document_id"]
+    print(f"Job accepted. document_id={document_id}")
+
+    while True:
+        time.sleep(JOB_POLL_INTERVAL_SECONDS)
+        response = requests.get(f"{endpoint}/jobs/{document_id}", headers=headers, timeout=30)
+        response.raise_for_status()
+        job = response.json()
+        print(f"  job_state={job.get('job_state')} status={job.get('status')}")
+        if job.get("job_state") in JOB_TERMINAL_STATES or job.get("status") in ("PASS", "failed"):
+            print("Job finished:", json.dumps(job, indent=2))
+            return job
+
+
 def main(
     endpoint: str,
     collection_name: str = None,
@@ -58,6 +89,9 @@ def main(
     target_keyword: str = None,
     micro_style: str = None,
     no_persist: bool = False,
+    submit: bool = False,
+    force: bool = False,
+    resume_document_id: str = None,
 ):
     token = get_cloud_token()
 
@@ -96,6 +130,14 @@ def main(
         user_request["micro_style"] = micro_style
     if no_persist:
         user_request["no_persist"] = True
+    if force:
+        user_request["force"] = True
+    if resume_document_id:
+        user_request["resume_document_id"] = resume_document_id
+
+    if submit:
+        submit_and_poll(endpoint, headers, user_request)
+        return
 
     payload = {
         "app_name": APP_NAME,
@@ -153,6 +195,22 @@ if __name__ == "__main__":
         action="store_true",
         help="Disable persistence and save assets locally",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rerun even if an identical run is in flight or completed",
+    )
+    parser.add_argument(
+        "--resume",
+        type=str,
+        default=None,
+        help="Document ID of a failed run to resume from its stage checkpoints",
+    )
+    parser.add_argument(
+        "--submit",
+        action="store_true",
+        help="Submit via the async job API (POST /jobs) and poll for status",
+    )
     args = parser.parse_args()
 
     main(
@@ -162,4 +220,7 @@ if __name__ == "__main__":
         target_keyword=args.keyword,
         micro_style=args.micro_style,
         no_persist=args.no_persist,
+        submit=args.submit,
+        force=args.force,
+        resume_document_id=args.resume,
     )
\ No newline at end of file
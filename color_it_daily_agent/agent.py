@@ -10,6 +10,7 @@ from .stylist.agent import stylist
 from .generator.agent import generator
 from .critic.agent import critic
 from .lib.trace_plugin import PromptTracePlugin
+from .lib.checkpoint_plugin import StageCheckpointPlugin
 
 # --- Orchestration ---
 
@@ -36,7 +37,7 @@ async def main():
     now = datetime.now()
     current_date_str = now.strftime("%Y-%m-%d")
 
-    runner = InMemoryRunner(agent=publisher, plugins=[PromptTracePlugin()])
+    runner = InMemoryRunner(agent=publisher, plugins=[PromptTracePlugin(), StageCheckpointPlugin()])
 
     print(f"Starting Publisher Agent for {current_date_str}...")
 
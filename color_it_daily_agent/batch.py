@@ -0,0 +1,90 @@
+import os
+import uuid
+import asyncio
+import logging
+from typing import Dict, Any
+from fastapi import HTTPException
+
+from color_it_daily_agent.pipeline import prepare_batch_executions_async
+from color_it_daily_agent.jobs import run_agent_pipeline, job_manager
+from color_it_daily_agent.lib.admission import check_admission_capacity
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_PARALLEL = int(os.environ.get("BATCH_MAX_PARALLEL", "2"))
+BATCH_MAX_PARALLEL_LIMIT = int(os.environ.get("BATCH_MAX_PARALLEL_LIMIT", "4"))
+
+
+async def run_batch(batch_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Produces pages for N collections (or N pages for one collection) in a single request.
+
+    Lookups are shared across pages (see `prepare_batch_executions_async`), and production
+    runs execute concurrently, capped at `max_parallel` (default BATCH_MAX_PARALLEL,
+    at most BATCH_MAX_PARALLEL_LIMIT). With `wait: false`, pages are handed to the job
+    worker pool instead and the response returns as soon as every document is pre-created.
+
+    Returns one aggregated result with a document_id and status per page.
+    """
+    try:
+        max_parallel = int(batch_payload.get("max_parallel") or BATCH_MAX_PARALLEL)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'max_parallel' must be an integer.")
+    max_parallel = max(1, min(max_parallel, BATCH_MAX_PARALLEL_LIMIT))
+    wait = bool(batch_payload.get("wait", True))
+
+    check_admission_capacity()
+    batch_id = str(uuid.uuid4())
+    prepared = await prepare_batch_executions_async(batch_payload)
+    logger.info(
+        f"📦 Batch '{batch_id}': {len(prepared)} page(s), max_parallel={max_parallel}, wait={wait}"
+    )
+
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def _run_page(ctx, merged_payload) -> str:
+        async with semaphore:
+            return await run_agent_pipeline(ctx, merged_payload)
+
+    async def _enqueue_page(ctx, merged_payload) -> str:
+        job = await job_manager.enqueue(ctx, merged_payload)
+        return job.state
+
+    page_fn = _run_page if wait else _enqueue_page
+    runnable = [(ctx, payload) for ctx, payload, error in prepared if ctx and not ctx.attached]
+    outcomes = await asyncio.gather(
+        *[page_fn(ctx, payload) for ctx, payload in runnable],
+        return_exceptions=True,
+    )
+    outcomes_by_doc = {ctx.document_id: outcome for (ctx, _), outcome in zip(runnable, outcomes)}
+
+    pages = []
+    for ctx, payload, error in prepared:
+        page = {
+            "document_id": ctx.document_id if ctx else None,
+            "collection_name": payload.get("collection_name"),
+            "micro_style": payload.get("micro_style"),
+        }
+        outcome = outcomes_by_doc.get(ctx.document_id) if ctx else None
+        if error:
+            page.update({"status": "failed", "error_message": error})
+        elif ctx.attached:
+            page.update({"status": ctx.attached_status, "attached": True})
+        elif isinstance(outcome, BaseException):
+            detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            page.update({"status": "failed", "error_message": detail})
+        else:
+            page["status"] = outcome
+        pages.append(page)
+
+    passed = sum(1 for page in pages if page["status"] == "PASS")
+    failed = sum(1 for page in pages if page["status"] == "failed")
+    logger.info(f"📦 Batch '{batch_id}' finished: {passed} passed, {failed} failed of {len(pages)}")
+
+    return {
+        "batch_id": batch_id,
+        "total": len(pages),
+        "passed": passed,
+        "failed": failed,
+        "pages": pages,
+    }
@@ -1,6 +1,8 @@
+import threading
 import contextvars
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
 
 from color_it_daily_agent.lib.version import get_agent_version
 
@@ -33,6 +35,10 @@ class AgentContext:
     micro_style_description: Optional[str] = None
     micro_style_data: Optional[Dict[str, Any]] = None
     agent_version: str = field(default_factory=get_agent_version)
+    attached: bool = False
+    attached_status: Optional[str] = None
+    checkpoints: Dict[str, Any] = field(default_factory=dict)
+    resume_checkpoints: Dict[str, Any] = field(default_factory=dict)
 
 
 _context_var: contextvars.ContextVar[Optional[AgentContext]] = (
@@ -40,9 +46,46 @@ _context_var: contextvars.ContextVar[Optional[AgentContext]] = (
 )
 
 
+# Prepared runs keyed by ADK session id. The request/job that prepares a run is not the task
+# ADK executes agents in, so the run context is re-bound inside the runner invocation
+# (see lib/context_plugin.py) and every task and tool thread ADK spawns from there inherits it.
+_run_contexts: Dict[str, AgentContext] = {}
+_run_contexts_lock = threading.Lock()
+
+
 def set_agent_context(ctx: AgentContext) -> None:
     _context_var.set(ctx)
 
 
 def get_agent_context() -> Optional[AgentContext]:
     return _context_var.get()
+
+
+@contextmanager
+def agent_context_scope(ctx: Optional[AgentContext]) -> Iterator[Optional[AgentContext]]:
+    """Sets the AgentContext for the enclosed block and restores the previous one on exit."""
+    token = _context_var.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _context_var.reset(token)
+
+
+def bind_run_context(session_id: str, ctx: AgentContext) -> None:
+    """Registers the prepared context of the run that will execute in ADK session `session_id`."""
+    with _run_contexts_lock:
+        _run_contexts[session_id] = ctx
+
+
+def lookup_run_context(session_id: Optional[str]) -> Optional[AgentContext]:
+    if not session_id:
+        return None
+    with _run_contexts_lock:
+        return _run_contexts.get(session_id)
+
+
+def release_run_context(session_id: Optional[str]) -> None:
+    if not session_id:
+        return
+    with _run_contexts_lock:
+        _run_contexts.pop(session_id, None)
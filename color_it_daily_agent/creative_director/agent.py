@@ -2,7 +2,7 @@ import json
 import asyncio
 
 from google.adk.agents import LlmAgent
-from google.adk.models import Gemini
+from ..lib.gated_gemini import GatedGemini
 from google.adk.runners import InMemoryRunner
 
 from .instructions import get_creative_director_instructions
@@ -13,7 +13,7 @@ from ..app_configs import configs
 creative_director = LlmAgent(
     name="CreativeDirector",
     instruction=get_creative_director_instructions,
-    model=Gemini(model=configs.llm_model),  
+    model=GatedGemini(model=configs.llm_model),  
     tools=[get_calendar_events, get_recent_history, search_past_concepts],
 )
 
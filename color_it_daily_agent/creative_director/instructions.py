@@ -1,6 +1,8 @@
 import logging
-from typing import Any
+from typing import Any, Optional
 from color_it_daily_agent.context import get_agent_context, DEFAULT_TARGET_AUDIENCE
+from color_it_daily_agent.lib.instruction_cache import memoized_instruction_builder
+from color_it_daily_agent.lib.context_cache import compose_instruction
 
 logger = logging.getLogger(__name__)
 
@@ -116,6 +118,26 @@ def get_creative_director_instructions(
     if not target_audience:
         target_audience = DEFAULT_TARGET_AUDIENCE
 
+    micro_style_name = kwargs.get("micro_style_name")
+    micro_style_description = kwargs.get("micro_style_description")
+    if not micro_style_name and ctx:
+        micro_style_name = ctx.micro_style_name
+    if not micro_style_description and ctx:
+        micro_style_description = ctx.micro_style_description
+
+    return _build_creative_director_instructions(
+        collection_context, target_keyword, target_audience, micro_style_name, micro_style_description
+    )
+
+
+@memoized_instruction_builder("creative_director")
+def _build_creative_director_instructions(
+    collection_context: Optional[str],
+    target_keyword: Optional[str],
+    target_audience: str,
+    micro_style_name: Optional[str],
+    micro_style_description: Optional[str],
+) -> str:
     audience_block = AUDIENCE_GUIDELINES.get(
         target_audience, AUDIENCE_GUIDELINES[DEFAULT_TARGET_AUDIENCE]
     )
@@ -139,13 +161,6 @@ def get_creative_director_instructions(
             f"   - `visual_tags`: MUST consist of clean, individual 1-2 word tags suitable for UI display chips. **NEVER put full multi-word search phrases or sentences**."
         )
 
-    micro_style_name = kwargs.get("micro_style_name")
-    micro_style_description = kwargs.get("micro_style_description")
-    if not micro_style_name and ctx:
-        micro_style_name = ctx.micro_style_name
-    if not micro_style_description and ctx:
-        micro_style_description = ctx.micro_style_description
-
     micro_style_block = ""
     if micro_style_name and micro_style_description:
         micro_style_block = (
@@ -157,14 +172,16 @@ def get_creative_director_instructions(
             f"Adapt the subject, framing, scene elements, and visual arrangement so it seamlessly aligns with the style description: \"{micro_style_description}\"."
         )
 
-    instructions = (
+    # Static for a given audience, collection and micro-style (sent once via the context cache);
+    # the per-run keyword block is the dynamic tail.
+    instructions = compose_instruction(
         INSTRUCTIONS_TEMPLATE.format(
             audience_block=audience_block,
             collection_description_block=desc_block,
             target_audience=target_audience,
         )
-        + keyword_block
-        + micro_style_block
+        + micro_style_block,
+        keyword_block,
     )
 
     logger.info(
@@ -173,4 +190,8 @@ def get_creative_director_instructions(
     return instructions
 
 
-INSTRUCTIONS_V1 = get_creative_director_instructions()
\ No newline at end of file
+def __getattr__(name: str):
+    # Built on access so importing this module has no side effects (context reads, logging).
+    if name == "INSTRUCTIONS_V1":
+        return get_creative_director_instructions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
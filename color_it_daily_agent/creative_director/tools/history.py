@@ -1,10 +1,6 @@
 import logging
 from typing import List
 
-from google.cloud.firestore_v1.vector import Vector
-from google.cloud.firestore_v1.base_vector_query import DistanceMeasure
-from google.cloud import firestore
-
 from ...lib.embeddings import generate_embedding
 from ...lib.database import get_db
 from ...app_configs import configs
@@ -24,6 +20,8 @@ def get_recent_styles(limit: int = 5) -> List[str]:
         List[str]: A list of recent style archetype names.
     """
     try:
+        from google.cloud import firestore
+
         db = get_db()
         docs = (
             db.collection(configs.coloring_page_collection)
@@ -60,6 +58,8 @@ def get_recent_history(limit: int = 10) -> List[str]:
     """
 
     # 1. Query Firestore: Collection 'coloring_pages' -> Order by Date DESC -> Limit
+    from google.cloud import firestore
+
     db = get_db()
     docs = (
         db.collection(configs.coloring_page_collection)
@@ -105,6 +105,9 @@ def search_past_concepts(concept_description: str) -> list[dict]:
     Returns:
         list[dict]: A list of similar past pages (Title, Tags, etc.).
     """
+    from google.cloud.firestore_v1.vector import Vector
+    from google.cloud.firestore_v1.base_vector_query import DistanceMeasure
+
     db = get_db()
 
     # 1. Generate Embedding (You need your embedding function here)
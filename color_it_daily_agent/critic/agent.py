@@ -2,7 +2,7 @@ import json
 import asyncio
 
 from google.adk.agents import LlmAgent
-from google.adk.models import Gemini
+from ..lib.gated_gemini import GatedGemini
 from google.adk.runners import InMemoryRunner
 
 from .instructions import get_critic_instructions
@@ -14,7 +14,7 @@ from ..app_configs import configs
 critic = LlmAgent(
     name="Critic",
     instruction=get_critic_instructions,
-    model=Gemini(model=configs.llm_model),
+    model=GatedGemini(model=configs.llm_model),
     tools=[download_image, inspect_image_visually, publish_to_firestore]
 )
 
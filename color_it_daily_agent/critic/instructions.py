@@ -1,6 +1,8 @@
 import logging
-from typing import Any
+from typing import Any, Optional
 from color_it_daily_agent.context import get_agent_context, DEFAULT_TARGET_AUDIENCE
+from color_it_daily_agent.lib.instruction_cache import memoized_instruction_builder
+from color_it_daily_agent.lib.context_cache import compose_instruction
 
 logger = logging.getLogger(__name__)
 
@@ -105,25 +107,37 @@ def get_critic_instructions(
     if not target_audience:
         target_audience = DEFAULT_TARGET_AUDIENCE
 
+    micro_style_name = kwargs.get("micro_style_name") or (ctx.micro_style_name if ctx else None)
+    micro_style_description = kwargs.get("micro_style_description") or (ctx.micro_style_description if ctx else None)
+    return _build_critic_instructions(collection_context, micro_style_name, micro_style_description)
+
+
+@memoized_instruction_builder("critic")
+def _build_critic_instructions(
+    collection_context: Optional[str],
+    micro_style_name: Optional[str],
+    micro_style_description: Optional[str],
+) -> str:
     desc_block = ""
     if collection_context:
         desc_block = f"\n  Collection Theme: \"{collection_context}\""
 
-    micro_style_name = kwargs.get("micro_style_name") or (ctx.micro_style_name if ctx else None)
-    micro_style_description = kwargs.get("micro_style_description") or (ctx.micro_style_description if ctx else None)
     if micro_style_name and micro_style_description:
         desc_block += (
             f"\n  Target Micro-Style Name: \"{micro_style_name}\"\n"
             f"  Target Micro-Style Description: \"{micro_style_description}\""
         )
 
-    instructions = INSTRUCTIONS_TEMPLATE.format(
+    instructions = compose_instruction(INSTRUCTIONS_TEMPLATE.format(
         collection_description_block=desc_block,
-    )
+    ))
     logger.info(
         f"[DYNAMIC PROMPT] Critic System Instructions initialized, Micro-Style: '{micro_style_name}'"
     )
     return instructions
 
 
-INSTRUCTIONS_V1 = get_critic_instructions()
\ No newline at end of file
+def __getattr__(name: str):
+    if name == "INSTRUCTIONS_V1":
+        return get_critic_instructions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,6 @@
 import os
 import tempfile
-from google.cloud import storage
+from color_it_daily_agent.lib.clients import get_storage_client
 
 def download_image(gcs_path: str) -> str:
     """
@@ -29,7 +29,7 @@ def download_image(gcs_path: str) -> str:
     bucket_name, blob_name = path_parts
 
     # Initialize client
-    client = storage.Client()
+    client = get_storage_client()
     bucket = client.bucket(bucket_name)
     blob = bucket.blob(blob_name)
 
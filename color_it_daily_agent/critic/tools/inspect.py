@@ -2,12 +2,11 @@ import json
 import logging
 from typing import Optional, Dict, Any
 
-from google import genai
-from google.genai import types
-
 from color_it_daily_agent.app_configs import configs
 from color_it_daily_agent.context import get_agent_context, DEFAULT_TARGET_AUDIENCE
 from color_it_daily_agent.critic.tools.download import download_image
+from color_it_daily_agent.lib.admission import vision_model_gate
+from color_it_daily_agent.lib.clients import get_vertex_genai_client
 
 logger = logging.getLogger(__name__)
 
@@ -104,11 +103,9 @@ def inspect_image_visually(
         )
 
     # 3. Call Gemini Multimodal Vision API
-    client = genai.Client(
-        vertexai=True,
-        project=configs.gcp_project,
-        location=configs.gcp_location,
-    )
+    from google.genai import types
+
+    client = get_vertex_genai_client()
 
     vision_prompt = f"""
 You are a strict Multimodal Vision QA inspector for children's and adult coloring pages.
@@ -160,6 +157,8 @@ Output **ONLY** a valid JSON object matching this schema:
 }}
 """
 
+    # Admission rejections propagate instead of being reported as a failed visual inspection.
+    vision_model_gate.acquire()
     try:
         response = client.models.generate_content(
             model=configs.llm_model,
@@ -192,6 +191,8 @@ Output **ONLY** a valid JSON object matching this schema:
             "overall_visual_pass": False,
             "rejection_reasons": [f"Vision API error: {e}"],
         }
+    finally:
+        vision_model_gate.release()
 
     result_json = json.dumps(vision_result, indent=2)
     logger.info(f"🧐 [VISUAL INSPECTION RESULT]\n{result_json}")
@@ -3,7 +3,6 @@ import json
 import logging
 from typing import List, Optional
 from datetime import datetime, timezone
-from google.cloud.firestore_v1.vector import Vector
 
 from google.adk.tools.tool_context import ToolContext
 from ...lib.embeddings import generate_embedding
@@ -74,6 +73,8 @@ def publish_to_firestore(
             tool_context.actions.escalate = True
         return f"SUCCESS: Saved '{title}' locally to review (no_persist=True) with ID {doc_id}"
 
+    from google.cloud.firestore_v1.vector import Vector
+
     db = get_db()
     batch = db.batch()
     new_doc_ref = db.collection(configs.coloring_page_collection).document(doc_id)
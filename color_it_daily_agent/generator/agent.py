@@ -2,7 +2,7 @@ import json
 import asyncio
 
 from google.adk.agents import LlmAgent, SequentialAgent
-from google.adk.models import Gemini
+from ..lib.gated_gemini import GatedGemini
 from google.adk.runners import InMemoryRunner
 
 
@@ -15,7 +15,7 @@ from ..app_configs import configs
 generator = LlmAgent(
     name="Generator",
     instruction=INSTRUCTIONS_V1,
-    model=Gemini(model=configs.llm_model),
+    model=GatedGemini(model=configs.llm_model),
     tools=[generate_image, optimize_image],
 )
 
@@ -4,13 +4,11 @@ import base64
 import logging
 from typing import Optional
 
-from google import genai
-from google.genai import types
-from google.cloud import storage
-
 from color_it_daily_agent.app_configs import configs
 from color_it_daily_agent.context import get_agent_context
 from color_it_daily_agent.lib.persistence import get_local_output_dir
+from color_it_daily_agent.lib.admission import media_model_gate
+from color_it_daily_agent.lib.clients import get_storage_client, get_vertex_genai_client
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +22,12 @@ def generate_image(positive_prompt: str) -> str:
     Returns:
         str: The GCS path (or local file path if no_persist) of the raw generated image.
     """
+    from google.genai import types
+
     ctx = get_agent_context()
     generation_id = ctx.document_id if ctx else str(uuid.uuid4())
 
-    ai_client = genai.Client(
-        vertexai=True,
-        project=configs.gcp_project,
-        location=configs.gcp_location,
-    )
+    ai_client = get_vertex_genai_client()
 
     full_prompt_text = positive_prompt
     logger.info(f"\n==================== [GENERATING IMAGE PROMPT] ====================\n{positive_prompt}\n===================================================================")
@@ -68,11 +64,12 @@ def generate_image(positive_prompt: str) -> str:
     )
 
     try:
-        response = ai_client.models.generate_content(
-            model=configs.media_model,
-            contents=contents,
-            config=generate_content_config,
-        )
+        with media_model_gate.slot():
+            response = ai_client.models.generate_content(
+                model=configs.media_model,
+                contents=contents,
+                config=generate_content_config,
+            )
 
         image_data = None
         if response.candidates and response.candidates[0].content.parts:
@@ -97,7 +94,7 @@ def generate_image(positive_prompt: str) -> str:
             logger.info(f"[NO_PERSIST] Raw image saved locally to '{raw_path}'")
             return raw_path
 
-        storage_client = storage.Client(project=configs.gcp_project)
+        storage_client = get_storage_client()
         filename = f"raw/{generation_id}.png"
         bucket = storage_client.bucket(configs.gcp_media_bucket)
         blob = bucket.blob(filename)
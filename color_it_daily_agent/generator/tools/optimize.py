@@ -1,35 +1,42 @@
 import os
 import uuid
-import subprocess
-import tempfile
-from PIL import Image
-import cairosvg
-from google.cloud import storage
-from color_it_daily_agent.app_configs import configs
-
-import os
-import uuid
+import shutil
 import logging
 import subprocess
 import tempfile
-from PIL import Image
-import cairosvg
-from google.cloud import storage
+from typing import Optional
 from color_it_daily_agent.app_configs import configs
 from color_it_daily_agent.context import get_agent_context
 from color_it_daily_agent.lib.persistence import get_local_output_dir
+from color_it_daily_agent.lib.clients import get_storage_client
 
 logger = logging.getLogger(__name__)
 
+_potrace_path: Optional[str] = None
+
+
+def find_potrace() -> Optional[str]:
+    """Resolves the `potrace` binary on PATH once per process. Returns None if it is missing."""
+    global _potrace_path
+    if _potrace_path is None:
+        _potrace_path = shutil.which("potrace") or ""
+    return _potrace_path or None
+
+
 def optimize_image(image_path: str) -> str:
     """
     Optimizes a raw coloring page image for printing by vectorizing it and 
     rendering it at high resolution (2550x3300).
     """
+    # Imaging libraries are loaded on first use to keep service start-up light.
+    from PIL import Image
+    import cairosvg
+
     ctx = get_agent_context()
     no_persist = ctx.no_persist if ctx else False
 
-    if subprocess.call(["which", "potrace"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) != 0:
+    potrace_path = find_potrace()
+    if not potrace_path:
         raise RuntimeError("The 'potrace' utility is not installed. Please install it (e.g., 'apt-get install potrace') to use this tool.")
 
     with tempfile.TemporaryDirectory() as temp_dir:
@@ -38,13 +45,12 @@ def optimize_image(image_path: str) -> str:
 
         if no_persist or not image_path.startswith("gs://"):
             if os.path.exists(image_path):
-                import shutil
                 shutil.copyfile(image_path, local_input)
                 original_filename = os.path.basename(image_path)
             else:
                 raise FileNotFoundError(f"Local image file not found: {image_path}")
         else:
-            storage_client = storage.Client(project=configs.gcp_project)
+            storage_client = get_storage_client()
             path_parts = image_path[5:].split("/", 1)
             bucket_name = path_parts[0]
             blob_name = path_parts[1]
@@ -64,7 +70,7 @@ def optimize_image(image_path: str) -> str:
 
         # 3. Vectorize (Potrace -> SVG)
         local_svg = os.path.join(temp_dir, "output.svg")
-        subprocess.check_call(["potrace", local_bmp, "-s", "-o", local_svg])
+        subprocess.check_call([potrace_path, local_bmp, "-s", "-o", local_svg])
 
         # 4. Render High-Res (SVG -> PNG)
         target_width = 2550
@@ -98,7 +104,6 @@ def optimize_image(image_path: str) -> str:
             final_webp_path = os.path.join(output_dir, "optimized.webp")
             final_svg_path = os.path.join(output_dir, "optimized.svg")
             
-            import shutil
             shutil.copyfile(local_optimized, final_png_path)
             shutil.copyfile(local_webp, final_webp_path)
             shutil.copyfile(local_svg, final_svg_path)
@@ -107,7 +112,7 @@ def optimize_image(image_path: str) -> str:
             return final_png_path
 
         # Upload to GCS
-        storage_client = storage.Client(project=configs.gcp_project)
+        storage_client = get_storage_client()
         path_parts = image_path[5:].split("/", 1)
         bucket_name = path_parts[0]
         bucket = storage_client.bucket(bucket_name)
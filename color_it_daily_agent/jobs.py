@@ -0,0 +1,290 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
+
+from color_it_daily_agent.context import (
+    AgentContext,
+    agent_context_scope,
+    bind_run_context,
+    release_run_context,
+)
+from color_it_daily_agent.pipeline import prepare_agent_execution_async
+from color_it_daily_agent.lib.admission import check_admission_capacity
+from color_it_daily_agent.lib.run_events import publish_run_event, EVENT_RUN_STARTED, EVENT_RUN_FINISHED
+from color_it_daily_agent.lib.persistence import (
+    get_document,
+    get_document_status,
+    mark_document_failed,
+    LOCAL_TEMP_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "color_it_daily_agent"
+JOB_USER_ID = os.environ.get("JOB_USER_ID", "jobs")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_QUEUE_MAX_SIZE = int(os.environ.get("JOB_QUEUE_MAX_SIZE", "50"))
+JOB_HISTORY_SIZE = int(os.environ.get("JOB_HISTORY_SIZE", "500"))
+
+JOB_STATE_QUEUED = "queued"
+JOB_STATE_RUNNING = "running"
+JOB_STATE_COMPLETED = "completed"
+JOB_STATE_FAILED = "failed"
+JOB_STATE_ATTACHED = "attached"
+
+
+@dataclass
+class Job:
+    document_id: str
+    ctx: AgentContext
+    input_payload: Dict[str, Any]
+    state: str = JOB_STATE_QUEUED
+    error_message: Optional[str] = None
+    submitted_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "document_id": self.document_id,
+            "job_state": self.state,
+            "no_persist": self.ctx.no_persist,
+            "collection_name": self.ctx.collection_name,
+            "error_message": self.error_message,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_runner = None
+
+
+def get_runner():
+    """Lazily builds the in-process ADK runner shared by all background jobs."""
+    global _runner
+    if _runner is None:
+        from google.adk.runners import InMemoryRunner
+        from color_it_daily_agent.agent import root_agent
+        from color_it_daily_agent.lib.context_plugin import AgentContextPlugin
+        from color_it_daily_agent.lib.trace_plugin import PromptTracePlugin
+        from color_it_daily_agent.lib.checkpoint_plugin import StageCheckpointPlugin
+
+        _runner = InMemoryRunner(
+            agent=root_agent,
+            app_name=APP_NAME,
+            plugins=[AgentContextPlugin(), PromptTracePlugin(), StageCheckpointPlugin()],
+        )
+    return _runner
+
+
+async def run_agent_pipeline(ctx: AgentContext, merged_payload: Dict[str, Any], runner=None) -> str:
+    """
+    Runs the Publisher agent for a prepared execution in the current task and
+    returns the final document status. Mirrors the `/run` middleware checks:
+    any run that ends without a 'PASS' document is marked as failed.
+    `runner` defaults to the shared `get_runner()`.
+
+    The context is scoped to this call, so a worker task never carries one job's
+    context into the next.
+    """
+    with agent_context_scope(ctx):
+        return await _run_agent_pipeline(ctx, merged_payload, runner or get_runner())
+
+
+async def _run_agent_pipeline(ctx: AgentContext, merged_payload: Dict[str, Any], runner) -> str:
+    from google.genai import types
+
+    publish_run_event(ctx.document_id, EVENT_RUN_STARTED, collection_name=ctx.collection_name)
+    session = await runner.session_service.create_session(
+        app_name=APP_NAME, user_id=JOB_USER_ID, session_id=str(uuid.uuid4())
+    )
+    new_message = types.Content(role="user", parts=[types.Part.from_text(text=json.dumps(merged_payload))])
+    bind_run_context(session.id, ctx)
+
+    try:
+        async for _ in runner.run_async(user_id=JOB_USER_ID, session_id=session.id, new_message=new_message):
+            pass
+    except Exception as e:
+        logger.error(f"❌ Agent run failed for doc '{ctx.document_id}': {e}")
+        await asyncio.to_thread(mark_document_failed, ctx.document_id, str(e), ctx.no_persist)
+        publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status="failed", error_message=str(e))
+        return "failed"
+    finally:
+        release_run_context(session.id)
+        try:
+            await runner.session_service.delete_session(
+                app_name=APP_NAME, user_id=JOB_USER_ID, session_id=session.id
+            )
+        except Exception as e:
+            logger.debug(f"Failed to delete job session '{session.id}': {e}")
+
+    doc_status = await asyncio.to_thread(get_document_status, ctx.document_id, ctx.no_persist)
+    if doc_status != "PASS":
+        err_detail = (
+            f"Agent execution completed with status '{doc_status}' "
+            f"without publishing an approved document."
+        )
+        logger.error(f"❌ {err_detail} (doc_id={ctx.document_id})")
+        await asyncio.to_thread(mark_document_failed, ctx.document_id, err_detail, ctx.no_persist)
+        publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status="failed", error_message=err_detail)
+        return "failed"
+    publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status=doc_status)
+    return doc_status
+
+
+class JobManager:
+    """
+    Bounded in-process worker pool for agent runs submitted through `POST /jobs`.
+
+    Submissions are prepared (and their document pre-created) immediately, then queued.
+    A fixed number of worker tasks drain the queue; when the queue is full, submissions
+    are rejected with HTTP 429 instead of piling up. `shutdown` (server shutdown) cancels
+    the workers and marks every queued or running job's document as failed.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queue_size: int = JOB_QUEUE_MAX_SIZE):
+        self.workers = max(1, workers)
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._closed = False
+
+    def _ensure_workers(self) -> None:
+        if self._closed:
+            raise HTTPException(status_code=503, detail="The server is shutting down; not accepting new jobs.")
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker_tasks = [t for t in self._worker_tasks if not t.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.document_id] = job
+        while len(self._jobs) > JOB_HISTORY_SIZE:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.state in (JOB_STATE_QUEUED, JOB_STATE_RUNNING):
+                break
+            self._jobs.pop(oldest_id)
+
+    async def submit(self, input_payload: Dict[str, Any]) -> Job:
+        self._ensure_workers()
+        if self._queue.full():
+            raise HTTPException(
+                status_code=429,
+                detail=f"Job queue is full ({self.max_queue_size} pending). Retry later.",
+            )
+        check_admission_capacity()
+
+        ctx, merged_payload = await prepare_agent_execution_async(input_payload)
+        if ctx.attached:
+            # Duplicate request: report the in-flight or completed run instead of queueing another.
+            return Job(
+                document_id=ctx.document_id,
+                ctx=ctx,
+                input_payload=merged_payload,
+                state=JOB_STATE_ATTACHED,
+            )
+        return await self.enqueue(ctx, merged_payload)
+
+    async def enqueue(self, ctx: AgentContext, merged_payload: Dict[str, Any]) -> Job:
+        """Queues an already prepared execution. Marks its document failed if it cannot be queued."""
+        try:
+            self._ensure_workers()
+        except HTTPException as e:
+            await asyncio.to_thread(mark_document_failed, ctx.document_id, e.detail, ctx.no_persist)
+            raise
+        job = Job(document_id=ctx.document_id, ctx=ctx, input_payload=merged_payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            err_detail = f"Job queue is full ({self.max_queue_size} pending). Retry later."
+            await asyncio.to_thread(mark_document_failed, ctx.document_id, err_detail, ctx.no_persist)
+            raise HTTPException(status_code=429, detail=err_detail)
+
+        self._remember(job)
+        logger.info(f"📥 Queued job for doc '{job.document_id}' (queue depth: {self._queue.qsize()})")
+        return job
+
+    def get(self, document_id: str) -> Optional[Job]:
+        return self._jobs.get(document_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                job.state = JOB_STATE_RUNNING
+                job.started_at = datetime.now(timezone.utc).isoformat()
+                logger.info(f"🏃 Starting job for doc '{job.document_id}'")
+                status = await run_agent_pipeline(job.ctx, job.input_payload)
+                job.state = JOB_STATE_COMPLETED if status == "PASS" else JOB_STATE_FAILED
+            except Exception as e:
+                logger.error(f"❌ Job for doc '{job.document_id}' crashed: {e}")
+                job.state = JOB_STATE_FAILED
+                job.error_message = str(e)
+            finally:
+                job.finished_at = datetime.now(timezone.utc).isoformat()
+                self._queue.task_done()
+
+    async def shutdown(self) -> int:
+        """
+        Stops accepting jobs, cancels the workers and marks the document of every job still
+        queued or running as failed, so it does not stay 'running' (and keep its idempotency
+        lease) after the process exits. Returns how many jobs were abandoned.
+        """
+        self._closed = True
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+        abandoned = [job for job in self._jobs.values() if job.state in (JOB_STATE_QUEUED, JOB_STATE_RUNNING)]
+        err_detail = "The server shut down before the job finished."
+
+        async def _abandon(job: Job) -> None:
+            job.state = JOB_STATE_FAILED
+            job.error_message = err_detail
+            job.finished_at = datetime.now(timezone.utc).isoformat()
+            await asyncio.to_thread(mark_document_failed, job.document_id, err_detail, job.ctx.no_persist)
+            publish_run_event(job.document_id, EVENT_RUN_FINISHED, status="failed", error_message=err_detail)
+
+        await asyncio.gather(*[_abandon(job) for job in abandoned], return_exceptions=True)
+        if abandoned:
+            logger.warning(f"⚠️ Shutdown abandoned {len(abandoned)} queued or running job(s); their documents are marked failed.")
+        return len(abandoned)
+
+    async def get_status(self, document_id: str) -> Dict[str, Any]:
+        """
+        Returns the job view for `GET /jobs/{id}`, backed by the document `status` field.
+        Documents not submitted through this process are looked up in Firestore, then locally.
+        """
+        job = self.get(document_id)
+        if job:
+            doc = await asyncio.to_thread(get_document, document_id, job.ctx.no_persist)
+            result = job.to_dict()
+        else:
+            doc = await asyncio.to_thread(get_document, document_id, False)
+            if doc is None and os.path.exists(os.path.join(LOCAL_TEMP_DIR, document_id, "document.json")):
+                doc = await asyncio.to_thread(get_document, document_id, True)
+            if doc is None:
+                raise HTTPException(status_code=404, detail=f"Job '{document_id}' not found.")
+            result = {"document_id": document_id, "job_state": None}
+
+        doc = doc or {}
+        result["status"] = doc.get("status", "unknown")
+        if doc.get("error_message"):
+            result["error_message"] = doc.get("error_message")
+        if doc.get("optimized_image_path"):
+            result["optimized_image_path"] = doc.get("optimized_image_path")
+        return result
+
+
+job_manager = JobManager()
@@ -0,0 +1,216 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Callable, Deque, Dict, Any, Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get("ADMISSION_MAX_WAIT_SECONDS", "180"))
+
+
+class _Waiter:
+    """One caller queued for a slot; `release` grants it the slot and wakes it."""
+
+    __slots__ = ("granted", "wake")
+
+    def __init__(self, wake: Callable[[], None]):
+        self.granted = False
+        self.wake = wake
+
+
+class AdmissionGate:
+    """
+    Semaphore-based admission control for one expensive dependency.
+
+    At most `max_concurrency` callers hold a slot at once; up to `max_queue` more may wait
+    (for at most `max_wait_seconds`). Callers beyond that are rejected immediately with
+    HTTP 429 rather than piling onto the dependency. Thread-safe, so it can guard both
+    sync tools (which ADK may run in worker threads) and async model calls. Waiters are
+    served first come, first served: `release` hands the slot directly to the oldest one,
+    waking a sync waiter's event or an async waiter's future on its own event loop, so
+    async callers wait without taking a thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait_seconds: float = ADMISSION_MAX_WAIT_SECONDS,
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._peak_queue_depth = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._wait_seconds_last = 0.0
+
+    def _reject(self, reason: str) -> HTTPException:
+        self._rejected += 1
+        detail = f"Admission rejected for '{self.name}': {reason}"
+        logger.warning(detail)
+        return HTTPException(status_code=429, detail=detail)
+
+    def _record_admit(self, waited: float) -> None:
+        self._admitted += 1
+        self._wait_seconds_last = waited
+        self._wait_seconds_total += waited
+        self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+    def ensure_capacity(self) -> None:
+        """Raises HTTP 429 when a new caller would be rejected rather than admitted or queued."""
+        with self._lock:
+            if self._in_flight >= self.max_concurrency and len(self._waiters) >= self.max_queue:
+                raise self._reject("dependency saturated; not admitting new runs.")
+
+    def _try_admit_or_enqueue(self, wake) -> Optional[_Waiter]:
+        """Takes a free slot (returns None) or queues a waiter (returns it). Caller holds the lock."""
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            self._record_admit(0.0)
+            return None
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject(f"wait queue is full ({len(self._waiters)}/{self.max_queue}).")
+        waiter = _Waiter(wake)
+        self._waiters.append(waiter)
+        self._peak_queue_depth = max(self._peak_queue_depth, len(self._waiters))
+        return waiter
+
+    def _finish_wait(self, waiter: _Waiter, start: float) -> None:
+        """Settles a waiter whose wait ended: admitted if granted, else dequeued and rejected."""
+        with self._lock:
+            if waiter.granted:
+                self._record_admit(time.monotonic() - start)
+                return
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._timed_out += 1
+            raise self._reject(f"waited more than {self.max_wait_seconds:.0f}s for a slot.")
+
+    def acquire(self) -> None:
+        event = threading.Event()
+        with self._lock:
+            waiter = self._try_admit_or_enqueue(event.set)
+        if waiter is None:
+            return
+        start = time.monotonic()
+        event.wait(self.max_wait_seconds)
+        self._finish_wait(waiter, start)
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            while self._waiters and self._in_flight < self.max_concurrency:
+                waiter = self._waiters.popleft()
+                try:
+                    waiter.wake()
+                except RuntimeError:
+                    # The waiter's event loop is closed; nobody is left to take the slot.
+                    continue
+                waiter.granted = True
+                self._in_flight += 1
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: woken.done() or woken.set_result(None))
+
+        with self._lock:
+            waiter = self._try_admit_or_enqueue(wake)
+        if waiter is None:
+            return
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(woken, self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted and waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if granted:
+                # Admitted while being cancelled; hand the slot straight back.
+                self.release()
+            raise
+        self._finish_wait(waiter, start)
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def slot_async(self):
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "peak_queue_depth": self._peak_queue_depth,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "wait_seconds_last": round(self._wait_seconds_last, 3),
+                "wait_seconds_max": round(self._wait_seconds_max, 3),
+                "wait_seconds_avg": round(self._wait_seconds_total / self._admitted, 3) if self._admitted else 0.0,
+            }
+
+
+media_model_gate = AdmissionGate(
+    "media_model",
+    max_concurrency=int(os.environ.get("MEDIA_MODEL_MAX_CONCURRENCY", "2")),
+    max_queue=int(os.environ.get("MEDIA_MODEL_MAX_QUEUE", "8")),
+)
+vision_model_gate = AdmissionGate(
+    "vision_model",
+    max_concurrency=int(os.environ.get("VISION_MODEL_MAX_CONCURRENCY", "4")),
+    max_queue=int(os.environ.get("VISION_MODEL_MAX_QUEUE", "16")),
+)
+llm_gate = AdmissionGate(
+    "llm",
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.environ.get("LLM_MAX_QUEUE", "32")),
+)
+
+ADMISSION_GATES = (media_model_gate, vision_model_gate, llm_gate)
+
+
+def check_admission_capacity() -> None:
+    """
+    Rejects a new run up front (HTTP 429) when any model dependency's wait queue is full,
+    instead of letting it fail mid-run after paying for earlier stages.
+    """
+    for gate in ADMISSION_GATES:
+        gate.ensure_capacity()
+
+
+def get_admission_metrics() -> Dict[str, Dict[str, Any]]:
+    """Returns queue-depth and wait-time gauges for every admission gate."""
+    return {gate.name: gate.metrics() for gate in ADMISSION_GATES}
@@ -0,0 +1,135 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Path of a snapshot written by `export-catalog.py`. When set, collection and micro-style lookups
+# are answered from it alone and the Public API is never called.
+CATALOG_SNAPSHOT_PATH = os.environ.get("CATALOG_SNAPSHOT_PATH", "")
+# Optional: refuse to start from a snapshot whose catalog_version differs (pinned CI runs).
+CATALOG_SNAPSHOT_VERSION = os.environ.get("CATALOG_SNAPSHOT_VERSION", "")
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+class CatalogSnapshot:
+    """A loaded catalog snapshot: raw collection items, normalized micro-styles and per-collection pools."""
+
+    def __init__(self, data: Dict[str, Any], path: str):
+        self.path = path
+        self.catalog_version = str(data.get("catalog_version") or "")
+        self.created_at = data.get("created_at")
+        self.source = data.get("source")
+        self.collections: List[Dict[str, Any]] = [i for i in data.get("collections") or [] if isinstance(i, dict)]
+        self.micro_styles: List[Dict[str, Any]] = [i for i in data.get("micro_styles") or [] if isinstance(i, dict)]
+        self.collection_micro_styles: Dict[str, List[Dict[str, Any]]] = {
+            str(slug).strip().lower(): styles
+            for slug, styles in (data.get("collection_micro_styles") or {}).items()
+            if isinstance(styles, list)
+        }
+
+    def micro_styles_for(self, collection_slug: str) -> List[Dict[str, Any]]:
+        return self.collection_micro_styles.get(collection_slug.strip().lower().replace(" ", "-"), [])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "catalog_version": self.catalog_version,
+            "created_at": self.created_at,
+            "collections": len(self.collections),
+            "micro_styles": len(self.micro_styles),
+        }
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def snapshot_mode_enabled() -> bool:
+    return bool(CATALOG_SNAPSHOT_PATH)
+
+
+def catalog_version(data: Dict[str, Any]) -> str:
+    """Content hash of the catalog sections, so identical catalogs always get the same version."""
+    content = {key: data.get(key) for key in ("collections", "micro_styles", "collection_micro_styles")}
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Loads the snapshot at CATALOG_SNAPSHOT_PATH once and keeps it for the life of the process.
+    Raises RuntimeError when the file is missing, malformed, of another format version or
+    does not match CATALOG_SNAPSHOT_VERSION.
+    """
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = _load_snapshot(CATALOG_SNAPSHOT_PATH)
+    return _snapshot
+
+
+def _load_snapshot(path: str) -> CatalogSnapshot:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"Could not read catalog snapshot '{path}': {e}")
+
+    if not isinstance(data, dict) or data.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise RuntimeError(
+            f"Catalog snapshot '{path}' is not a format_version {SNAPSHOT_FORMAT_VERSION} snapshot."
+        )
+    snapshot = CatalogSnapshot(data, path)
+    if CATALOG_SNAPSHOT_VERSION and snapshot.catalog_version != CATALOG_SNAPSHOT_VERSION:
+        raise RuntimeError(
+            f"Catalog snapshot '{path}' is version '{snapshot.catalog_version}', "
+            f"expected '{CATALOG_SNAPSHOT_VERSION}' (CATALOG_SNAPSHOT_VERSION)."
+        )
+    logger.info(
+        f"📦 Loaded catalog snapshot '{path}' v{snapshot.catalog_version}: "
+        f"{len(snapshot.collections)} collection(s), {len(snapshot.micro_styles)} micro-style(s)"
+    )
+    return snapshot
+
+
+def build_catalog_snapshot() -> Dict[str, Any]:
+    """
+    Fetches the full catalog from the Public API: the collection list, every micro-style and
+    each collection's micro-style pool. Must run with snapshot mode off.
+    """
+    from color_it_daily_agent.lib.collections import get_collection_catalog
+    from color_it_daily_agent.lib.micro_styles import fetch_all_micro_styles, fetch_collection_micro_styles
+
+    if snapshot_mode_enabled():
+        raise RuntimeError("Unset CATALOG_SNAPSHOT_PATH to export a snapshot from the Public API.")
+
+    catalog = get_collection_catalog()
+    if catalog is None:
+        raise RuntimeError("Could not fetch the collection list from the Public API.")
+
+    collection_micro_styles: Dict[str, List[Dict[str, Any]]] = {}
+    for item in catalog.items:
+        slug = str(item.get("unique_name") or item.get("slug") or item.get("name") or "").strip()
+        if not slug:
+            continue
+        key = slug.lower().replace(" ", "-")
+        if key not in collection_micro_styles:
+            collection_micro_styles[key] = fetch_collection_micro_styles(slug)
+
+    data = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "source": os.environ.get("API_BASE_URL"),
+        "collections": catalog.items,
+        "micro_styles": fetch_all_micro_styles(),
+        "collection_micro_styles": collection_micro_styles,
+    }
+    data["catalog_version"] = catalog_version(data)
+    return data
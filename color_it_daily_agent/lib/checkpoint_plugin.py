@@ -0,0 +1,246 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Optional, Dict, Any
+from datetime import datetime, timezone
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.tools.tool_context import ToolContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.models import LlmRequest, LlmResponse
+
+from color_it_daily_agent.context import get_agent_context
+from color_it_daily_agent.lib.persistence import update_document
+from color_it_daily_agent.lib.run_events import publish_run_event, EVENT_STAGE_REPLAYED
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in execution order. Recording a stage invalidates every later one.
+STAGE_CONCEPT = "concept"
+STAGE_STYLIST_OUTPUT = "stylist_output"
+STAGE_POSITIVE_PROMPT = "positive_prompt"
+STAGE_RAW_IMAGE = "raw_image_path"
+STAGE_OPTIMIZED_IMAGE = "optimized_image_path"
+STAGE_CRITIC_VERDICT = "critic_verdict"
+
+CHECKPOINT_STAGES = (
+    STAGE_CONCEPT,
+    STAGE_STYLIST_OUTPUT,
+    STAGE_POSITIVE_PROMPT,
+    STAGE_RAW_IMAGE,
+    STAGE_OPTIMIZED_IMAGE,
+    STAGE_CRITIC_VERDICT,
+)
+
+# Stages produced by the Stylist/Generator that a critic rejection sends back for rework.
+PRODUCTION_STAGES = (STAGE_STYLIST_OUTPUT, STAGE_POSITIVE_PROMPT, STAGE_RAW_IMAGE, STAGE_OPTIMIZED_IMAGE)
+
+TOOL_STAGES = {
+    "generate_image": STAGE_RAW_IMAGE,
+    "optimize_image": STAGE_OPTIMIZED_IMAGE,
+}
+
+
+def parse_agent_json_output(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parses an agent's final JSON answer, tolerating ```json fences and surrounding prose."""
+    if not text:
+        return None
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.strip("`")
+        if cleaned.lower().startswith("json"):
+            cleaned = cleaned[4:]
+    try:
+        parsed = json.loads(cleaned)
+    except ValueError:
+        start, end = cleaned.find("{"), cleaned.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            parsed = json.loads(cleaned[start:end + 1])
+        except ValueError:
+            return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def load_resume_checkpoints(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extracts the reusable stage checkpoints from a run document.
+    Local media checkpoints whose files are gone are dropped (with every later stage),
+    so the pipeline regenerates them instead of handing a dead path to the next agent.
+    """
+    stored = document.get("checkpoints") or {}
+    checkpoints: Dict[str, Any] = {}
+    for stage in CHECKPOINT_STAGES:
+        value = stored.get(stage)
+        if value is None:
+            continue
+        if stage in (STAGE_RAW_IMAGE, STAGE_OPTIMIZED_IMAGE):
+            if not str(value).startswith("gs://") and not os.path.exists(str(value)):
+                logger.warning(f"Dropping '{stage}' checkpoint: local file '{value}' no longer exists.")
+                break
+        checkpoints[stage] = value
+    return checkpoints
+
+
+def _model_response(payload: Dict[str, Any]) -> LlmResponse:
+    from google.genai import types
+
+    return LlmResponse(
+        content=types.Content(role="model", parts=[types.Part.from_text(text=json.dumps(payload, indent=2))])
+    )
+
+
+class StageCheckpointPlugin(BasePlugin):
+    """
+    ADK Plugin that checkpoints each pipeline stage's output on the run document and
+    replays those checkpoints when a failed run is resumed (`resume_document_id`).
+
+    Recorded under the document's `"checkpoints"` field:
+    - `concept`: the Creative Director's concept JSON.
+    - `stylist_output` / `positive_prompt`: the Stylist's JSON and its image prompt.
+    - `raw_image_path` / `optimized_image_path`: the Generator's tool results.
+    - `critic_verdict`: the Critic's `status` and `feedback`. A REJECT clears the production
+      stages so a resume reworks them with the Critic's feedback.
+
+    On resume, the AgentContext carries the stored checkpoints in `resume_checkpoints`; each is
+    served once instead of the model call (Creative Director, Stylist, Generator) or media tool
+    call (generate_image, optimize_image) that produced it.
+    """
+
+    def __init__(self, name: str = "StageCheckpointPlugin"):
+        super().__init__(name=name)
+
+    async def _record(self, stage: str, value: Any) -> None:
+        ctx = get_agent_context()
+        if not ctx or value is None:
+            return
+        if ctx.checkpoints.get(stage) == value:
+            return
+
+        ctx.checkpoints[stage] = value
+        later_stages = CHECKPOINT_STAGES[CHECKPOINT_STAGES.index(stage) + 1:]
+        if stage == STAGE_STYLIST_OUTPUT:
+            later_stages = later_stages[1:]
+        for later in later_stages:
+            ctx.checkpoints.pop(later, None)
+            ctx.resume_checkpoints.pop(later, None)
+        if stage == STAGE_CRITIC_VERDICT and value.get("status") != "PASS":
+            for production_stage in PRODUCTION_STAGES:
+                ctx.checkpoints.pop(production_stage, None)
+        ctx.resume_checkpoints.pop(stage, None)
+
+        # Every stage is written (None when cleared) so Firestore's merge drops stale values.
+        updates = {
+            "checkpoints": {s: ctx.checkpoints.get(s) for s in CHECKPOINT_STAGES},
+            "last_completed_stage": stage,
+        }
+        try:
+            await asyncio.to_thread(update_document, ctx.document_id, updates, ctx.no_persist)
+            logger.info(f"💾 [CHECKPOINT] Saved '{stage}' for doc '{ctx.document_id}'")
+        except Exception as e:
+            logger.error(f"Failed to save '{stage}' checkpoint for doc '{ctx.document_id}': {e}")
+
+    def _replay(self, agent_name: str) -> Optional[Dict[str, Any]]:
+        """Returns the checkpointed final answer for `agent_name`, consuming it, if one exists."""
+        ctx = get_agent_context()
+        if not ctx or not ctx.resume_checkpoints:
+            return None
+        resume = ctx.resume_checkpoints
+
+        if agent_name == "CreativeDirector" and STAGE_CONCEPT in resume:
+            payload = dict(resume.pop(STAGE_CONCEPT))
+            verdict = resume.get(STAGE_CRITIC_VERDICT) or {}
+            if verdict.get("status") == "REJECT" and STAGE_STYLIST_OUTPUT not in resume:
+                # Hand the last rejection to the Stylist as a correction-loop input.
+                payload["status"] = "REJECT"
+                payload["feedback"] = verdict.get("feedback")
+            return payload
+
+        if agent_name == "Stylist" and STAGE_STYLIST_OUTPUT in resume:
+            resume.pop(STAGE_POSITIVE_PROMPT, None)
+            return dict(resume.pop(STAGE_STYLIST_OUTPUT))
+
+        if agent_name == "Generator" and STAGE_RAW_IMAGE in resume and STAGE_OPTIMIZED_IMAGE in resume:
+            payload = dict(ctx.checkpoints.get(STAGE_STYLIST_OUTPUT) or {})
+            payload[STAGE_RAW_IMAGE] = resume.pop(STAGE_RAW_IMAGE)
+            payload[STAGE_OPTIMIZED_IMAGE] = resume.pop(STAGE_OPTIMIZED_IMAGE)
+            return payload
+
+        return None
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        """Answers the model call from a resume checkpoint instead of calling the model."""
+        payload = self._replay(callback_context.agent_name)
+        if payload is None:
+            return None
+        logger.info(f"⏭️ [RESUME] Skipping {callback_context.agent_name} model call; replaying checkpoint.")
+        ctx = get_agent_context()
+        publish_run_event(ctx.document_id, EVENT_STAGE_REPLAYED, agent=callback_context.agent_name)
+        return _model_response(payload)
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        """Checkpoints the final JSON answers of the Creative Director, Stylist and Critic."""
+        if getattr(llm_response, "partial", False) or not llm_response.content or not llm_response.content.parts:
+            return None
+        if any(getattr(part, "function_call", None) for part in llm_response.content.parts):
+            return None
+
+        text = "".join(getattr(part, "text", None) or "" for part in llm_response.content.parts)
+        output = parse_agent_json_output(text)
+        if not output:
+            return None
+
+        agent_name = callback_context.agent_name
+        if agent_name == "CreativeDirector" and output.get("title"):
+            await self._record(STAGE_CONCEPT, output)
+        elif agent_name == "Stylist" and output.get("positive_prompt"):
+            await self._record(STAGE_STYLIST_OUTPUT, output)
+            await self._record(STAGE_POSITIVE_PROMPT, output["positive_prompt"])
+        elif agent_name == "Critic" and output.get("status") in ("PASS", "REJECT"):
+            await self._record(STAGE_CRITIC_VERDICT, {
+                "status": output["status"],
+                "feedback": output.get("feedback"),
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            })
+        return None
+
+    async def before_tool_callback(
+        self,
+        *,
+        tool: BaseTool,
+        tool_args: dict[str, Any],
+        tool_context: ToolContext,
+    ) -> Optional[dict]:
+        """Answers a media tool call from a resume checkpoint instead of running it."""
+        stage = TOOL_STAGES.get(tool.name)
+        ctx = get_agent_context()
+        if not stage or not ctx or stage not in ctx.resume_checkpoints:
+            return None
+        path = ctx.resume_checkpoints.pop(stage)
+        logger.info(f"⏭️ [RESUME] Skipping {tool.name}; reusing '{path}'.")
+        publish_run_event(ctx.document_id, EVENT_STAGE_REPLAYED, tool_name=tool.name, path=path)
+        return {"result": path}
+
+    async def after_tool_callback(
+        self,
+        *,
+        tool: BaseTool,
+        tool_args: dict[str, Any],
+        tool_context: ToolContext,
+        result: dict,
+    ) -> Optional[dict]:
+        """Checkpoints the raw and optimized image paths returned by the Generator's tools."""
+        stage = TOOL_STAGES.get(tool.name)
+        if not stage:
+            return None
+        path = result.get("result") if isinstance(result, dict) else result
+        if isinstance(path, str) and path:
+            await self._record(stage, path)
+        return None
@@ -0,0 +1,36 @@
+import threading
+
+from color_it_daily_agent.app_configs import configs
+
+_storage_client = None
+_vertex_genai_client = None
+_storage_client_lock = threading.Lock()
+_vertex_genai_client_lock = threading.Lock()
+
+
+def get_storage_client():
+    """Returns the process-wide Cloud Storage client (created on first use)."""
+    global _storage_client
+    if _storage_client is None:
+        with _storage_client_lock:
+            if _storage_client is None:
+                from google.cloud import storage
+
+                _storage_client = storage.Client(project=configs.gcp_project)
+    return _storage_client
+
+
+def get_vertex_genai_client():
+    """Returns the process-wide Vertex AI Gen AI client used for media and vision calls."""
+    global _vertex_genai_client
+    if _vertex_genai_client is None:
+        with _vertex_genai_client_lock:
+            if _vertex_genai_client is None:
+                from google import genai
+
+                _vertex_genai_client = genai.Client(
+                    vertexai=True,
+                    project=configs.gcp_project,
+                    location=configs.gcp_location,
+                )
+    return _vertex_genai_client
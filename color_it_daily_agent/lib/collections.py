@@ -1,27 +1,316 @@
 import os
-import json
+import copy
+import time
 import logging
-import urllib.request
+import threading
 import urllib.parse
-import urllib.error
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+from color_it_daily_agent.lib.catalog_snapshot import get_catalog_snapshot, snapshot_mode_enabled
+from color_it_daily_agent.lib.http_client import resilient_request, public_api_breaker, upstream_degraded
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_COLLECTION_NAME = "Wonder Daily"
+COLLECTION_CATALOG_MAX_AGE_SECONDS = int(os.environ.get("COLLECTION_CATALOG_MAX_AGE_SECONDS", "300"))
+# Normalized collections are served from memory for COLLECTION_CACHE_TTL_SECONDS, then served
+# stale (while one background refresh runs) for up to COLLECTION_CACHE_MAX_STALE_SECONDS more.
+COLLECTION_CACHE_TTL_SECONDS = float(os.environ.get("COLLECTION_CACHE_TTL_SECONDS", "900"))
+COLLECTION_CACHE_MAX_STALE_SECONDS = float(os.environ.get("COLLECTION_CACHE_MAX_STALE_SECONDS", "86400"))
+
+
+class CollectionCatalog:
+    """
+    Immutable snapshot of the GET /collections list with O(1) lookups.
+
+    Items are indexed by display name, slug (`unique_name`), id and, for names given with
+    spaces, their hyphenated slug form. When two collections share a key, the first one in
+    list order wins, as the linear scan this replaces did. A refresh builds a new catalog and
+    swaps it in whole; it is only rebuilt when the list's ETag or version changes.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], etag: Optional[str] = None, version: Optional[str] = None):
+        self.items = items
+        self.etag = etag
+        self.version = version
+        self.checked_at = time.monotonic()
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._by_slug: Dict[str, Dict[str, Any]] = {}
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            name = str(item.get("display_name") or item.get("name") or "").lower().strip()
+            slug = str(item.get("unique_name") or item.get("slug") or "").lower().strip()
+            item_id = str(item.get("id") or "").lower().strip()
+            if name:
+                self._by_name.setdefault(name, item)
+            if slug:
+                self._by_slug.setdefault(slug, item)
+            if item_id:
+                self._by_id.setdefault(item_id, item)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.checked_at <= COLLECTION_CATALOG_MAX_AGE_SECONDS
+
+    def lookup(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        """Matches a collection by display name, slug or id (spaces in the name may stand for hyphens)."""
+        key = collection_name.lower().strip()
+        return (
+            self._by_name.get(key)
+            or self._by_slug.get(key)
+            or self._by_id.get(key)
+            or self._by_slug.get(key.replace(" ", "-"))
+        )
+
+
+# Last catalog built from GET /collections (primed by the start-up warm-up).
+_catalog: Optional[CollectionCatalog] = None
+
+# Normalized collection payloads keyed by lowercased requested name: (fetched_at, payload).
+_collection_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_collection_cache_lock = threading.Lock()
+_refreshing: set = set()
 
 
 def get_collection(collection_name: str) -> Optional[Dict[str, Any]]:
     """
     Look up a collection by name from the Public Collections API.
+    Answered from the in-process cache when possible: fresh entries are returned directly,
+    stale ones are returned while a background refresh fetches the current payload. While the
+    Public API circuit breaker is open (or the run's latency budget is spent), even an expired
+    entry is returned as the last known good.
     Returns the collection dict, or None if invalid/not found.
     """
     if not collection_name:
         collection_name = DEFAULT_COLLECTION_NAME
 
+    key = collection_name.lower().strip()
+    with _collection_cache_lock:
+        entry = _collection_cache.get(key)
+    if entry is not None:
+        fetched_at, payload = entry
+        age = time.monotonic() - fetched_at
+        if age <= COLLECTION_CACHE_TTL_SECONDS:
+            return copy.deepcopy(payload)
+        if age <= COLLECTION_CACHE_TTL_SECONDS + COLLECTION_CACHE_MAX_STALE_SECONDS:
+            _refresh_in_background(key, collection_name)
+            return copy.deepcopy(payload)
+
+    payload = _load_collection(collection_name)
+    if payload is not None:
+        _store(key, payload)
+    elif entry is not None and upstream_degraded(public_api_breaker):
+        logger.warning(f"Public API unavailable; serving the last known collection '{collection_name}'.")
+        payload = entry[1]
+    return copy.deepcopy(payload)
+
+
+def invalidate_collection_cache(collection_name: Optional[str] = None) -> int:
+    """
+    Drops cached collections (one by name, or all) and, when clearing everything,
+    the collection catalog. Returns the number of cache entries removed.
+    """
+    global _catalog
+
+    with _collection_cache_lock:
+        if collection_name:
+            removed = 1 if _collection_cache.pop(collection_name.lower().strip(), None) else 0
+        else:
+            removed = len(_collection_cache)
+            _collection_cache.clear()
+            _catalog = None
+    logger.info(f"Invalidated {removed} cached collection(s){f' for {collection_name!r}' if collection_name else ''}.")
+    return removed
+
+
+def get_collection_cache_stats() -> Dict[str, Any]:
+    now = time.monotonic()
+    with _collection_cache_lock:
+        ages = {key: round(now - fetched_at, 1) for key, (fetched_at, _) in _collection_cache.items()}
+        refreshing = sorted(_refreshing)
+    catalog = _catalog
+    return {
+        "catalog": {
+            "collections": len(catalog),
+            "etag": catalog.etag,
+            "version": catalog.version,
+            "age_seconds": round(now - catalog.checked_at, 1),
+        } if catalog else None,
+        "ttl_seconds": COLLECTION_CACHE_TTL_SECONDS,
+        "max_stale_seconds": COLLECTION_CACHE_MAX_STALE_SECONDS,
+        "entries": ages,
+        "refreshing": refreshing,
+    }
+
+
+def _store(key: str, payload: Dict[str, Any]) -> None:
+    with _collection_cache_lock:
+        _collection_cache[key] = (time.monotonic(), payload)
+
+
+def _refresh_in_background(key: str, collection_name: str) -> None:
+    """
+    Starts one refresh thread per stale key. The stale entry is kept if the API cannot be
+    reached, and evicted if the API answers that the collection is inactive or gone.
+    """
+    with _collection_cache_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def _refresh():
+        try:
+            payload, answered = _query_collection_api(collection_name)
+            if payload is not None:
+                _store(key, payload)
+                logger.info(f"Refreshed cached collection '{collection_name}'.")
+            elif answered:
+                with _collection_cache_lock:
+                    _collection_cache.pop(key, None)
+                logger.warning(f"Collection '{collection_name}' is inactive or no longer exists; evicted it from the cache.")
+            else:
+                logger.warning(f"Refresh of collection '{collection_name}' failed; serving the stale entry.")
+        except Exception as e:
+            logger.warning(f"Refresh of collection '{collection_name}' failed; serving the stale entry: {e}")
+        finally:
+            with _collection_cache_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=_refresh, name=f"collection-refresh-{key}", daemon=True).start()
+
+
+def _load_collection(collection_name: str) -> Optional[Dict[str, Any]]:
+    catalog = _catalog
+    if catalog is not None and catalog.is_fresh:
+        item = catalog.lookup(collection_name)
+        if item is not None:
+            logger.info(f"Loaded collection '{collection_name}' from collection catalog.")
+            return _normalize_collection_payload(item, collection_name)
+
     return _fetch_collection_from_api(collection_name)
 
 
+def get_collections(collection_names: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Looks up several collections at once (batch runs): the catalog is refreshed at most once,
+    then every name not already cached is answered from its indexes. Names the catalog does not
+    know fall back to `get_collection`. Returns {requested name: collection dict or None}.
+    """
+    names = list(dict.fromkeys(name or DEFAULT_COLLECTION_NAME for name in collection_names))
+    with _collection_cache_lock:
+        uncached = [name for name in names if name.lower().strip() not in _collection_cache]
+
+    if uncached:
+        catalog = get_collection_catalog()
+        for name in uncached:
+            item = catalog.lookup(name) if catalog else None
+            payload = _normalize_collection_payload(item, name) if item is not None else None
+            if payload is not None:
+                _store(name.lower().strip(), payload)
+
+    return {name: get_collection(name) for name in names}
+
+
+def get_collection_catalog() -> Optional[CollectionCatalog]:
+    """Returns the collection catalog, revalidating it against the API once it is older than its max age."""
+    if snapshot_mode_enabled():
+        return _snapshot_catalog()
+    catalog = _catalog
+    if catalog is not None and catalog.is_fresh:
+        return catalog
+    api_base_url = os.environ.get("API_BASE_URL")
+    if not api_base_url:
+        return catalog
+    return _refresh_catalog(f"{api_base_url.rstrip('/')}/collections", _get_api_headers()) or catalog
+
+
+def prefetch_collection_catalog() -> int:
+    """
+    Fetches the full collection list (GET <API_BASE_URL>/collections) and keeps it for lookups.
+    Returns the number of collections cached. Raises RuntimeError if the list cannot be fetched.
+    """
+    if snapshot_mode_enabled():
+        return len(_snapshot_catalog())
+
+    api_base_url = os.environ.get("API_BASE_URL")
+    if not api_base_url:
+        raise RuntimeError("API_BASE_URL environment variable is not configured.")
+
+    collections_endpoint = f"{api_base_url.rstrip('/')}/collections"
+    catalog = _refresh_catalog(collections_endpoint, _get_api_headers())
+    if catalog is None:
+        raise RuntimeError(f"Could not fetch collection catalog from '{collections_endpoint}'.")
+    return len(catalog)
+
+
+def _snapshot_catalog() -> CollectionCatalog:
+    """The catalog of the offline snapshot (CATALOG_SNAPSHOT_PATH), swapped in as the current catalog."""
+    global _catalog
+
+    snapshot = get_catalog_snapshot()
+    catalog = _catalog
+    if catalog is None or catalog.version != snapshot.catalog_version:
+        catalog = _catalog = CollectionCatalog(snapshot.collections, version=snapshot.catalog_version)
+    return catalog
+
+
+def _refresh_catalog(collections_endpoint: str, headers: Dict[str, str]) -> Optional[CollectionCatalog]:
+    """
+    GET <API_BASE_URL>/collections, conditional on the current catalog's ETag.
+    A 304, or a list with the same ETag/version, keeps the current catalog (marked fresh);
+    otherwise a new catalog is built and swapped in. Returns None on failure.
+    """
+    global _catalog
+
+    current = _catalog
+    request_headers = dict(headers)
+    if current is not None and current.etag:
+        request_headers["If-None-Match"] = current.etag
+
+    try:
+        response = resilient_request(
+            "GET", collections_endpoint, headers=request_headers, timeout=5,
+            breaker=public_api_breaker, endpoint="GET /collections",
+        )
+        if response.status_code == 304 and current is not None:
+            current.checked_at = time.monotonic()
+            return current
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            payload = response.json()
+
+            collections_list = []
+            version = None
+            if isinstance(payload, list):
+                collections_list = payload
+            elif isinstance(payload, dict):
+                version = payload.get("version")
+                if "collections" in payload and isinstance(payload["collections"], list):
+                    collections_list = payload["collections"]
+                elif "data" in payload and isinstance(payload["data"], list):
+                    collections_list = payload["data"]
+
+            if current is not None and (
+                (etag and etag == current.etag) or (version is not None and str(version) == current.version)
+            ):
+                current.checked_at = time.monotonic()
+                return current
+
+            collections_list = [item for item in collections_list if isinstance(item, dict)]
+            _catalog = CollectionCatalog(
+                collections_list, etag=etag, version=str(version) if version is not None else None
+            )
+            logger.info(f"Built collection catalog with {len(collections_list)} collection(s).")
+            return _catalog
+        logger.debug(f"API list lookup at '{collections_endpoint}' returned HTTP {response.status_code}.")
+    except Exception as e:
+        logger.debug(f"API list lookup at '{collections_endpoint}' failed: {e}")
+    return None
+
+
 def _get_api_headers() -> Dict[str, str]:
     headers = {
         "User-Agent": "ColorItDailyAgent/1.0",
@@ -36,12 +325,28 @@ def _get_api_headers() -> Dict[str, str]:
 def _fetch_collection_from_api(collection_name: str) -> Optional[Dict[str, Any]]:
     """
     Fetches collection metadata directly from the public collections API endpoint.
-    Appends /collections to the broad API_BASE_URL.
+    Appends /collections to the broad API_BASE_URL. In snapshot mode, looks it up in the snapshot instead.
+    """
+    return _query_collection_api(collection_name)[0]
+
+
+def _query_collection_api(collection_name: str) -> Tuple[Optional[Dict[str, Any]], bool]:
     """
+    `_fetch_collection_from_api` that also says whether the answer is authoritative: True when
+    the API (or snapshot) returned the collection or said it is inactive or unknown, False when
+    it could not be asked (transport error, open breaker, list unavailable).
+    """
+    if snapshot_mode_enabled():
+        item = _snapshot_catalog().lookup(collection_name)
+        if item is None:
+            logger.warning(f"Collection '{collection_name}' not found in catalog snapshot.")
+            return None, True
+        return _normalize_collection_payload(item, collection_name), True
+
     api_base_url = os.environ.get("API_BASE_URL")
     if not api_base_url:
         logger.warning("API_BASE_URL environment variable is not configured.")
-        return None
+        return None, False
 
     collections_endpoint = f"{api_base_url.rstrip('/')}/collections"
 
@@ -52,66 +357,39 @@ def _fetch_collection_from_api(collection_name: str) -> Optional[Dict[str, Any]]
 
     # 1. Try single collection endpoint: GET <API_BASE_URL>/collections/:collectionName
     single_url = f"{collections_endpoint}/{encoded_name}"
-    req = urllib.request.Request(
-        single_url,
-        headers=headers
-    )
-
     try:
-        with urllib.request.urlopen(req, timeout=5) as response:
-            if response.status == 200:
-                body = response.read().decode("utf-8")
-                item = json.loads(body)
-
-                if isinstance(item, dict):
-                    if "collection" in item and isinstance(item["collection"], dict):
-                        item = item["collection"]
-                    elif "data" in item and isinstance(item["data"], dict):
-                        item = item["data"]
-
-                if isinstance(item, dict) and (item.get("id") or item.get("unique_name") or item.get("name") or item.get("slug")):
-                    logger.info(f"Loaded collection '{collection_name}' via Public API ({single_url}).")
-                    return _normalize_collection_payload(item, collection_name)
-    except urllib.error.HTTPError as e:
-        if e.code != 404:
-            logger.debug(f"HTTP error {e.code} when requesting '{single_url}': {e}")
+        response = resilient_request(
+            "GET", single_url, headers=headers, timeout=5, breaker=public_api_breaker, endpoint="GET /collections/:name"
+        )
+        if response.status_code == 200:
+            item = response.json()
+
+            if isinstance(item, dict):
+                if "collection" in item and isinstance(item["collection"], dict):
+                    item = item["collection"]
+                elif "data" in item and isinstance(item["data"], dict):
+                    item = item["data"]
+
+            if isinstance(item, dict) and (item.get("id") or item.get("unique_name") or item.get("name") or item.get("slug")):
+                logger.info(f"Loaded collection '{collection_name}' via Public API ({single_url}).")
+                return _normalize_collection_payload(item, collection_name), True
+        elif response.status_code != 404:
+            logger.debug(f"HTTP error {response.status_code} when requesting '{single_url}': {response.reason_phrase}")
     except Exception as e:
         logger.debug(f"Direct API call for '{single_url}' failed: {e}")
 
-    # 2. Try list endpoint: GET <API_BASE_URL>/collections
-    req_list = urllib.request.Request(
-        collections_endpoint,
-        headers=headers
-    )
-    try:
-        with urllib.request.urlopen(req_list, timeout=5) as response:
-            if response.status == 200:
-                body = response.read().decode("utf-8")
-                payload = json.loads(body)
-
-                collections_list = []
-                if isinstance(payload, list):
-                    collections_list = payload
-                elif isinstance(payload, dict):
-                    if "collections" in payload and isinstance(payload["collections"], list):
-                        collections_list = payload["collections"]
-                    elif "data" in payload and isinstance(payload["data"], list):
-                        collections_list = payload["data"]
-
-                target_slug = clean_target.replace(" ", "-")
-                for item in collections_list:
-                    c_name = str(item.get("display_name") or item.get("name") or "").lower().strip()
-                    c_slug = str(item.get("unique_name") or item.get("slug") or "").lower().strip()
-                    c_id = str(item.get("id") or "").lower().strip()
-
-                    if clean_target in (c_name, c_slug, c_id) or target_slug == c_slug:
-                        logger.info(f"Loaded collection '{collection_name}' via Public API list ({collections_endpoint}).")
-                        return _normalize_collection_payload(item, collection_name)
-    except Exception as e:
-        logger.debug(f"API list lookup at '{collections_endpoint}' failed: {e}")
+    # 2. Try the collection catalog built from the list endpoint: GET <API_BASE_URL>/collections
+    #    (the last catalog built, if the list cannot be fetched)
+    fresh_catalog = _refresh_catalog(collections_endpoint, headers)
+    catalog = fresh_catalog or _catalog
+    if catalog:
+        item = catalog.lookup(collection_name)
+        if item is not None:
+            logger.info(f"Loaded collection '{collection_name}' via Public API list ({collections_endpoint}).")
+            return _normalize_collection_payload(item, collection_name), fresh_catalog is not None
 
     logger.warning(f"Collection '{collection_name}' not found via Public API ({collections_endpoint}).")
-    return None
+    return None, fresh_catalog is not None
 
 
 def _normalize_collection_payload(item: Dict[str, Any], requested_name: str) -> Optional[Dict[str, Any]]:
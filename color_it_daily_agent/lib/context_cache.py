@@ -0,0 +1,392 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Serve the static part of the agent system instructions from explicit model context caches.
+CONTEXT_CACHE_ENABLED = os.environ.get("CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+# "gemini" creates CachedContent resources; "local" is an offline stand-in that tracks
+# hits and misses in memory and sends every request unchanged.
+CONTEXT_CACHE_BACKEND = os.environ.get("CONTEXT_CACHE_BACKEND", "gemini").lower()
+CONTEXT_CACHE_TTL_SECONDS = int(os.environ.get("CONTEXT_CACHE_TTL_SECONDS", "3600"))
+# A cache this close to its expiry is recreated instead of being attached to a request that may outlive it.
+CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = int(os.environ.get("CONTEXT_CACHE_REFRESH_MARGIN_SECONDS", "120"))
+# Static parts (instruction + tool declarations) below this size are sent inline without trying:
+# ~1024 tokens at ~4 characters per token, the smallest model minimum for explicit caches. Models
+# with a higher minimum reject the create, which is then backed off like any other failure.
+CONTEXT_CACHE_MIN_CHARS = int(os.environ.get("CONTEXT_CACHE_MIN_CHARS", "4096"))
+# After a failed create, the same static part is sent inline for this long before trying again.
+CONTEXT_CACHE_RETRY_SECONDS = int(os.environ.get("CONTEXT_CACHE_RETRY_SECONDS", "1800"))
+CONTEXT_CACHE_MAX_ENTRIES = int(os.environ.get("CONTEXT_CACHE_MAX_ENTRIES", "256"))
+# A replaced or pruned cache is deleted server-side this long after it was dropped, so requests
+# already sent with it can finish; one that expires sooner than that is left to its TTL.
+CONTEXT_CACHE_DELETE_GRACE_SECONDS = int(os.environ.get("CONTEXT_CACHE_DELETE_GRACE_SECONDS", "300"))
+
+# Static instruction parts registered by the instruction builders, most recently used last.
+_STATIC_SEGMENTS_MAX = 4 * CONTEXT_CACHE_MAX_ENTRIES
+_static_segments: "OrderedDict[str, str]" = OrderedDict()
+_static_segments_lock = threading.Lock()
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def compose_instruction(static_part: str, dynamic_tail: str = "") -> str:
+    """
+    Returns `static_part + dynamic_tail` and registers `static_part` as cacheable context.
+    The static part must come first: the model wrapper recognizes it as the prefix of the
+    system instruction and only the remainder is sent with each request.
+    """
+    key = _hash(static_part)
+    with _static_segments_lock:
+        _static_segments[key] = static_part
+        _static_segments.move_to_end(key)
+        while len(_static_segments) > _STATIC_SEGMENTS_MAX:
+            _static_segments.popitem(last=False)
+    return static_part + dynamic_tail
+
+
+def split_system_instruction(system_instruction: str) -> Optional[Tuple[str, str]]:
+    """Returns (registered static prefix, dynamic tail) of a system instruction, or None if it has none."""
+    with _static_segments_lock:
+        candidates = list(_static_segments.items())
+    # Most recently registered first: the running agents' own segments are matched in a few probes.
+    for key, static_part in reversed(candidates):
+        if system_instruction.startswith(static_part):
+            with _static_segments_lock:
+                if key in _static_segments:
+                    _static_segments.move_to_end(key)
+            return static_part, system_instruction[len(static_part):]
+    return None
+
+
+def context_cache_key(model: str, static_part: str, tools: Any = None, tool_config: Any = None) -> str:
+    """Cache identity: the model, the static instruction text and the tool declarations stored with it."""
+    def dump(value: Any) -> Any:
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return [dump(v) for v in value]
+        if hasattr(value, "model_dump"):
+            return value.model_dump(mode="json", exclude_none=True)
+        return str(value)
+
+    payload = json.dumps(
+        {"model": model, "system_instruction": static_part, "tools": dump(tools), "tool_config": dump(tool_config)},
+        sort_keys=True,
+        default=str,
+    )
+    return _hash(payload)
+
+
+# Status codes of transient failures: the cache a request used is still there, so it is kept.
+_TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_cache_missing_error(error: BaseException) -> bool:
+    """
+    True when a request failed because the cached content it referenced no longer exists
+    (deleted or expired server-side). Rate limits, deadlines and server errors leave the
+    cache usable and return False.
+    """
+    code = getattr(error, "code", None)
+    if code in _TRANSIENT_STATUS_CODES:
+        return False
+    message = str(error).lower()
+    if "cache" not in message:
+        return False
+    return any(word in message for word in ("not found", "expired", "does not exist", "not exist", "permission denied"))
+
+
+@dataclass
+class CachedContext:
+    key: str
+    name: str
+    model: str
+    chars: int
+    created_at: float
+    expires_at: float
+    uses: int = 0
+
+    def fresh(self, now: float) -> bool:
+        return self.expires_at - CONTEXT_CACHE_REFRESH_MARGIN_SECONDS > now
+
+
+class GeminiContextCacheBackend:
+    """Creates CachedContent resources (system instruction + tools) through the calling model's genai client."""
+
+    name = "gemini"
+    rewrites_request = True
+
+    async def create(self, llm, model: str, key: str, static_part: str, tools, tool_config, ttl_seconds: int) -> Tuple[str, float]:
+        from google.genai import types
+
+        cached_content = await llm.api_client.aio.caches.create(
+            model=model,
+            config=types.CreateCachedContentConfig(
+                system_instruction=static_part,
+                tools=tools or None,
+                tool_config=tool_config,
+                ttl=f"{ttl_seconds}s",
+                display_name=f"color-it-daily-{key}",
+            ),
+        )
+        if not cached_content.name:
+            raise RuntimeError("The cache service returned no cache name.")
+        expire_time = getattr(cached_content, "expire_time", None)
+        expires_at = expire_time.timestamp() if expire_time else time.time() + ttl_seconds
+        return cached_content.name, expires_at
+
+    async def delete(self, llm, name: str) -> None:
+        await llm.api_client.aio.caches.delete(name=name)
+
+
+class LocalContextCacheBackend:
+    """
+    Offline stand-in for GeminiContextCacheBackend: 'creates' in-memory entries so the hit, miss,
+    expiry and retry logic can be exercised without model access. Requests are sent unchanged
+    unless `rewrites_request` is set (context-cache-check.py), as their cache names are not real.
+    """
+
+    name = "local"
+
+    def __init__(self, rewrites_request: bool = False):
+        self.rewrites_request = rewrites_request
+        self.created: Dict[str, int] = {}
+        self.deleted: List[str] = []
+
+    async def create(self, llm, model: str, key: str, static_part: str, tools, tool_config, ttl_seconds: int) -> Tuple[str, float]:
+        self.created[key] = self.created.get(key, 0) + 1
+        return f"local/cachedContents/{key}-{self.created[key]}", time.time() + ttl_seconds
+
+    async def delete(self, llm, name: str) -> None:
+        self.deleted.append(name)
+
+
+class StaticContextCache:
+    """
+    Process-wide map from context cache key to a live cached context, shared by every run.
+
+    `attach` finds the registered static prefix of a request's system instruction, reuses (or
+    creates) the cache holding it and rewrites the request to reference that cache, moving the
+    dynamic tail into the first user turn. Creation is deduplicated per event loop; failed
+    creates are not retried for CONTEXT_CACHE_RETRY_SECONDS, and those requests go out inline.
+    A cache pruned from the map well before its expiry is deleted server-side in the background
+    (after CONTEXT_CACHE_DELETE_GRACE_SECONDS), so it does not keep accruing storage until its TTL.
+    """
+
+    def __init__(self, backend, ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, CachedContext] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._pending: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._deletes: set = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.errors = 0
+        self.deleted = 0
+        self.inline = 0
+        self.chars_saved = 0
+
+    async def attach(self, llm_request, llm) -> Optional[CachedContext]:
+        """Points `llm_request` at the cache of its static instructions (in place). None = sent unchanged."""
+        config = llm_request.config
+        if config is None or config.cached_content or getattr(llm_request, "cache_config", None):
+            return None
+        system_instruction = config.system_instruction
+        if not isinstance(system_instruction, str):
+            return None
+        split = split_system_instruction(system_instruction)
+        if split is None:
+            return None
+        static_part, tail = split
+        tool_chars = sum(len(json.dumps(t.model_dump(mode="json", exclude_none=True))) for t in config.tools or [] if hasattr(t, "model_dump"))
+        if len(static_part) + tool_chars < CONTEXT_CACHE_MIN_CHARS:
+            with self._lock:
+                self.inline += 1
+            return None
+
+        model = llm_request.model
+        if not model:
+            return None
+        key = context_cache_key(model, static_part, config.tools, config.tool_config)
+        entry = await self._get_or_create(key, llm, model, static_part, config.tools, config.tool_config)
+        if entry is None or not self.backend.rewrites_request:
+            return entry
+
+        from google.genai import types
+
+        config.cached_content = entry.name
+        # A request that uses cached content may not repeat what the cache already holds.
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+        tail = tail.strip()
+        if tail:
+            tail_part = types.Part(text=tail)
+            contents = llm_request.contents
+            if contents and contents[0].role == "user":
+                contents[0] = types.Content(role="user", parts=[tail_part, *(contents[0].parts or [])])
+            else:
+                contents.insert(0, types.Content(role="user", parts=[tail_part]))
+        return entry
+
+    async def _get_or_create(self, key: str, llm, model: str, static_part: str, tools, tool_config) -> Optional[CachedContext]:
+        loop = asyncio.get_running_loop()
+        pending_key = (id(loop), key)
+        now = time.time()
+        retired: List[CachedContext] = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.fresh(now):
+                return self._use(entry)
+            if entry is not None:
+                self.expired += 1
+                del self._entries[key]
+                retired.append(entry)
+            backing_off = self._failed_until.get(key, 0) > now
+            if backing_off:
+                self.inline += 1
+            else:
+                pending = self._pending.get(pending_key)
+                owner = pending is None
+                if owner:
+                    pending = loop.create_future()
+                    self._pending[pending_key] = pending
+                    self.misses += 1
+
+        self._delete_later(llm, retired)
+        if backing_off:
+            return None
+        if not owner:
+            entry = await asyncio.shield(pending)
+            with self._lock:
+                return self._use(entry) if entry is not None else None
+
+        entry = None
+        try:
+            name, expires_at = await self.backend.create(
+                llm, model, key, static_part, tools, tool_config, self.ttl_seconds
+            )
+            entry = CachedContext(
+                key=key, name=name, model=model, chars=len(static_part),
+                created_at=time.time(), expires_at=expires_at, uses=1,
+            )
+            with self._lock:
+                self._entries[key] = entry
+                self._failed_until.pop(key, None)
+                pruned = self._prune(time.time())
+            self._delete_later(llm, pruned)
+            logger.info(f"🧊 Cached static instructions {key} ({len(static_part)} chars) as '{name}' for {self.ttl_seconds}s")
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self._failed_until[key] = time.time() + CONTEXT_CACHE_RETRY_SECONDS
+            logger.warning(f"⚠️ Could not cache static instructions {key}; sending them inline for {CONTEXT_CACHE_RETRY_SECONDS}s: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(pending_key, None)
+            if not pending.done():
+                pending.set_result(entry)
+        return entry
+
+    def _use(self, entry: CachedContext) -> CachedContext:
+        self.hits += 1
+        self.chars_saved += entry.chars
+        entry.uses += 1
+        return entry
+
+    def _prune(self, now: float) -> List[CachedContext]:
+        """Drops stale entries and the oldest beyond CONTEXT_CACHE_MAX_ENTRIES. Returns the dropped ones."""
+        pruned = [e for e in self._entries.values() if not e.fresh(now)]
+        for entry in pruned:
+            del self._entries[entry.key]
+        while len(self._entries) > CONTEXT_CACHE_MAX_ENTRIES:
+            oldest = min(self._entries.values(), key=lambda e: e.expires_at)
+            del self._entries[oldest.key]
+            pruned.append(oldest)
+        return pruned
+
+    def _delete_later(self, llm, entries: List[CachedContext]) -> None:
+        """Deletes dropped caches server-side without holding up the request that dropped them."""
+        now = time.time()
+        for entry in entries:
+            if entry.expires_at - now <= CONTEXT_CACHE_DELETE_GRACE_SECONDS:
+                continue
+            task = asyncio.get_running_loop().create_task(self._delete(llm, entry))
+            self._deletes.add(task)
+            task.add_done_callback(self._deletes.discard)
+
+    async def _delete(self, llm, entry: CachedContext) -> None:
+        try:
+            await asyncio.sleep(CONTEXT_CACHE_DELETE_GRACE_SECONDS)
+            await self.backend.delete(llm, entry.name)
+            with self._lock:
+                self.deleted += 1
+            logger.debug(f"Deleted replaced context cache '{entry.name}'")
+        except Exception as e:
+            # It still expires on its own TTL.
+            logger.debug(f"Could not delete context cache '{entry.name}': {e}")
+
+    def invalidate(self, key: Optional[str] = None, name: Optional[str] = None) -> int:
+        """
+        Forgets one cache (e.g. after the model reported it missing) or all of them. Returns how
+        many. With `name`, the entry is only forgotten if it is still that cache, so a request
+        failing on an old cache does not drop the one that already replaced it.
+        """
+        with self._lock:
+            if key is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._failed_until.clear()
+                return count
+            entry = self._entries.get(key)
+            if entry is None or (name is not None and entry.name != name):
+                return 0
+            del self._entries[key]
+            return 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": CONTEXT_CACHE_ENABLED,
+                "backend": self.backend.name,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": sum(1 for e in self._entries.values() if e.fresh(now)),
+                "registered_segments": len(_static_segments),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "deleted": self.deleted,
+                "errors": self.errors,
+                "sent_inline": self.inline,
+                "chars_saved": self.chars_saved,
+            }
+
+
+def _make_backend():
+    if CONTEXT_CACHE_BACKEND == "local":
+        return LocalContextCacheBackend()
+    return GeminiContextCacheBackend()
+
+
+static_context_cache = StaticContextCache(_make_backend())
+
+
+def get_context_cache_stats() -> Dict[str, Any]:
+    return static_context_cache.stats()
@@ -0,0 +1,58 @@
+import os
+import logging
+from typing import Optional
+
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.run_config import RunConfig, ToolThreadPoolConfig
+from google.genai import types
+
+from color_it_daily_agent.context import get_agent_context, set_agent_context, lookup_run_context
+
+logger = logging.getLogger(__name__)
+
+TOOL_THREAD_POOL_WORKERS = int(os.environ.get("TOOL_THREAD_POOL_WORKERS", "8"))
+
+
+class AgentContextPlugin(BasePlugin):
+    """
+    ADK Plugin that binds each invocation to the AgentContext of the run it belongs to.
+
+    `/run` and the job workers prepare a run (and its document) before handing it to the ADK
+    runner, registering the context under the session id with `bind_run_context`. This plugin
+    looks it up in `before_run_callback`, which executes in the runner's own task before the
+    agent tree is scheduled, so every agent task, plugin hook and tool thread of that invocation
+    sees its own run's context regardless of what the calling task had set.
+
+    It also runs synchronous tools (image generation, potrace, downloads) on ADK's tool thread
+    pool, with a copy of the run's context, so one run's blocking tool call does not stall the
+    event loop every other run shares.
+
+    Must be the first plugin so the trace and checkpoint plugins see the bound context.
+    """
+
+    def __init__(self, name: str = "AgentContextPlugin"):
+        super().__init__(name=name)
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> Optional[types.Content]:
+        run_config = invocation_context.run_config or RunConfig()
+        if run_config.tool_thread_pool_config is None:
+            invocation_context.run_config = run_config.model_copy(
+                update={"tool_thread_pool_config": ToolThreadPoolConfig(max_workers=TOOL_THREAD_POOL_WORKERS)}
+            )
+
+        session_id = invocation_context.session.id if invocation_context.session else None
+        ctx = lookup_run_context(session_id)
+        if ctx is None:
+            return None
+
+        current = get_agent_context()
+        if current is not None and current is not ctx:
+            logger.warning(
+                f"Replacing AgentContext for doc '{current.document_id}' with doc '{ctx.document_id}' "
+                f"bound to session '{session_id}'."
+            )
+        set_agent_context(ctx)
+        return None
@@ -1,15 +1,23 @@
-from google.cloud import firestore
+import threading
+
 from color_it_daily_agent.app_configs import configs
 
 _db = None
+# Concurrent first calls (warm-up, request threads) must not each build a client.
+_db_lock = threading.Lock()
 
 
 def get_db():
     global _db
     if _db is None:
-        project_id = configs.firestore_project_id or configs.gcp_project
-        if project_id:
-            _db = firestore.Client(project=project_id)
-        else:
-            _db = firestore.Client()
+        with _db_lock:
+            if _db is None:
+                # Imported on first use so the server starts without loading the Firestore SDK.
+                from google.cloud import firestore
+
+                project_id = configs.firestore_project_id or configs.gcp_project
+                if project_id:
+                    _db = firestore.Client(project=project_id)
+                else:
+                    _db = firestore.Client()
     return _db
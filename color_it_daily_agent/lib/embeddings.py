@@ -1,14 +1,18 @@
 import os
-from google import genai
-from google.genai.types import EmbedContentConfig
+import threading
 
 _client = None
+_client_lock = threading.Lock()
 
 
 def get_genai_client():
     global _client
     if _client is None:
-        _client = genai.Client()
+        with _client_lock:
+            if _client is None:
+                from google import genai
+
+                _client = genai.Client()
     return _client
 
 
@@ -33,6 +37,8 @@ def generate_embedding(
     Returns:
         list[float]: The embedding vector values.
     """
+    from google.genai.types import EmbedContentConfig
+
     client = get_genai_client()
 
     try:
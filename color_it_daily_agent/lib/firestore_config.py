@@ -1,6 +1,10 @@
+import hashlib
+import json
 import logging
 import os
-from typing import Dict, Any
+import time
+import threading
+from typing import Dict, Any, Optional, Tuple
 from color_it_daily_agent.lib.database import get_db
 from color_it_daily_agent.app_configs import configs
 
@@ -8,6 +12,166 @@ logger = logging.getLogger(__name__)
 
 CONFIG_FIRESTORE_COLLECTION = os.environ.get("FIRESTORE_CONFIG_COLLECTION", "coloritdaily_config")
 CONFIG_FIRESTORE_DOC_ID = os.environ.get("FIRESTORE_CONFIG_DOC_ID", "agent_input")
+# Keep the override document in memory via an on_snapshot listener ("false" = one read per run).
+INPUT_OVERRIDES_LIVE_SYNC = os.environ.get("INPUT_OVERRIDES_LIVE_SYNC", "true").lower() == "true"
+# How often the supervisor polls the document while the listener is down (and re-subscribes it).
+INPUT_OVERRIDES_POLL_SECONDS = float(os.environ.get("INPUT_OVERRIDES_POLL_SECONDS", "15"))
+
+
+def _extract_overrides(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: v for k, v in (data or {}).items() if v is not None}
+
+
+def overrides_version(overrides: Dict[str, Any]) -> str:
+    """Content hash of the override fields: the same overrides get the same version in every process."""
+    canonical = json.dumps(overrides, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def _read_overrides(collection_name: str, doc_id: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    """Reads the override document once. Returns (non-null fields, update time); raises on access errors."""
+    snapshot = get_db().collection(collection_name).document(doc_id).get()
+    if not snapshot.exists:
+        logger.debug(f"Firestore config document '{collection_name}/{doc_id}' not found. Proceeding with request payload.")
+        return {}, None
+    update_time = getattr(snapshot, "update_time", None)
+    return _extract_overrides(snapshot.to_dict()), str(update_time) if update_time else None
+
+
+class InputOverrideStore:
+    """
+    In-process copy of the Firestore override document ('coloritdaily_config/agent_input').
+
+    Reads are served from memory. An `on_snapshot` listener applies document changes as they
+    happen; a supervisor thread polls the document every INPUT_OVERRIDES_POLL_SECONDS whenever
+    the listener is not active (it failed to start, or its stream died) and tries to re-subscribe.
+    `version` is a hash of the document's content, so each run can record which overrides it
+    used and runs on different instances with the same overrides record the same version.
+    """
+
+    def __init__(self, collection_name: str, doc_id: str):
+        self.collection_name = collection_name
+        self.doc_id = doc_id
+        self.version: Optional[str] = None
+        self.update_time: Optional[str] = None
+        self.source: Optional[str] = None
+        self.synced_at: Optional[float] = None
+        self._overrides: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._watch = None
+        self._stop = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> str:
+        return f"{self.collection_name}/{self.doc_id}"
+
+    def _apply(self, overrides: Dict[str, Any], update_time: Optional[str], source: str) -> None:
+        with self._lock:
+            changed = self.synced_at is None or overrides != self._overrides
+            if changed:
+                self._overrides = overrides
+                self.version = overrides_version(overrides)
+                self.update_time = update_time
+            self.source = source
+            self.synced_at = time.monotonic()
+        if changed:
+            logger.info(
+                f"⚙️ Input overrides version {self.version} from '{self.path}' ({source}): {len(overrides)} field(s)"
+            )
+
+    def _poll(self) -> None:
+        try:
+            overrides, update_time = _read_overrides(self.collection_name, self.doc_id)
+            self._apply(overrides, update_time, "poll")
+        except Exception as e:
+            logger.debug(f"Firestore config check skipped for '{self.path}': {e}")
+
+    def _on_snapshot(self, doc_snapshots, changes, read_time) -> None:
+        snapshot = doc_snapshots[0] if doc_snapshots else None
+        if snapshot is None or not snapshot.exists:
+            self._apply({}, None, "listener")
+            return
+        update_time = getattr(snapshot, "update_time", None)
+        self._apply(_extract_overrides(snapshot.to_dict()), str(update_time) if update_time else None, "listener")
+
+    def _subscribe(self) -> None:
+        try:
+            doc_ref = get_db().collection(self.collection_name).document(self.doc_id)
+            self._watch = doc_ref.on_snapshot(self._on_snapshot)
+            logger.info(f"Listening for input override changes on '{self.path}'.")
+        except Exception as e:
+            self._watch = None
+            logger.debug(f"Could not listen on '{self.path}'; polling instead: {e}")
+
+    @property
+    def listening(self) -> bool:
+        watch = self._watch
+        return watch is not None and bool(getattr(watch, "is_active", False))
+
+    def _supervise(self) -> None:
+        while not self._stop.wait(INPUT_OVERRIDES_POLL_SECONDS):
+            if self.listening:
+                continue
+            self._poll()
+            self._subscribe()
+
+    def start(self) -> None:
+        """Loads the document once, then keeps it in sync in the background (idempotent)."""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        self._poll()
+        if not INPUT_OVERRIDES_LIVE_SYNC:
+            return
+        self._subscribe()
+        self._stop.clear()
+        self._supervisor = threading.Thread(target=self._supervise, name="input-overrides-sync", daemon=True)
+        self._supervisor.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        watch, self._watch = self._watch, None
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.debug(f"Unsubscribing from '{self.path}' failed: {e}")
+        with self._start_lock:
+            self._started = False
+
+    def get(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Returns (a copy of the overrides, their version). Without live sync, re-reads the document."""
+        if not INPUT_OVERRIDES_LIVE_SYNC:
+            self._poll()
+        else:
+            self.start()
+        with self._lock:
+            return dict(self._overrides), self.version
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "document": self.path,
+                "version": self.version,
+                "update_time": self.update_time,
+                "fields": sorted(self._overrides),
+                "source": self.source,
+                "listening": self.listening,
+                "age_seconds": round(time.monotonic() - self.synced_at, 1) if self.synced_at else None,
+            }
+
+
+input_override_store = InputOverrideStore(CONFIG_FIRESTORE_COLLECTION, CONFIG_FIRESTORE_DOC_ID)
+
+
+def load_versioned_input_overrides() -> Tuple[Dict[str, Any], Optional[str]]:
+    """Returns the default override document's non-null fields and their version, from memory."""
+    return input_override_store.get()
+
 
 def load_firestore_input_overrides(
     collection_name: str = CONFIG_FIRESTORE_COLLECTION,
@@ -15,22 +179,18 @@ def load_firestore_input_overrides(
 ) -> Dict[str, Any]:
     """
     Loads configuration dictionary from Firestore document (default 'coloritdaily_config/agent_input').
+    The default document is served from the live-synced `input_override_store`; any other is read directly.
     If the document does not exist or cannot be accessed, it is gracefully ignored.
     Returns a dictionary of non-null override fields.
     """
+    if (collection_name, doc_id) == (input_override_store.collection_name, input_override_store.doc_id):
+        return load_versioned_input_overrides()[0]
+
     overrides = {}
     try:
-        db = get_db()
-        doc_ref = db.collection(collection_name).document(doc_id).get()
-        if doc_ref.exists:
-            data = doc_ref.to_dict() or {}
-            for k, v in data.items():
-                if v is not None:
-                    overrides[k] = v
-            logger.info(f"Loaded {len(overrides)} input override(s) from Firestore '{collection_name}/{doc_id}'")
-        else:
-            logger.debug(f"Firestore config document '{collection_name}/{doc_id}' not found. Proceeding with request payload.")
+        overrides, _ = _read_overrides(collection_name, doc_id)
+        logger.info(f"Loaded {len(overrides)} input override(s) from Firestore '{collection_name}/{doc_id}'")
     except Exception as e:
         logger.debug(f"Firestore config check skipped for '{collection_name}/{doc_id}': {e}")
-        
+
     return overrides
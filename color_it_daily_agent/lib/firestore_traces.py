@@ -0,0 +1,262 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from color_it_daily_agent.lib.trace_summary import TraceSummary
+
+logger = logging.getLogger(__name__)
+
+# A run's buffered trace entries are written once this many are pending...
+TRACE_FLUSH_MAX_ENTRIES = int(os.environ.get("TRACE_FLUSH_MAX_ENTRIES", "25"))
+# ...or once the oldest pending entry is this old (checked as entries arrive and by a background ticker).
+TRACE_FLUSH_INTERVAL_SECONDS = float(os.environ.get("TRACE_FLUSH_INTERVAL_SECONDS", "5"))
+# How often the ticker looks for buffers whose oldest entry has passed the interval.
+_FLUSH_TICK_SECONDS = max(0.5, TRACE_FLUSH_INTERVAL_SECONDS / 2)
+
+# Threads writing flushed batches, so one run's Firestore latency does not hold up the trace writer.
+TRACE_FLUSH_WORKERS = int(os.environ.get("TRACE_FLUSH_WORKERS", "4"))
+
+# Subcollection of each page document holding its trace entries, one document per sequence number.
+TRACES_SUBCOLLECTION = "traces"
+# Firestore accepts at most 500 writes per batch; one is kept for the summary update.
+_MAX_BATCH_WRITES = 499
+
+
+class FirestoreTraceBuffer:
+    """
+    Write-behind buffer of one run's trace entries for its `coloring_pages/<id>` document.
+
+    Entries are collected in memory and written in batches: each flush commits one Firestore
+    batch that creates `coloring_pages/<id>/traces/<seq>` for every pending entry and refreshes
+    the small `trace_summary` map on the page document. Flushes are serialized, so sequence
+    numbers follow the order entries were recorded; a batch that fails to write goes back to
+    the front of the buffer and is retried (under the same sequence numbers) by the next flush.
+    """
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        self._pending: List[Dict[str, Any]] = []
+        self._oldest_pending_at: Optional[float] = None
+        self._flush_requested = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._next_seq: Optional[int] = None
+        self.summary = TraceSummary()
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    def add(self, entry: Dict[str, Any]) -> bool:
+        """
+        Buffers one entry. Returns True when the buffer has just reached a flush threshold and
+        the caller should schedule a flush (only once until that flush takes the batch).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._pending.append(entry)
+            self.summary.add(entry)
+            self.recorded += 1
+            if self._oldest_pending_at is None:
+                self._oldest_pending_at = now
+            due = (
+                len(self._pending) >= TRACE_FLUSH_MAX_ENTRIES
+                or now - self._oldest_pending_at >= TRACE_FLUSH_INTERVAL_SECONDS
+            )
+            if due and not self._flush_requested:
+                self._flush_requested = True
+                return True
+            return False
+
+    def request_flush(self) -> bool:
+        """Returns True if entries are pending and no flush has been requested for them yet."""
+        with self._lock:
+            if not self._pending or self._flush_requested:
+                return False
+            self._flush_requested = True
+            return True
+
+    def request_flush_if_stale(self, now: float) -> bool:
+        """Like `request_flush`, but only once the oldest pending entry is TRACE_FLUSH_INTERVAL_SECONDS old."""
+        with self._lock:
+            if not self._pending or self._flush_requested or self._oldest_pending_at is None:
+                return False
+            if now - self._oldest_pending_at < TRACE_FLUSH_INTERVAL_SECONDS:
+                return False
+            self._flush_requested = True
+            return True
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Writes every pending entry in one request (blocking). Returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._oldest_pending_at = None
+                self._flush_requested = False
+            if not batch:
+                return 0
+            try:
+                if self._next_seq is None:
+                    # A resumed run continues the sequence (and totals) stored by its earlier attempt.
+                    stored = _read_trace_summary(self.document_id)
+                    with self._lock:
+                        self.summary.merge(stored)
+                    self._next_seq = (stored or {}).get("events", 0) + 1
+                with self._lock:
+                    summary = self.summary.to_dict()
+                _write_batch(self.document_id, batch, self._next_seq, summary)
+                self._next_seq += len(batch)
+            except Exception as e:
+                with self._lock:
+                    self._pending = batch + self._pending
+                    self._oldest_pending_at = time.monotonic()
+                logger.error(f"Failed to flush {len(batch)} trace(s) to Firestore for doc '{self.document_id}': {e}")
+                return 0
+            self.flushed += len(batch)
+            self.flushes += 1
+            logger.info(f"📍 [TRACE LOGGED] Flushed {len(batch)} trace(s) to Firestore doc '{self.document_id}'")
+            return len(batch)
+
+
+def _page_ref(document_id: str):
+    from color_it_daily_agent.lib.database import get_db
+    from color_it_daily_agent.app_configs import configs
+
+    return get_db().collection(configs.coloring_page_collection).document(document_id)
+
+
+def trace_document_id(seq: int) -> str:
+    """Zero-padded so the trace documents of a run list in sequence order."""
+    return f"{seq:06d}"
+
+
+def _read_trace_summary(document_id: str) -> Optional[Dict[str, Any]]:
+    snapshot = _page_ref(document_id).get()
+    return (snapshot.to_dict() or {}).get("trace_summary") if snapshot.exists else None
+
+
+def _write_batch(document_id: str, batch: List[Dict[str, Any]], first_seq: int, summary: Dict[str, Any]) -> None:
+    from color_it_daily_agent.lib.database import get_db
+
+    db = get_db()
+    page_ref = _page_ref(document_id)
+    traces_ref = page_ref.collection(TRACES_SUBCOLLECTION)
+    for start in range(0, len(batch), _MAX_BATCH_WRITES):
+        chunk = batch[start:start + _MAX_BATCH_WRITES]
+        write = db.batch()
+        for offset, entry in enumerate(chunk):
+            seq = first_seq + start + offset
+            write.set(traces_ref.document(trace_document_id(seq)), {**entry, "seq": seq})
+        if start + _MAX_BATCH_WRITES >= len(batch):
+            write.set(page_ref, {"trace_summary": summary, "updated_at": datetime.now(timezone.utc)}, merge=True)
+        write.commit()
+
+
+def read_firestore_traces(document_id: str) -> List[Dict[str, Any]]:
+    """Returns a run's trace entries from its `traces` subcollection, in sequence order."""
+    traces_ref = _page_ref(document_id).collection(TRACES_SUBCOLLECTION)
+    return [snapshot.to_dict() for snapshot in traces_ref.order_by("seq").stream()]
+
+
+_buffers: Dict[str, FirestoreTraceBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_trace_buffer(document_id: str) -> FirestoreTraceBuffer:
+    buffer = _buffers.get(document_id)
+    if buffer is None:
+        with _buffers_lock:
+            buffer = _buffers.setdefault(document_id, FirestoreTraceBuffer(document_id))
+    return buffer
+
+
+_flush_executor: Optional[ThreadPoolExecutor] = None
+_flush_executor_lock = threading.Lock()
+_flush_ticker_stop = threading.Event()
+
+
+def _ensure_flush_executor() -> None:
+    global _flush_executor
+    if _flush_executor is None:
+        with _flush_executor_lock:
+            if _flush_executor is None:
+                _flush_executor = ThreadPoolExecutor(max_workers=TRACE_FLUSH_WORKERS, thread_name_prefix="trace-flush")
+                _flush_ticker_stop.clear()
+                threading.Thread(target=_flush_ticker, name="trace-flush-ticker", daemon=True).start()
+
+
+def _flush_ticker() -> None:
+    """
+    Flushes buffers whose oldest entry has waited TRACE_FLUSH_INTERVAL_SECONDS, so a run that
+    stops producing entries (a long tool call, a stalled model) still gets its traces written.
+    Also retries batches that failed to write.
+    """
+    while not _flush_ticker_stop.wait(_FLUSH_TICK_SECONDS):
+        now = time.monotonic()
+        with _buffers_lock:
+            buffers = list(_buffers.values())
+        for buffer in buffers:
+            if buffer.request_flush_if_stale(now):
+                flush_in_background(buffer)
+
+
+def flush_in_background(buffer: FirestoreTraceBuffer) -> None:
+    """Flushes `buffer` on the trace flush pool; its flush lock keeps the run's batches in order."""
+    _ensure_flush_executor()
+    _flush_executor.submit(buffer.flush)
+
+
+def finish_in_background(document_id: str) -> Future:
+    """Runs `finish_trace_buffer` on the trace flush pool and returns its future."""
+    _ensure_flush_executor()
+    return _flush_executor.submit(finish_trace_buffer, document_id)
+
+
+def shutdown_trace_buffers() -> int:
+    """
+    Server shutdown (blocking): stops the ticker, waits for the flushes already on the pool, then
+    writes every buffer still held, including those of runs that never reached their run end.
+    Returns how many buffers were left to drain.
+    """
+    global _flush_executor
+    _flush_ticker_stop.set()
+    with _flush_executor_lock:
+        executor, _flush_executor = _flush_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    with _buffers_lock:
+        document_ids = list(_buffers)
+    for document_id in document_ids:
+        finish_trace_buffer(document_id)
+    if document_ids:
+        logger.warning(f"⚠️ Shutdown drained the Firestore traces of {len(document_ids)} unfinished run(s).")
+    return len(document_ids)
+
+
+def peek_trace_buffer(document_id: str) -> Optional[FirestoreTraceBuffer]:
+    return _buffers.get(document_id)
+
+
+def finish_trace_buffer(document_id: str) -> Optional[FirestoreTraceBuffer]:
+    """Flushes what is left of a run's traces (blocking) and forgets its buffer. Run end only."""
+    with _buffers_lock:
+        buffer = _buffers.pop(document_id, None)
+    if buffer is None:
+        return None
+    buffer.flush()
+    if buffer.pending:
+        logger.error(f"❌ {buffer.pending} trace(s) of doc '{document_id}' could not be written to Firestore.")
+    else:
+        logger.info(
+            f"📍 [TRACE LOGGED] {buffer.flushed} trace(s) written to Firestore doc '{document_id}' "
+            f"in {buffer.flushes} batch(es)"
+        )
+    return buffer
@@ -0,0 +1,38 @@
+from typing import AsyncGenerator
+
+from google.adk.models import Gemini, LlmRequest, LlmResponse
+
+from color_it_daily_agent.lib.admission import llm_gate
+from color_it_daily_agent.lib.context_cache import CONTEXT_CACHE_ENABLED, is_cache_missing_error, static_context_cache
+
+
+class GatedGemini(Gemini):
+    """
+    Gemini model that takes a slot from the shared LLM admission gate for the
+    duration of each request, so overlapping runs queue instead of all hitting
+    Vertex at once. The static part of the system instruction is served from an
+    explicit context cache shared across runs (see lib/context_cache.py).
+    """
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        cached = None
+        if CONTEXT_CACHE_ENABLED:
+            cached = await static_context_cache.attach(llm_request, self)
+        # Responses are collected while holding the slot and yielded after releasing it: ADK runs
+        # the response's tool calls (image generation, vision checks) while this generator is
+        # paused at `yield`, and those must not keep an LLM slot taken.
+        responses = []
+        async with llm_gate.slot_async():
+            try:
+                async for llm_response in super().generate_content_async(llm_request, stream=stream):
+                    responses.append(llm_response)
+            except Exception as e:
+                # Only a cache the model reports missing or expired is recreated; after a rate limit
+                # or deadline the same cache is reused by the next request.
+                if cached is not None and is_cache_missing_error(e):
+                    static_context_cache.invalidate(cached.key, cached.name)
+                raise
+        for llm_response in responses:
+            yield llm_response
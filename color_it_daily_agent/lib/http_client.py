@@ -0,0 +1,430 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+import urllib.parse
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT_SECONDS = float(os.environ.get("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "64"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get("HTTP_MAX_CONNECTIONS_PER_HOST", "16"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "32"))
+HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+
+# Retries for dependency calls (see `resilient_request`): full-jitter exponential backoff.
+HTTP_RETRY_MAX_ATTEMPTS = int(os.environ.get("HTTP_RETRY_MAX_ATTEMPTS", "3"))
+HTTP_RETRY_BASE_DELAY_SECONDS = float(os.environ.get("HTTP_RETRY_BASE_DELAY_SECONDS", "0.2"))
+HTTP_RETRY_MAX_DELAY_SECONDS = float(os.environ.get("HTTP_RETRY_MAX_DELAY_SECONDS", "2"))
+# Total time one run may spend on Public API calls, retries included.
+PUBLIC_API_RUN_BUDGET_SECONDS = float(os.environ.get("PUBLIC_API_RUN_BUDGET_SECONDS", "15"))
+PUBLIC_API_BREAKER_FAILURE_THRESHOLD = int(os.environ.get("PUBLIC_API_BREAKER_FAILURE_THRESHOLD", "5"))
+PUBLIC_API_BREAKER_RESET_SECONDS = float(os.environ.get("PUBLIC_API_BREAKER_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_HEADERS = {"User-Agent": "ColorItDailyAgent/1.0"}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+def _host_key(url: str) -> str:
+    parsed = urllib.parse.urlsplit(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+class EndpointStats:
+    """Latency and outcome counters for one logical endpoint (e.g. 'GET /collections')."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+        self.seconds_last = 0.0
+
+    def record(self, seconds: float, status: Optional[int]) -> None:
+        self.requests += 1
+        self.seconds_last = seconds
+        self.seconds_total += seconds
+        self.seconds_max = max(self.seconds_max, seconds)
+        if status is None:
+            self.errors += 1
+        else:
+            key = f"{status // 100}xx"
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "seconds_last": round(self.seconds_last, 4),
+            "seconds_max": round(self.seconds_max, 4),
+            "seconds_avg": round(self.seconds_total / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+_endpoint_stats: Dict[str, EndpointStats] = {}
+_endpoint_stats_lock = threading.Lock()
+
+
+def _record(endpoint: str, started: float, status: Optional[int]) -> None:
+    elapsed = time.perf_counter() - started
+    with _endpoint_stats_lock:
+        stats = _endpoint_stats.get(endpoint)
+        if stats is None:
+            stats = _endpoint_stats[endpoint] = EndpointStats()
+        stats.record(elapsed, status)
+
+
+def get_http_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-endpoint request counts, status classes and latency (seconds) since start-up."""
+    with _endpoint_stats_lock:
+        return {endpoint: stats.snapshot() for endpoint, stats in sorted(_endpoint_stats.items())}
+
+
+def _endpoint_label(method: str, url: str, endpoint: Optional[str]) -> str:
+    # Callers pass a route template ("GET /collections/:name") so ids do not explode the label set.
+    if endpoint:
+        return endpoint
+    return f"{method.upper()} {_host_key(url)}"
+
+
+# --- Sync client -------------------------------------------------------------
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_host_slots: Dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Returns the process-wide pooled HTTP client (keep-alive connections, default timeouts)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    limits=_limits(), timeout=_timeout(), headers=DEFAULT_HEADERS, follow_redirects=True
+                )
+    return _client
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = _host_key(url)
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_CONNECTIONS_PER_HOST)
+    return slot
+
+
+def http_request(method: str, url: str, *, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+    """
+    Sends a request through the shared client and returns the response without raising on
+    HTTP error statuses (callers check `status_code` or call `raise_for_status()`).
+    At most HTTP_MAX_CONNECTIONS_PER_HOST requests per host are in flight at once.
+    `endpoint` labels the latency counters; kwargs are passed to `httpx.Client.request`.
+    """
+    label = _endpoint_label(method, url, endpoint)
+    slot = _host_slot(url)
+    with slot:
+        started = time.perf_counter()
+        try:
+            response = get_http_client().request(method, url, **kwargs)
+        except Exception:
+            _record(label, started, None)
+            raise
+    _record(label, started, response.status_code)
+    return response
+
+
+# --- Async client ------------------------------------------------------------
+
+# httpx.AsyncClient and asyncio.Semaphore belong to the loop that first uses them,
+# so each event loop gets its own client and per-host slots.
+_async_clients: Dict[int, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient, Dict[str, asyncio.Semaphore]]] = {}
+_async_clients_lock = threading.Lock()
+
+
+def _async_state() -> Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]:
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        state = _async_clients.get(id(loop))
+        if state is None or state[0] is not loop:
+            for key in [key for key, (other, _, _) in _async_clients.items() if other.is_closed()]:
+                del _async_clients[key]
+            state = _async_clients[id(loop)] = (
+                loop,
+                httpx.AsyncClient(limits=_limits(), timeout=_timeout(), headers=DEFAULT_HEADERS, follow_redirects=True),
+                {},
+            )
+    return state[1], state[2]
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Returns the pooled async HTTP client of the running event loop (created on first use)."""
+    return _async_state()[0]
+
+
+async def async_http_request(method: str, url: str, *, endpoint: Optional[str] = None, **kwargs) -> httpx.Response:
+    """Async counterpart of `http_request`, sharing its per-endpoint latency counters."""
+    client, slots = _async_state()
+    host = _host_key(url)
+    slot = slots.get(host)
+    if slot is None:
+        slot = slots.setdefault(host, asyncio.Semaphore(HTTP_MAX_CONNECTIONS_PER_HOST))
+
+    label = _endpoint_label(method, url, endpoint)
+    async with slot:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            _record(label, started, None)
+            raise
+    _record(label, started, response.status_code)
+    return response
+
+
+def close_http_clients() -> None:
+    """Closes the shared sync client; the next request opens a new one."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+        logger.info("Closed shared HTTP client.")
+
+
+async def aclose_http_clients() -> None:
+    """Closes the running loop's async client and the shared sync client (e.g. on shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        state = _async_clients.pop(id(loop), None)
+    if state is not None and state[0] is loop:
+        await state[1].aclose()
+    close_http_clients()
+
+
+# --- Retries, latency budget & circuit breaker --------------------------------
+
+
+class UpstreamUnavailableError(Exception):
+    """A dependency call was not attempted (or not retried) because it could not succeed in time."""
+
+
+class CircuitOpenError(UpstreamUnavailableError):
+    pass
+
+
+class LatencyBudgetExceeded(UpstreamUnavailableError):
+    pass
+
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one dependency.
+
+    After `failure_threshold` failed requests in a row the breaker opens and requests fail
+    immediately with CircuitOpenError, so callers fall back to their last-known-good cache
+    instead of waiting on timeouts. After `reset_seconds` one trial request is let through
+    (half-open): success closes the breaker, failure opens it again. Thread-safe.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = BREAKER_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == BREAKER_OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return BREAKER_HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != BREAKER_CLOSED
+
+    def before_request(self) -> None:
+        """Raises CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self._state == BREAKER_CLOSED:
+                return
+            if time.monotonic() - self._opened_at >= self.reset_seconds and not self._trial_in_flight:
+                self._state = BREAKER_HALF_OPEN
+                self._trial_in_flight = True
+                return
+            self._rejected += 1
+        raise CircuitOpenError(f"Circuit breaker '{self.name}' is open; not calling the dependency.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != BREAKER_CLOSED:
+                logger.info(f"🔌 Circuit breaker '{self.name}' closed.")
+            self._state = BREAKER_CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            if self._state == BREAKER_HALF_OPEN or (
+                self._state == BREAKER_CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._state = BREAKER_OPEN
+                self._opened_at = time.monotonic()
+                self._opened += 1
+                logger.warning(
+                    f"Circuit breaker '{self.name}' opened after {self._consecutive_failures} consecutive failure(s)."
+                )
+            elif self._state == BREAKER_OPEN:
+                self._opened_at = time.monotonic()
+
+    def metrics(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_seconds": self.reset_seconds,
+                "times_opened": self._opened,
+                "rejected": self._rejected,
+            }
+
+
+public_api_breaker = CircuitBreaker(
+    "public_api",
+    failure_threshold=PUBLIC_API_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=PUBLIC_API_BREAKER_RESET_SECONDS,
+)
+
+CIRCUIT_BREAKERS = (public_api_breaker,)
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    return {breaker.name: breaker.metrics() for breaker in CIRCUIT_BREAKERS}
+
+
+# Monotonic deadline for the dependency calls of the current run (None = unbounded).
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("http_deadline", default=None)
+
+
+@contextmanager
+def latency_budget(seconds: float = PUBLIC_API_RUN_BUDGET_SECONDS):
+    """
+    Bounds the time every `resilient_request` in this context may take in total, retries
+    and backoff included. Nested budgets never extend an outer one. The deadline is carried
+    by a contextvar, so it follows `asyncio.to_thread` and tasks started inside the block.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def upstream_degraded(breaker: CircuitBreaker) -> bool:
+    """True while `breaker` is not closed or the current latency budget is spent: serve cached values."""
+    remaining = remaining_budget()
+    return breaker.is_open or (remaining is not None and remaining <= 0)
+
+
+def resilient_request(
+    method: str,
+    url: str,
+    *,
+    breaker: CircuitBreaker,
+    endpoint: Optional[str] = None,
+    timeout: float = HTTP_TIMEOUT_SECONDS,
+    max_attempts: int = HTTP_RETRY_MAX_ATTEMPTS,
+    **kwargs,
+) -> httpx.Response:
+    """
+    `http_request` with jittered retries on transport errors and 429/5xx responses, guarded by
+    `breaker` and bounded by the current `latency_budget`. Each attempt's timeout is cut to the
+    remaining budget. Returns the last response (which may still be an error status); raises
+    CircuitOpenError / LatencyBudgetExceeded when no attempt could be made, or the last
+    transport error.
+    """
+    label = _endpoint_label(method, url, endpoint)
+    for attempt in range(1, max(1, max_attempts) + 1):
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            raise LatencyBudgetExceeded(f"Run latency budget exhausted before '{label}' (attempt {attempt}).")
+        breaker.before_request()
+
+        attempt_timeout = timeout if remaining is None else min(timeout, remaining)
+        try:
+            response = http_request(method, url, endpoint=endpoint, timeout=attempt_timeout, **kwargs)
+        except Exception as e:
+            breaker.record_failure()
+            if not isinstance(e, httpx.TransportError):
+                raise
+            error: Optional[Exception] = e
+            response = None
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            error = None
+
+        if attempt >= max_attempts:
+            break
+        delay = random.uniform(0, min(HTTP_RETRY_MAX_DELAY_SECONDS, HTTP_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1)))
+        remaining = remaining_budget()
+        if remaining is not None and delay >= remaining:
+            break
+        logger.info(
+            f"Retrying '{label}' in {delay:.2f}s after "
+            f"{error or f'HTTP {response.status_code}'} (attempt {attempt}/{max_attempts})."
+        )
+        time.sleep(delay)
+
+    if response is None:
+        raise error
+    return response
@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+from color_it_daily_agent.app_configs import configs
+from color_it_daily_agent.lib.database import get_db
+from color_it_daily_agent.lib.persistence import get_document, LOCAL_TEMP_DIR
+
+logger = logging.getLogger(__name__)
+
+RUN_LEASE_COLLECTION = os.environ.get("RUN_LEASE_COLLECTION", "coloritdaily_run_leases")
+RUN_LEASE_TTL_SECONDS = int(os.environ.get("RUN_LEASE_TTL_SECONDS", "7200"))
+LOCAL_LEASE_DIR = os.path.join(LOCAL_TEMP_DIR, "leases")
+
+# Statuses a repeat request attaches to instead of starting a new run.
+COMPLETED_STATUSES = ("PASS",)
+IN_FLIGHT_STATUSES = ("running", "unknown")
+
+_local_lease_lock = threading.Lock()
+
+
+def build_idempotency_key(
+    current_date: str,
+    collection_name: str,
+    target_keyword: Optional[str] = None,
+    variant: Optional[int] = None,
+) -> str:
+    """
+    Builds the run idempotency key from (current_date, collection_name, target_keyword).
+    `variant` distinguishes the extra pages of a batch that asks for several pages of one collection.
+    """
+    parts = [
+        str(current_date).strip(),
+        str(collection_name).strip().lower(),
+        str(target_keyword or "").strip().lower(),
+    ]
+    if variant:
+        parts.append(str(variant))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:40]
+
+
+def _lease_is_fresh(acquired_at: Any) -> bool:
+    if isinstance(acquired_at, str):
+        try:
+            acquired_at = datetime.fromisoformat(acquired_at)
+        except ValueError:
+            return False
+    if not isinstance(acquired_at, datetime):
+        return False
+    if acquired_at.tzinfo is None:
+        acquired_at = acquired_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - acquired_at).total_seconds() < RUN_LEASE_TTL_SECONDS
+
+
+def _existing_run(lease: Dict[str, Any], status: str) -> Optional[Dict[str, Any]]:
+    """
+    Decides whether a lease still owns the run. Completed runs always win; in-flight runs
+    (including a lease whose document is not written yet) win until the lease TTL expires.
+    Failed or rejected runs release the key.
+    """
+    existing_id = lease.get("document_id")
+    if not existing_id:
+        return None
+    if status in COMPLETED_STATUSES:
+        return {"document_id": existing_id, "status": status}
+    if status in IN_FLIGHT_STATUSES and _lease_is_fresh(lease.get("acquired_at")):
+        return {"document_id": existing_id, "status": status}
+    return None
+
+
+def _claim_firestore_lease(key: str, document_id: str, force: bool) -> Optional[Dict[str, Any]]:
+    from google.cloud import firestore
+
+    db = get_db()
+    lease_ref = db.collection(RUN_LEASE_COLLECTION).document(key)
+
+    @firestore.transactional
+    def _claim(transaction) -> Optional[Dict[str, Any]]:
+        snapshot = lease_ref.get(transaction=transaction)
+        if snapshot.exists and not force:
+            lease = snapshot.to_dict() or {}
+            status = "unknown"
+            if lease.get("document_id"):
+                page_ref = db.collection(configs.coloring_page_collection).document(lease["document_id"])
+                page_snapshot = page_ref.get(transaction=transaction)
+                if page_snapshot.exists:
+                    status = (page_snapshot.to_dict() or {}).get("status", "unknown")
+            existing = _existing_run(lease, status)
+            if existing:
+                return existing
+
+        transaction.set(lease_ref, {
+            "document_id": document_id,
+            "acquired_at": datetime.now(timezone.utc),
+            "forced": force,
+        })
+        return None
+
+    return _claim(db.transaction())
+
+
+def _claim_local_lease(key: str, document_id: str, force: bool) -> Optional[Dict[str, Any]]:
+    os.makedirs(LOCAL_LEASE_DIR, exist_ok=True)
+    lease_path = os.path.join(LOCAL_LEASE_DIR, f"{key}.json")
+
+    with _local_lease_lock:
+        if os.path.exists(lease_path) and not force:
+            try:
+                with open(lease_path, "r", encoding="utf-8") as f:
+                    lease = json.load(f)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable local run lease '{lease_path}': {e}")
+                lease = {}
+            doc = get_document(lease["document_id"], no_persist=True) if lease.get("document_id") else None
+            existing = _existing_run(lease, (doc or {}).get("status", "unknown"))
+            if existing:
+                return existing
+
+        with open(lease_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "document_id": document_id,
+                "acquired_at": datetime.now(timezone.utc).isoformat(),
+                "forced": force,
+            }, f, indent=2)
+    return None
+
+
+def claim_run_lease(
+    key: str,
+    document_id: str,
+    no_persist: bool = False,
+    force: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Claims the idempotency lease for `key` on behalf of `document_id`.
+    Uses a Firestore transaction on '<RUN_LEASE_COLLECTION>/<key>', or a local lease file
+    pointing at the run's document.json in no_persist mode.
+
+    Returns None when the caller owns the run and should pre-create its document, or a dict
+    with the `document_id` and `status` of the in-flight or completed run to attach to.
+    `force` always claims the lease (explicit rerun). Lease errors never block a run.
+    """
+    try:
+        if no_persist:
+            existing = _claim_local_lease(key, document_id, force)
+        else:
+            existing = _claim_firestore_lease(key, document_id, force)
+    except Exception as e:
+        logger.warning(f"Run lease check skipped for key '{key}': {e}")
+        return None
+
+    if existing:
+        logger.info(
+            f"♻️ Duplicate run request attached to existing document '{existing['document_id']}' "
+            f"(status: {existing['status']})"
+        )
+    return existing
@@ -0,0 +1,46 @@
+import os
+import functools
+from typing import Callable, Dict, Any
+
+# Distinct (collection, audience, keyword, micro-style) combinations kept per instruction builder.
+INSTRUCTION_CACHE_SIZE = int(os.environ.get("INSTRUCTION_CACHE_SIZE", "128"))
+
+_builders: Dict[str, Callable[..., str]] = {}
+
+
+def memoized_instruction_builder(name: str) -> Callable[[Callable[..., str]], Callable[..., str]]:
+    """
+    Decorator for pure system-instruction builders: ADK asks for an agent's instructions on every
+    LLM turn, but they only change with the run parameters passed in. The built string is kept in
+    an LRU cache keyed on those arguments (which must be hashable), and the cache is registered
+    under `name` for `get_instruction_cache_stats`.
+    """
+    def decorate(func: Callable[..., str]) -> Callable[..., str]:
+        cached = functools.lru_cache(maxsize=INSTRUCTION_CACHE_SIZE)(func)
+        _builders[name] = cached
+        return cached
+
+    return decorate
+
+
+def get_instruction_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hits, misses, hit rate and size of every registered instruction builder cache."""
+    stats = {}
+    for name, builder in sorted(_builders.items()):
+        info = builder.cache_info()
+        calls = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": round(info.hits / calls, 3) if calls else 0.0,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+        }
+    return stats
+
+
+def clear_instruction_caches() -> int:
+    """Empties every instruction cache (e.g. after editing a template at runtime). Returns how many."""
+    for builder in _builders.values():
+        builder.cache_clear()
+    return len(_builders)
@@ -1,14 +1,289 @@
 import os
 import json
+import copy
+import time
+import random
 import logging
-import urllib.request
+import threading
 import urllib.parse
-import urllib.error
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi import HTTPException
 
+from color_it_daily_agent.lib.catalog_snapshot import get_catalog_snapshot, snapshot_mode_enabled
+from color_it_daily_agent.lib.http_client import resilient_request, public_api_breaker, upstream_degraded, UpstreamUnavailableError
+
 logger = logging.getLogger(__name__)
 
+# The micro-style registry answers identifier lookups from memory for MICRO_STYLE_REGISTRY_TTL_SECONDS,
+# then keeps answering (while one background refresh runs) for up to MICRO_STYLE_REGISTRY_MAX_STALE_SECONDS.
+MICRO_STYLE_REGISTRY_TTL_SECONDS = float(os.environ.get("MICRO_STYLE_REGISTRY_TTL_SECONDS", "900"))
+MICRO_STYLE_REGISTRY_MAX_STALE_SECONDS = float(os.environ.get("MICRO_STYLE_REGISTRY_MAX_STALE_SECONDS", "86400"))
+# An identifier missing from a registry at least this old triggers one refetch of the list (it may be
+# new); misses against a younger registry are answered 404 without network I/O.
+MICRO_STYLE_MISS_REFETCH_SECONDS = float(os.environ.get("MICRO_STYLE_MISS_REFETCH_SECONDS", "60"))
+# Per-collection micro-style pools used for local random draws follow the same TTL / stale window.
+MICRO_STYLE_POOL_TTL_SECONDS = float(os.environ.get("MICRO_STYLE_POOL_TTL_SECONDS", "900"))
+MICRO_STYLE_POOL_MAX_STALE_SECONDS = float(os.environ.get("MICRO_STYLE_POOL_MAX_STALE_SECONDS", "86400"))
+# "uniform", or "weighted" to draw proportionally to each style's `weight` (default 1).
+MICRO_STYLE_SELECTION = os.environ.get("MICRO_STYLE_SELECTION", "uniform").lower()
+
+
+class MicroStyleRegistry:
+    """
+    Snapshot of GET /admin/micro-styles indexed by id, name, unique_name and raw slug.
+
+    Lookups are dict gets on lowercased keys; an identifier given with spaces also matches the
+    hyphenated unique_name / slug. The first style in list order wins a shared key.
+    """
+
+    def __init__(self, styles: List[Dict[str, Any]]):
+        self.styles = styles
+        self.fetched_at = time.monotonic()
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._slug_index: Dict[str, Dict[str, Any]] = {}
+        for style in styles:
+            raw = style.get("raw") or {}
+            s_id = str(style.get("id") or "").strip().lower()
+            s_name = str(style.get("name") or "").strip().lower()
+            s_unique = str(style.get("unique_name") or style.get("slug") or "").strip().lower()
+            s_slug = str(raw.get("slug") or "").strip().lower()
+            for key in (s_id, s_name, s_unique, s_slug):
+                if key:
+                    self._index.setdefault(key, style)
+            for key in (s_unique, s_slug):
+                if key:
+                    self._slug_index.setdefault(key, style)
+
+    def __len__(self) -> int:
+        return len(self.styles)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def lookup(self, identifier: Any) -> Optional[Dict[str, Any]]:
+        clean_lower = str(identifier).strip().lower()
+        return self._index.get(clean_lower) or self._slug_index.get(clean_lower.replace(" ", "-"))
+
+
+_registry: Optional[MicroStyleRegistry] = None
+_registry_lock = threading.Lock()
+_registry_refreshing = False
+
+
+def get_micro_style_registry() -> Optional[MicroStyleRegistry]:
+    """
+    Returns the micro-style registry without network I/O while it is within its TTL.
+    A stale registry is returned as-is while one background thread refreshes it; a missing
+    or expired one is fetched synchronously. Returns None if it cannot be fetched.
+    """
+    registry = _registry
+    if registry is not None:
+        if registry.age <= MICRO_STYLE_REGISTRY_TTL_SECONDS:
+            return registry
+        if registry.age <= MICRO_STYLE_REGISTRY_TTL_SECONDS + MICRO_STYLE_REGISTRY_MAX_STALE_SECONDS:
+            _refresh_registry_in_background()
+            return registry
+    try:
+        fetch_all_micro_styles()
+    except HTTPException as e:
+        logger.warning(f"Could not refresh the micro-style registry: {e.detail}")
+    return _registry
+
+
+def _refresh_registry_in_background() -> None:
+    global _registry_refreshing
+
+    with _registry_lock:
+        if _registry_refreshing:
+            return
+        _registry_refreshing = True
+
+    def _refresh():
+        global _registry_refreshing
+        try:
+            fetch_all_micro_styles()
+        except Exception as e:
+            logger.warning(f"Background micro-style registry refresh failed; serving the stale registry: {e}")
+        finally:
+            with _registry_lock:
+                _registry_refreshing = False
+
+    threading.Thread(target=_refresh, name="micro-style-registry-refresh", daemon=True).start()
+
+
+def invalidate_micro_style_registry() -> bool:
+    """Drops the micro-style registry so the next lookup refetches it. Returns whether one existed."""
+    global _registry
+    with _registry_lock:
+        existed, _registry = _registry is not None, None
+    logger.info("Invalidated the micro-style registry.")
+    return existed
+
+
+def get_micro_style_registry_stats() -> Dict[str, Any]:
+    registry = _registry
+    now = time.monotonic()
+    with _pools_lock:
+        pools = {key: {"micro_styles": len(styles), "age_seconds": round(now - fetched_at, 1)}
+                 for key, (fetched_at, styles) in _pools.items()}
+    return {
+        "pools": pools,
+        "micro_styles": len(registry) if registry else None,
+        "age_seconds": round(registry.age, 1) if registry else None,
+        "ttl_seconds": MICRO_STYLE_REGISTRY_TTL_SECONDS,
+        "max_stale_seconds": MICRO_STYLE_REGISTRY_MAX_STALE_SECONDS,
+        "refreshing": _registry_refreshing,
+    }
+
+
+# Active micro-styles per collection slug: (fetched_at, styles).
+_pools: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+_pools_lock = threading.Lock()
+_pools_refreshing: set = set()
+
+
+def _pool_key(collection_slug: str) -> str:
+    return collection_slug.strip().lower().replace(" ", "-")
+
+
+def _load_pool(key: str) -> List[Dict[str, Any]]:
+    styles = [
+        style for style in fetch_collection_micro_styles(key)
+        if style.get("is_active", True) and style.get("description")
+    ]
+    # A stable order makes seeded draws reproducible whatever order the API lists styles in.
+    styles.sort(key=lambda style: (str(style.get("id") or ""), style.get("unique_name") or ""))
+    with _pools_lock:
+        _pools[key] = (time.monotonic(), styles)
+    return styles
+
+
+def get_micro_style_pool(collection_name: str, collection_slug: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Returns the active micro-styles of a collection (GET /admin/collections/:slug/micro-styles),
+    cached in process. Fresh pools cost no network I/O; stale ones are returned while one
+    background thread refetches them. While the Public API circuit breaker is open (or the run's
+    latency budget is spent), an expired pool is still served as the last known good one. Raises HTTPException when no usable pool
+    can be fetched.
+    """
+    key = _pool_key(collection_slug or collection_name)
+    with _pools_lock:
+        entry = _pools.get(key)
+    if entry is not None:
+        fetched_at, styles = entry
+        age = time.monotonic() - fetched_at
+        if age <= MICRO_STYLE_POOL_TTL_SECONDS:
+            return styles
+        if age <= MICRO_STYLE_POOL_TTL_SECONDS + MICRO_STYLE_POOL_MAX_STALE_SECONDS:
+            _refresh_pool_in_background(key)
+            return styles
+    try:
+        return _load_pool(key)
+    except HTTPException:
+        if entry is None or not upstream_degraded(public_api_breaker):
+            raise
+        logger.warning(f"Public API unavailable; serving the last known micro-style pool for '{key}'.")
+        return entry[1]
+
+
+def _refresh_pool_in_background(key: str) -> None:
+    with _pools_lock:
+        if key in _pools_refreshing:
+            return
+        _pools_refreshing.add(key)
+
+    def _refresh():
+        try:
+            _load_pool(key)
+        except Exception as e:
+            logger.warning(f"Background refresh of micro-style pool '{key}' failed; serving the stale pool: {e}")
+        finally:
+            with _pools_lock:
+                _pools_refreshing.discard(key)
+
+    threading.Thread(target=_refresh, name=f"micro-style-pool-refresh-{key}", daemon=True).start()
+
+
+def invalidate_micro_style_pools() -> int:
+    """Drops every cached collection pool. Returns how many were cached."""
+    with _pools_lock:
+        removed = len(_pools)
+        _pools.clear()
+    return removed
+
+
+def _selection_rng(seed: Any = None) -> random.Random:
+    return random.Random(str(seed)) if seed is not None else random.Random()
+
+
+def _style_weight(style: Dict[str, Any]) -> float:
+    raw = style.get("raw") or {}
+    try:
+        weight = float(raw.get("weight", style.get("weight", 1)))
+    except (TypeError, ValueError):
+        return 1.0
+    return weight if weight > 0 else 0.0
+
+
+def _without_excluded(pool: List[Dict[str, Any]], exclude: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """Drops styles whose id, name or unique_name is in `exclude`; keeps the full pool if nothing would remain."""
+    if not exclude:
+        return pool
+    excluded = {str(value).strip().lower() for value in exclude if value is not None}
+    candidates = [
+        style for style in pool
+        if not excluded & {
+            str(style.get("id") or "").strip().lower(),
+            str(style.get("name") or "").strip().lower(),
+            str(style.get("unique_name") or "").strip().lower(),
+        }
+    ]
+    if not candidates:
+        logger.warning("Every micro-style in the pool is excluded; drawing from the full pool.")
+        return pool
+    return candidates
+
+
+def _selected_payload(style: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": style.get("id"),
+        "name": style.get("name"),
+        "unique_name": style.get("unique_name"),
+        "description": style.get("description"),
+        "raw": copy.deepcopy(style.get("raw")),
+    }
+
+
+def pick_micro_style(
+    pool: List[Dict[str, Any]],
+    exclude: Optional[List[Any]] = None,
+    seed: Any = None,
+    selection: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Draws one micro-style from `pool` locally.
+    - `exclude`: ids, names or unique_names to skip (ignored if it would empty the pool).
+    - `seed`: makes the draw deterministic for a given pool.
+    - `selection`: "uniform" or "weighted" (by each style's `weight`); defaults to MICRO_STYLE_SELECTION.
+    Returns None for an empty pool.
+    """
+    candidates = _without_excluded(pool, exclude)
+    if not candidates:
+        return None
+
+    rng = _selection_rng(seed)
+    if (selection or MICRO_STYLE_SELECTION) == "weighted":
+        weights = [_style_weight(style) for style in candidates]
+        if sum(weights) > 0:
+            return _selected_payload(rng.choices(candidates, weights=weights, k=1)[0])
+    return _selected_payload(rng.choice(candidates))
+
+
+def prefetch_micro_styles() -> int:
+    """Fetches the full micro-style list into the registry. Returns its size."""
+    return len(fetch_all_micro_styles())
+
 
 def _get_api_headers(has_body: bool = False) -> Dict[str, str]:
     headers = {
@@ -31,7 +306,13 @@ def fetch_random_micro_style(
     Endpoint: GET or POST /admin/collections/:collectionName/random-micro-style
 
     Raises HTTPException on API failure or unexpected response (no silent fallback).
+    In snapshot mode there is no endpoint to ask: raises 404 (the snapshot pool is empty).
     """
+    if snapshot_mode_enabled():
+        err_detail = f"No active micro-styles for collection '{collection_name}' in the catalog snapshot."
+        logger.error(err_detail)
+        raise HTTPException(status_code=404, detail=err_detail)
+
     api_base_url = os.environ.get("API_BASE_URL")
     if not api_base_url:
         err_msg = "API_BASE_URL environment variable is not configured. Cannot fetch random micro-style."
@@ -49,53 +330,51 @@ def fetch_random_micro_style(
         method = "POST"
         req_data = json.dumps({"exclude": exclude}).encode("utf-8")
 
-    req = urllib.request.Request(
-        endpoint_url, data=req_data, headers=headers, method=method
-    )
-
     try:
         logger.info(f"Fetching random micro-style for collection '{collection_name}' via API: {endpoint_url}")
-        with urllib.request.urlopen(req, timeout=10) as response:
-            if response.status == 200:
-                body = response.read().decode("utf-8")
-                payload = json.loads(body)
-                micro_style = None
-                if isinstance(payload, dict):
-                    if payload.get("micro_style") and isinstance(payload["micro_style"], dict):
-                        micro_style = payload["micro_style"]
-                    elif payload.get("success") and isinstance(payload.get("micro_style"), dict):
-                        micro_style = payload["micro_style"]
-                    elif payload.get("name") and payload.get("description"):
-                        micro_style = payload
-
-                if isinstance(micro_style, dict) and micro_style.get("name") and micro_style.get("description"):
-                    logger.info(
-                        f"Successfully fetched random micro-style '{micro_style.get('name')}' for collection '{collection_name}'"
-                    )
-                    return {
-                        "id": micro_style.get("id"),
-                        "name": str(micro_style.get("name")).strip(),
-                        "unique_name": str(micro_style.get("unique_name") or micro_style.get("slug") or micro_style.get("name")).strip(),
-                        "description": str(micro_style.get("description")).strip(),
-                        "raw": micro_style,
-                    }
-                err_detail = f"API random-micro-style endpoint returned invalid response payload: {body}"
-                logger.error(err_detail)
-                raise HTTPException(status_code=500, detail=err_detail)
-            else:
-                err_detail = f"API random-micro-style endpoint returned status code {response.status}"
-                logger.error(err_detail)
-                raise HTTPException(status_code=response.status, detail=err_detail)
-    except urllib.error.HTTPError as e:
-        err_msg = f"HTTP Error {e.code} fetching random micro-style for '{collection_name}' from {endpoint_url}: {e.reason}"
+        response = resilient_request(
+            method, endpoint_url, content=req_data, headers=headers, breaker=public_api_breaker,
+            endpoint=f"{method} /admin/collections/:name/random-micro-style",
+        )
+        if response.status_code == 200:
+            body = response.text
+            payload = json.loads(body)
+            micro_style = None
+            if isinstance(payload, dict):
+                if payload.get("micro_style") and isinstance(payload["micro_style"], dict):
+                    micro_style = payload["micro_style"]
+                elif payload.get("success") and isinstance(payload.get("micro_style"), dict):
+                    micro_style = payload["micro_style"]
+                elif payload.get("name") and payload.get("description"):
+                    micro_style = payload
+
+            if isinstance(micro_style, dict) and micro_style.get("name") and micro_style.get("description"):
+                logger.info(
+                    f"Successfully fetched random micro-style '{micro_style.get('name')}' for collection '{collection_name}'"
+                )
+                return {
+                    "id": micro_style.get("id"),
+                    "name": str(micro_style.get("name")).strip(),
+                    "unique_name": str(micro_style.get("unique_name") or micro_style.get("slug") or micro_style.get("name")).strip(),
+                    "description": str(micro_style.get("description")).strip(),
+                    "raw": micro_style,
+                }
+            err_detail = f"API random-micro-style endpoint returned invalid response payload: {body}"
+            logger.error(err_detail)
+            raise HTTPException(status_code=500, detail=err_detail)
+
+        err_msg = (
+            f"HTTP Error {response.status_code} fetching random micro-style for '{collection_name}' "
+            f"from {endpoint_url}: {response.reason_phrase}"
+        )
         logger.error(err_msg)
-        raise HTTPException(status_code=e.code, detail=err_msg)
+        raise HTTPException(status_code=response.status_code, detail=err_msg)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         err_msg = f"Failed to fetch random micro-style from API endpoint '{endpoint_url}': {e}"
         logger.error(err_msg)
-        raise HTTPException(status_code=500, detail=err_msg)
+        raise HTTPException(status_code=503 if isinstance(e, UpstreamUnavailableError) else 500, detail=err_msg)
 
 
 def fetch_micro_style_by_identifier(identifier: str) -> Dict[str, Any]:
@@ -103,64 +382,73 @@ def fetch_micro_style_by_identifier(identifier: str) -> Dict[str, Any]:
     Fetches a single micro-style record by its unique_name (slug), name, or numeric ID.
     Endpoint: GET /admin/micro-styles/:id (for numeric ID) or GET /admin/micro-styles (for slug/name lookup)
 
-    Raises HTTPException if not found or on API error.
+    Raises HTTPException if not found or on API error. In snapshot mode only the snapshot is searched.
     """
     api_base_url = os.environ.get("API_BASE_URL")
-    if not api_base_url:
+    if not api_base_url and not snapshot_mode_enabled():
         err_msg = "API_BASE_URL environment variable is not configured. Cannot lookup micro-style."
         logger.error(err_msg)
         raise HTTPException(status_code=500, detail=err_msg)
 
     clean_identifier = str(identifier).strip()
-    clean_lower = clean_identifier.lower()
-    clean_slug = clean_lower.replace(" ", "-")
+
+    cached_registry = _registry
+    registry = get_micro_style_registry()
+    if registry is not None:
+        style = registry.lookup(clean_identifier)
+        if style is not None:
+            logger.info(f"Resolved micro-style '{style.get('name')}' by identifier '{identifier}' from registry")
+            # Copied so concurrent runs never share (and mutate) one registry entry.
+            return copy.deepcopy(style)
 
     # If identifier is numeric (e.g. "1"), query direct GET /admin/micro-styles/:id endpoint
-    if clean_identifier.isdigit():
+    if clean_identifier.isdigit() and not snapshot_mode_enabled():
         encoded_identifier = urllib.parse.quote(clean_identifier)
         endpoint_url = f"{api_base_url.rstrip('/')}/admin/micro-styles/{encoded_identifier}"
         headers = _get_api_headers()
-        req = urllib.request.Request(endpoint_url, headers=headers, method="GET")
 
         try:
             logger.info(f"Fetching micro-style by ID '{identifier}' via API: {endpoint_url}")
-            with urllib.request.urlopen(req, timeout=10) as response:
-                if response.status == 200:
-                    body = response.read().decode("utf-8")
-                    payload = json.loads(body)
-                    micro_style = None
-                    if isinstance(payload, dict):
-                        if payload.get("micro_style") and isinstance(payload["micro_style"], dict):
-                            micro_style = payload["micro_style"]
-                        elif payload.get("name") and payload.get("description"):
-                            micro_style = payload
-                    elif isinstance(payload, list) and len(payload) > 0:
-                        micro_style = payload[0]
-
-                    if isinstance(micro_style, dict) and micro_style.get("name") and micro_style.get("description"):
-                        logger.info(f"Successfully fetched micro-style '{micro_style.get('name')}' by ID '{identifier}'")
-                        return {
-                            "id": micro_style.get("id"),
-                            "name": str(micro_style.get("name")).strip(),
-                            "unique_name": str(micro_style.get("unique_name") or micro_style.get("slug") or micro_style.get("name")).strip(),
-                            "description": str(micro_style.get("description")).strip(),
-                            "raw": micro_style,
-                        }
+            response = resilient_request(
+                "GET", endpoint_url, headers=headers, breaker=public_api_breaker, endpoint="GET /admin/micro-styles/:id"
+            )
+            if response.status_code == 200:
+                payload = response.json()
+                micro_style = None
+                if isinstance(payload, dict):
+                    if payload.get("micro_style") and isinstance(payload["micro_style"], dict):
+                        micro_style = payload["micro_style"]
+                    elif payload.get("name") and payload.get("description"):
+                        micro_style = payload
+                elif isinstance(payload, list) and len(payload) > 0:
+                    micro_style = payload[0]
+
+                if isinstance(micro_style, dict) and micro_style.get("name") and micro_style.get("description"):
+                    logger.info(f"Successfully fetched micro-style '{micro_style.get('name')}' by ID '{identifier}'")
+                    return {
+                        "id": micro_style.get("id"),
+                        "name": str(micro_style.get("name")).strip(),
+                        "unique_name": str(micro_style.get("unique_name") or micro_style.get("slug") or micro_style.get("name")).strip(),
+                        "description": str(micro_style.get("description")).strip(),
+                        "raw": micro_style,
+                    }
         except Exception as e:
             logger.debug(f"Direct ID lookup at '{endpoint_url}' failed: {e}. Falling back to list search.")
 
-    # For string slugs/names (or if ID lookup failed), search list from GET /admin/micro-styles
-    all_styles = fetch_all_micro_styles()
-    for style in all_styles:
-        s_id = str(style.get("id") or "").strip().lower()
-        s_name = str(style.get("name") or "").strip().lower()
-        s_unique = str(style.get("unique_name") or style.get("slug") or "").strip().lower()
-        raw = style.get("raw") or {}
-        s_slug = str(raw.get("slug") or "").strip().lower()
-
-        if clean_lower in (s_id, s_name, s_unique, s_slug) or clean_slug in (s_unique, s_slug):
-            logger.info(f"Successfully resolved micro-style '{style.get('name')}' by identifier '{identifier}' from list")
-            return style
+    if registry is None:
+        # The registry fetch just failed; retrying it here would only double the wait.
+        err_detail = f"Micro-style registry unavailable; cannot resolve identifier '{identifier}'."
+        logger.error(err_detail)
+        raise HTTPException(status_code=503, detail=err_detail)
+
+    # Unknown to a cached registry (e.g. created since it was fetched): refetch GET /admin/micro-styles,
+    # at most once per MICRO_STYLE_MISS_REFETCH_SECONDS so unknown identifiers do not download it every run.
+    if registry is cached_registry and registry.age >= MICRO_STYLE_MISS_REFETCH_SECONDS:
+        fetch_all_micro_styles()
+    style = _registry.lookup(clean_identifier) if _registry else None
+    if style is not None:
+        logger.info(f"Successfully resolved micro-style '{style.get('name')}' by identifier '{identifier}' from list")
+        return copy.deepcopy(style)
 
     err_detail = f"Micro-style with identifier '{identifier}' not found via API."
     logger.error(err_detail)
@@ -172,8 +460,16 @@ def fetch_all_micro_styles() -> List[Dict[str, Any]]:
     Fetches all micro-styles from the consolidated admin endpoint.
     Endpoint: GET /admin/micro-styles
 
-    Returns a top-level list of micro-style dictionaries.
+    Returns a top-level list of micro-style dictionaries and rebuilds the micro-style registry.
+    In snapshot mode the list comes from the catalog snapshot.
     """
+    global _registry
+
+    if snapshot_mode_enabled():
+        result = copy.deepcopy(get_catalog_snapshot().micro_styles)
+        _registry = MicroStyleRegistry(result)
+        return result
+
     api_base_url = os.environ.get("API_BASE_URL")
     if not api_base_url:
         err_msg = "API_BASE_URL environment variable is not configured. Cannot list micro-styles."
@@ -182,50 +478,47 @@ def fetch_all_micro_styles() -> List[Dict[str, Any]]:
 
     endpoint_url = f"{api_base_url.rstrip('/')}/admin/micro-styles"
     headers = _get_api_headers()
-    req = urllib.request.Request(endpoint_url, headers=headers, method="GET")
 
     try:
         logger.info(f"Fetching all micro-styles via API: {endpoint_url}")
-        with urllib.request.urlopen(req, timeout=10) as response:
-            if response.status == 200:
-                body = response.read().decode("utf-8")
-                payload = json.loads(body)
-                items = []
-                if isinstance(payload, list):
-                    items = payload
-                elif isinstance(payload, dict):
-                    if isinstance(payload.get("micro_styles"), list):
-                        items = payload["micro_styles"]
-                    elif isinstance(payload.get("data"), list):
-                        items = payload["data"]
-
-                result = []
-                for item in items:
-                    if isinstance(item, dict) and item.get("name"):
-                        result.append({
-                            "id": item.get("id"),
-                            "name": str(item.get("name")).strip(),
-                            "unique_name": str(item.get("unique_name") or item.get("slug") or item.get("name")).strip(),
-                            "description": str(item.get("description") or "").strip(),
-                            "is_active": item.get("is_active", True),
-                            "raw": item,
-                        })
-                logger.info(f"Successfully fetched {len(result)} micro-styles from {endpoint_url}")
-                return result
-            else:
-                err_detail = f"API list micro-styles endpoint returned status code {response.status}"
-                logger.error(err_detail)
-                raise HTTPException(status_code=response.status, detail=err_detail)
-    except urllib.error.HTTPError as e:
-        err_msg = f"HTTP Error {e.code} listing micro-styles from {endpoint_url}: {e.reason}"
+        response = resilient_request(
+            "GET", endpoint_url, headers=headers, breaker=public_api_breaker, endpoint="GET /admin/micro-styles"
+        )
+        if response.status_code == 200:
+            payload = response.json()
+            items = []
+            if isinstance(payload, list):
+                items = payload
+            elif isinstance(payload, dict):
+                if isinstance(payload.get("micro_styles"), list):
+                    items = payload["micro_styles"]
+                elif isinstance(payload.get("data"), list):
+                    items = payload["data"]
+
+            result = []
+            for item in items:
+                if isinstance(item, dict) and item.get("name"):
+                    result.append({
+                        "id": item.get("id"),
+                        "name": str(item.get("name")).strip(),
+                        "unique_name": str(item.get("unique_name") or item.get("slug") or item.get("name")).strip(),
+                        "description": str(item.get("description") or "").strip(),
+                        "is_active": item.get("is_active", True),
+                        "raw": item,
+                    })
+            logger.info(f"Successfully fetched {len(result)} micro-styles from {endpoint_url}")
+            _registry = MicroStyleRegistry(result)
+            return result
+
+        err_msg = f"HTTP Error {response.status_code} listing micro-styles from {endpoint_url}: {response.reason_phrase}"
         logger.error(err_msg)
-        raise HTTPException(status_code=e.code, detail=err_msg)
+        raise HTTPException(status_code=response.status_code, detail=err_msg)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         err_msg = f"Failed to list micro-styles from API endpoint '{endpoint_url}': {e}"
         logger.error(err_msg)
-        raise HTTPException(status_code=500, detail=err_msg)
+        raise HTTPException(status_code=503 if isinstance(e, UpstreamUnavailableError) else 500, detail=err_msg)
 
 
 def fetch_collection_micro_styles(collection_slug: str) -> List[Dict[str, Any]]:
@@ -233,8 +526,11 @@ def fetch_collection_micro_styles(collection_slug: str) -> List[Dict[str, Any]]:
     Fetches micro-styles associated with a given collection slug.
     Endpoint: GET /admin/collections/:slug/micro-styles
 
-    Returns a top-level list of micro-style dictionaries.
+    Returns a top-level list of micro-style dictionaries (from the catalog snapshot in snapshot mode).
     """
+    if snapshot_mode_enabled():
+        return copy.deepcopy(get_catalog_snapshot().micro_styles_for(collection_slug))
+
     api_base_url = os.environ.get("API_BASE_URL")
     if not api_base_url:
         err_msg = "API_BASE_URL environment variable is not configured. Cannot fetch collection micro-styles."
@@ -246,60 +542,112 @@ def fetch_collection_micro_styles(collection_slug: str) -> List[Dict[str, Any]]:
     endpoint_url = f"{api_base_url.rstrip('/')}/admin/collections/{encoded_slug}/micro-styles"
 
     headers = _get_api_headers()
-    req = urllib.request.Request(endpoint_url, headers=headers, method="GET")
 
     try:
         logger.info(f"Fetching micro-styles for collection '{collection_slug}' via API: {endpoint_url}")
-        with urllib.request.urlopen(req, timeout=10) as response:
-            if response.status == 200:
-                body = response.read().decode("utf-8")
-                payload = json.loads(body)
-                items = []
-                if isinstance(payload, list):
-                    items = payload
-                elif isinstance(payload, dict):
-                    if isinstance(payload.get("micro_styles"), list):
-                        items = payload["micro_styles"]
-                    elif isinstance(payload.get("data"), list):
-                        items = payload["data"]
-
-                result = []
-                for item in items:
-                    if isinstance(item, dict) and item.get("name"):
-                        result.append({
-                            "id": item.get("id"),
-                            "name": str(item.get("name")).strip(),
-                            "unique_name": str(item.get("unique_name") or item.get("slug") or item.get("name")).strip(),
-                            "description": str(item.get("description") or "").strip(),
-                            "is_active": item.get("is_active", True),
-                            "raw": item,
-                        })
-                logger.info(f"Successfully fetched {len(result)} micro-styles for collection '{collection_slug}'")
-                return result
-            else:
-                err_detail = f"API collection micro-styles endpoint returned status code {response.status}"
-                logger.error(err_detail)
-                raise HTTPException(status_code=response.status, detail=err_detail)
-    except urllib.error.HTTPError as e:
-        err_msg = f"HTTP Error {e.code} fetching micro-styles for collection '{collection_slug}' from {endpoint_url}: {e.reason}"
+        response = resilient_request(
+            "GET", endpoint_url, headers=headers, breaker=public_api_breaker,
+            endpoint="GET /admin/collections/:slug/micro-styles",
+        )
+        if response.status_code == 200:
+            payload = response.json()
+            items = []
+            if isinstance(payload, list):
+                items = payload
+            elif isinstance(payload, dict):
+                if isinstance(payload.get("micro_styles"), list):
+                    items = payload["micro_styles"]
+                elif isinstance(payload.get("data"), list):
+                    items = payload["data"]
+
+            result = []
+            for item in items:
+                if isinstance(item, dict) and item.get("name"):
+                    result.append({
+                        "id": item.get("id"),
+                        "name": str(item.get("name")).strip(),
+                        "unique_name": str(item.get("unique_name") or item.get("slug") or item.get("name")).strip(),
+                        "description": str(item.get("description") or "").strip(),
+                        "is_active": item.get("is_active", True),
+                        "raw": item,
+                    })
+            logger.info(f"Successfully fetched {len(result)} micro-styles for collection '{collection_slug}'")
+            return result
+
+        err_msg = (
+            f"HTTP Error {response.status_code} fetching micro-styles for collection '{collection_slug}' "
+            f"from {endpoint_url}: {response.reason_phrase}"
+        )
         logger.error(err_msg)
-        raise HTTPException(status_code=e.code, detail=err_msg)
+        raise HTTPException(status_code=response.status_code, detail=err_msg)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
         err_msg = f"Failed to fetch micro-styles for collection '{collection_slug}' from API endpoint '{endpoint_url}': {e}"
         logger.error(err_msg)
-        raise HTTPException(status_code=500, detail=err_msg)
+        raise HTTPException(status_code=503 if isinstance(e, UpstreamUnavailableError) else 500, detail=err_msg)
+
+
+def select_random_micro_styles(
+    collection_name: str,
+    count: int,
+    collection_slug: Optional[str] = None,
+    exclude: Optional[List[Any]] = None,
+    seed: Any = None,
+    selection: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Picks `count` random active micro-styles for a collection from its cached pool
+    (see `get_micro_style_pool`), drawing distinct styles until the pool is exhausted before
+    repeating any. Used by batch runs so N pages share one lookup. `exclude`, `seed` and
+    `selection` behave as in `pick_micro_style`; a weighted draw picks each next distinct
+    style by weight.
+
+    Falls back to the random-micro-style endpoint per page if the pool is empty.
+    Raises HTTPException on API failure.
+    """
+    pool = get_micro_style_pool(collection_name, collection_slug)
+    if not pool:
+        logger.warning(
+            f"No active micro-styles in pool for collection '{collection_name}'; falling back to random endpoint."
+        )
+        return [fetch_random_micro_style(collection_name, exclude=exclude) for _ in range(count)]
+
+    candidates = _without_excluded(pool, exclude)
+    weighted = (selection or MICRO_STYLE_SELECTION) == "weighted"
+    rng = _selection_rng(seed)
+    selected: List[Dict[str, Any]] = []
+    while len(selected) < count:
+        if not weighted:
+            selected.extend(rng.sample(candidates, min(len(candidates), count - len(selected))))
+            continue
+        remaining = list(candidates)
+        while remaining and len(selected) < count:
+            weights = [_style_weight(style) for style in remaining]
+            if sum(weights) > 0:
+                index = rng.choices(range(len(remaining)), weights=weights, k=1)[0]
+            else:
+                index = rng.randrange(len(remaining))
+            selected.append(remaining.pop(index))
+
+    return [_selected_payload(style) for style in selected]
 
 
 def resolve_micro_style(
-    style_input: Any, collection_name: Optional[str] = None
+    style_input: Any,
+    collection_name: Optional[str] = None,
+    collection_slug: Optional[str] = None,
+    exclude: Optional[List[Any]] = None,
+    seed: Any = None,
+    selection: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Resolves a micro_style payload:
     - If dict with name and description: returns normalized dict.
-    - If string / int (identifier): queries GET /admin/micro-styles/:id.
-    - If None / empty / "DEFAULT": queries GET or POST /admin/collections/:collectionName/random-micro-style.
+    - If string / int (identifier): looks it up in the micro-style registry (GET /admin/micro-styles).
+    - If None / empty / "DEFAULT": draws locally from the collection's cached micro-style pool
+      (`exclude`, `seed` and `selection` as in `pick_micro_style`). Only an empty pool falls back
+      to GET or POST /admin/collections/:collectionName/random-micro-style.
 
     If resolution fails or API error occurs, raises HTTPException.
     """
@@ -326,5 +674,13 @@ def resolve_micro_style(
         from color_it_daily_agent.lib.collections import DEFAULT_COLLECTION_NAME
         collection_name = DEFAULT_COLLECTION_NAME
 
-    return fetch_random_micro_style(collection_name)
+    style = pick_micro_style(
+        get_micro_style_pool(collection_name, collection_slug), exclude=exclude, seed=seed, selection=selection
+    )
+    if style is not None:
+        logger.info(f"Drew micro-style '{style.get('name')}' locally for collection '{collection_name}'")
+        return style
+
+    logger.warning(f"No active micro-styles in pool for collection '{collection_name}'; falling back to random endpoint.")
+    return fetch_random_micro_style(collection_name, exclude=exclude)
 
@@ -1,7 +1,8 @@
 import os
 import json
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 from color_it_daily_agent.app_configs import configs
 from color_it_daily_agent.lib.database import get_db
@@ -11,6 +12,25 @@ logger = logging.getLogger(__name__)
 DEFAULT_LOCAL_DIR = os.path.join(os.getcwd(), "tmp", "color_it_daily")
 LOCAL_TEMP_DIR = os.environ.get("IMAGE_OUTPUT_DIR", DEFAULT_LOCAL_DIR)
 
+# Striped locks serializing writes to a run's local files (document.json read-modify-write,
+# prompt_trace.jsonl appends) across tool threads, plugins and status readers. Re-entrant so a
+# trace append can update document.json while holding its run's lock.
+_LOCAL_FILE_LOCKS = [threading.RLock() for _ in range(64)]
+
+
+def local_document_lock(document_id: str) -> threading.RLock:
+    """Returns the lock guarding the local JSON files of `document_id`."""
+    return _LOCAL_FILE_LOCKS[hash(document_id) % len(_LOCAL_FILE_LOCKS)]
+
+
+def write_local_json(path: str, data: Any) -> None:
+    """Writes JSON via a temp file + rename so readers never see a partially written file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
 def get_local_output_dir(document_id: str) -> str:
     """Returns the local output directory for a specific document run."""
     from color_it_daily_agent.context import get_agent_context
@@ -50,8 +70,8 @@ def pre_create_document(
 
     local_dir = get_local_output_dir(document_id)
     local_doc_path = os.path.join(local_dir, "document.json")
-    with open(local_doc_path, "w", encoding="utf-8") as f:
-        json.dump(doc_data, f, indent=2)
+    with local_document_lock(document_id):
+        write_local_json(local_doc_path, doc_data)
 
     if not no_persist:
         try:
@@ -91,16 +111,16 @@ def update_document(
 
     # Always keep local document.json updated
     try:
-        current_local = {}
-        if os.path.exists(local_doc_path):
-            with open(local_doc_path, "r", encoding="utf-8") as f:
-                current_local = json.load(f)
-        current_local.update({
-            k: (v.isoformat() if isinstance(v, datetime) else v)
-            for k, v in updates.items()
-        })
-        with open(local_doc_path, "w", encoding="utf-8") as f:
-            json.dump(current_local, f, indent=2)
+        with local_document_lock(document_id):
+            current_local = {}
+            if os.path.exists(local_doc_path):
+                with open(local_doc_path, "r", encoding="utf-8") as f:
+                    current_local = json.load(f)
+            current_local.update({
+                k: (v.isoformat() if isinstance(v, datetime) else v)
+                for k, v in updates.items()
+            })
+            write_local_json(local_doc_path, current_local)
     except Exception as e:
         logger.error(f"Failed to update local document.json for '{document_id}': {e}")
 
@@ -133,12 +153,13 @@ def mark_document_failed(
     logger.info(f"Marked document '{document_id}' as failed (no_persist={no_persist}).")
 
 
-def get_document_status(
+def get_document(
     document_id: str,
     no_persist: bool = False
-) -> str:
+) -> Optional[Dict[str, Any]]:
     """
-    Fetches the status field of a document from Firestore or local document.json.
+    Fetches the full document from Firestore or local document.json.
+    Returns None if the document does not exist or cannot be read.
     """
     if no_persist:
         local_dir = get_local_output_dir(document_id)
@@ -146,19 +167,29 @@ def get_document_status(
         if os.path.exists(local_doc_path):
             try:
                 with open(local_doc_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data.get("status", "unknown")
+                    return json.load(f)
             except Exception as e:
                 logger.error(f"Failed to read local document.json for '{document_id}': {e}")
-        return "unknown"
+        return None
     else:
         try:
             db = get_db()
             doc_ref = db.collection(configs.coloring_page_collection).document(document_id).get()
             if doc_ref.exists:
-                return doc_ref.to_dict().get("status", "unknown")
+                return doc_ref.to_dict() or {}
         except Exception as e:
-            logger.error(f"Failed to fetch document status for '{document_id}': {e}")
-        return "unknown"
+            logger.error(f"Failed to fetch document '{document_id}': {e}")
+        return None
 
 
+def get_document_status(
+    document_id: str,
+    no_persist: bool = False
+) -> str:
+    """
+    Fetches the status field of a document from Firestore or local document.json.
+    """
+    data = get_document(document_id, no_persist)
+    if data is None:
+        return "unknown"
+    return data.get("status", "unknown")
@@ -2,11 +2,13 @@ import os
 import re
 import json
 import logging
-import requests
+import threading
 from typing import Dict, Any, Optional
 from google import genai
 from google.genai import types
 
+from color_it_daily_agent.lib.http_client import http_request
+
 logger = logging.getLogger(__name__)
 
 
@@ -48,17 +50,20 @@ def select_pinterest_board(visual_tags: list, title: str) -> str:
 
 
 _genai_client = None
+_genai_client_lock = threading.Lock()
 
 def get_genai_client() -> genai.Client:
     global _genai_client
     if _genai_client is None:
-        use_vertex = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "true").lower() in ("true", "1", "yes")
-        project = os.environ.get("GOOGLE_CLOUD_PROJECT", "ostamand-264a1")
-        location = os.environ.get("GOOGLE_CLOUD_LOCATION", "global")
-        if use_vertex:
-            _genai_client = genai.Client(vertexai=True, project=project, location=location)
-        else:
-            _genai_client = genai.Client()
+        with _genai_client_lock:
+            if _genai_client is None:
+                use_vertex = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "true").lower() in ("true", "1", "yes")
+                project = os.environ.get("GOOGLE_CLOUD_PROJECT", "ostamand-264a1")
+                location = os.environ.get("GOOGLE_CLOUD_LOCATION", "global")
+                if use_vertex:
+                    _genai_client = genai.Client(vertexai=True, project=project, location=location)
+                else:
+                    _genai_client = genai.Client()
     return _genai_client
 
 
@@ -210,7 +215,10 @@ def post_pin_to_pinterest(
             }
         }
         try:
-            res = requests.post(buffer_url, headers=headers, json={"query": query, "variables": variables}, timeout=15)
+            res = http_request(
+                "POST", buffer_url, headers=headers, json={"query": query, "variables": variables},
+                timeout=15, endpoint="POST buffer /graphql",
+            )
             res.raise_for_status()
             res_json = res.json()
             
@@ -244,7 +252,7 @@ def post_pin_to_pinterest(
             "board_id": board
         }
         try:
-            res = requests.post(webhook_url, json=payload, timeout=15)
+            res = http_request("POST", webhook_url, json=payload, timeout=15, endpoint="POST pinterest webhook")
             res.raise_for_status()
             logger.info("Successfully posted Pin payload to Webhook.")
             return {
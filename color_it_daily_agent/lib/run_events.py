@@ -0,0 +1,148 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Tuple, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+RUN_EVENT_HISTORY_SIZE = int(os.environ.get("RUN_EVENT_HISTORY_SIZE", "200"))
+RUN_EVENT_MAX_RUNS = int(os.environ.get("RUN_EVENT_MAX_RUNS", "200"))
+RUN_EVENT_KEEPALIVE_SECONDS = float(os.environ.get("RUN_EVENT_KEEPALIVE_SECONDS", "15"))
+
+# Stage events, in pipeline order.
+EVENT_RUN_STARTED = "run_started"
+EVENT_CONCEPT_CHOSEN = "concept_chosen"
+EVENT_PROMPT_WRITTEN = "prompt_written"
+EVENT_RAW_IMAGE_READY = "raw_image_ready"
+EVENT_OPTIMIZED_IMAGE_READY = "optimized_image_ready"
+EVENT_CRITIC_VERDICT = "critic_verdict"
+EVENT_STAGE_REPLAYED = "stage_replayed"
+EVENT_PUBLISHED = "published"
+EVENT_RUN_FINISHED = "run_finished"
+
+TERMINAL_EVENTS = (EVENT_RUN_FINISHED,)
+
+
+class RunEventBus:
+    """
+    In-process publish/subscribe bus for per-run stage events.
+
+    Each run keeps a bounded event history so late subscribers (or reconnecting SSE clients
+    sending `Last-Event-ID`) replay what they missed before following live events.
+    `publish` is thread-safe and never blocks the pipeline: subscriber queues are fed
+    on their own event loop via `call_soon_threadsafe`.
+    """
+
+    def __init__(self, history_size: int = RUN_EVENT_HISTORY_SIZE, max_runs: int = RUN_EVENT_MAX_RUNS):
+        self.history_size = max(1, history_size)
+        self.max_runs = max(1, max_runs)
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._sequences: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, document_id: str, event: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            seq = self._sequences.get(document_id, 0) + 1
+            self._sequences[document_id] = seq
+            entry = {
+                "seq": seq,
+                "event": event,
+                "document_id": document_id,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                **(data or {}),
+            }
+
+            history = self._history.setdefault(document_id, [])
+            self._history.move_to_end(document_id)
+            history.append(entry)
+            if len(history) > self.history_size:
+                del history[: len(history) - self.history_size]
+            while len(self._history) > self.max_runs:
+                oldest_id, _ = self._history.popitem(last=False)
+                self._sequences.pop(oldest_id, None)
+
+            subscribers = list(self._subscribers.get(document_id, []))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, entry)
+            except RuntimeError:
+                # Subscriber's loop is closed; it unregisters itself on exit.
+                pass
+        return entry
+
+    def history(self, document_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._history.get(document_id, []))
+
+    def count(self, document_id: str, event: str) -> int:
+        with self._lock:
+            return sum(1 for entry in self._history.get(document_id, []) if entry["event"] == event)
+
+    async def subscribe(
+        self,
+        document_id: str,
+        last_seq: int = 0,
+        keepalive_seconds: float = RUN_EVENT_KEEPALIVE_SECONDS,
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yields the run's events after `last_seq`, then live events until the run finishes.
+        Yields None every `keepalive_seconds` without events so callers can send keep-alives.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            replay = [entry for entry in self._history.get(document_id, []) if entry["seq"] > last_seq]
+            self._subscribers.setdefault(document_id, []).append(subscriber)
+
+        try:
+            for entry in replay:
+                last_seq = entry["seq"]
+                yield entry
+                if entry["event"] in TERMINAL_EVENTS:
+                    return
+
+            while True:
+                try:
+                    entry = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if entry["seq"] <= last_seq:
+                    continue
+                last_seq = entry["seq"]
+                yield entry
+                if entry["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(document_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(document_id, None)
+
+
+run_event_bus = RunEventBus()
+
+
+def publish_run_event(document_id: Optional[str], event: str, **data: Any) -> None:
+    """Publishes a stage event for `document_id`. Event delivery errors never affect the run."""
+    if not document_id:
+        return
+    try:
+        run_event_bus.publish(document_id, event, data)
+    except Exception as e:
+        logger.error(f"Failed to publish '{event}' event for doc '{document_id}': {e}")
+
+
+def format_sse(entry: Optional[Dict[str, Any]]) -> str:
+    """Formats a bus entry as a server-sent event frame (None -> keep-alive comment)."""
+    if entry is None:
+        return ": keep-alive\n\n"
+    return f"id: {entry['seq']}\nevent: {entry['event']}\ndata: {json.dumps(entry, default=str)}\n\n"
@@ -1,21 +1,43 @@
-import os
-import json
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 from typing import Optional, Dict, Any
 from datetime import datetime, timezone
 
 from google.adk.plugins.base_plugin import BasePlugin
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.base_agent import BaseAgent
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.base_tool import BaseTool
 from google.adk.models import LlmRequest, LlmResponse
-from google.cloud import firestore
+from google.genai import types
 
 from color_it_daily_agent.context import get_agent_context
-from color_it_daily_agent.lib.persistence import update_document, get_local_output_dir
+from color_it_daily_agent.lib.persistence import update_document, local_document_lock
+from color_it_daily_agent.lib.trace_sink import TRACE_FILE_NAME, TraceSink, open_trace_sink, close_trace_sink
+from color_it_daily_agent.lib.trace_writer import trace_writer, TRACE_FLUSH_TIMEOUT_SECONDS
+from color_it_daily_agent.lib.firestore_traces import (
+    get_trace_buffer,
+    peek_trace_buffer,
+    flush_in_background,
+    finish_in_background,
+)
+from color_it_daily_agent.lib.checkpoint_plugin import parse_agent_json_output
+from color_it_daily_agent.lib import run_events
 
 logger = logging.getLogger(__name__)
 
+# Invocations already closed, remembered so a second run-end callback is a no-op.
+_CLOSED_INVOCATIONS_MAX = 1024
+
+
+def _resolve(future: Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
 
 class PromptTracePlugin(BasePlugin):
     """
@@ -25,14 +47,27 @@ class PromptTracePlugin(BasePlugin):
     Also prunes stale intermediate tool context logs across agents in a SequentialAgent pipeline
     to drastically cut token usage and latency.
 
-    - Local Mode (no_persist=True): Saves traces to `./tmp/color_it_daily/<doc_id>/prompt_trace.json`
-      and updates the local `document.json`.
-    - Cloud Mode (no_persist=False): Appends trace entries into the `"traces"` array on the existing
-      Firestore document for this run (`coloring_pages/<doc_id>`).
+    - Every run appends one JSON line per event to `./tmp/color_it_daily/<doc_id>/prompt_trace.jsonl`
+      (see lib/trace_sink.py); the file stays open until the run ends.
+    - Local Mode (no_persist=True): The local `document.json` only points at that file (`trace_file`)
+      and carries a `trace_summary` (counts, tokens, durations), refreshed after each agent and at run end.
+    - Cloud Mode (no_persist=False): Writes each trace entry as `coloring_pages/<doc_id>/traces/<seq>`
+      and keeps only a `trace_summary` (counts, tokens, durations) on the page document itself.
+      Entries are written in batches: when TRACE_FLUSH_MAX_ENTRIES are pending or the oldest is
+      TRACE_FLUSH_INTERVAL_SECONDS old, after each agent, and at run end.
+
+    The callbacks never write traces themselves: entries go through a bounded queue to a
+    dedicated writer thread (lib/trace_writer.py, TRACE_QUEUE_MAX_SIZE / TRACE_QUEUE_POLICY),
+    and the end of each run waits for its queued entries.
+
+    The same hooks publish stage events (concept chosen, prompt written, images ready, critic
+    verdicts, published) to the in-process run event bus behind `GET /runs/{id}/events`.
     """
 
     def __init__(self, name: str = "PromptTracePlugin"):
         super().__init__(name=name)
+        self._closed_invocations: "OrderedDict[str, None]" = OrderedDict()
+        self._closed_lock = threading.Lock()
 
     def _prune_stale_tool_context(self, contents: list) -> list:
         """Strips out intermediate inter-agent tool call logs injected by ADK for previous agents."""
@@ -64,50 +99,149 @@ class PromptTracePlugin(BasePlugin):
 
         return pruned_contents if pruned_contents else contents
 
-    def _record_trace(self, trace_entry: Dict[str, Any]) -> None:
+    async def _record_trace(self, trace_entry: Dict[str, Any]) -> None:
+        """Hands the entry to the trace writer thread; the callback only waits under the "block" policy."""
         ctx = get_agent_context()
         if not ctx:
             logger.debug("PromptTracePlugin: No active AgentContext found; skipping trace record.")
             return
+        await trace_writer.submit_async(ctx, self._write_trace, trace_entry)
 
+    def _write_trace(self, trace_entry: Dict[str, Any]) -> None:
+        """Runs on the trace writer thread, inside the run's AgentContext."""
+        ctx = get_agent_context()
         doc_id = ctx.document_id
         no_persist = ctx.no_persist
 
-        # 1. Always save locally to document output directory
-        local_dir = get_local_output_dir(doc_id)
-        local_trace_path = os.path.join(local_dir, "prompt_trace.json")
+        # 1. Always append to the run's local JSON Lines trace
+        with local_document_lock(doc_id):
+            try:
+                sink = open_trace_sink(doc_id)
+                position = sink.append(trace_entry)
+            except Exception as e:
+                logger.error(f"Failed to append to local {TRACE_FILE_NAME} for '{doc_id}': {e}")
+                position = None
+
+        # 2. Point document.json at the trace file, or buffer the entry for Firestore
+        if no_persist and position == 1:
+            self._update_local_trace_summary()
 
+        if not no_persist:
+            buffer = get_trace_buffer(doc_id)
+            if buffer.add(trace_entry):
+                flush_in_background(buffer)
+
+    def _flush_firestore_traces(self, _=None) -> None:
+        buffer = peek_trace_buffer(get_agent_context().document_id)
+        if buffer is not None and buffer.request_flush():
+            flush_in_background(buffer)
+
+    def _update_local_trace_summary(self, sink: Optional[TraceSink] = None) -> None:
+        """no_persist: document.json holds the trace file path and summary counters, never the entries."""
+        doc_id = get_agent_context().document_id
+        sink = sink or open_trace_sink(doc_id)
         try:
-            traces = []
-            if os.path.exists(local_trace_path):
-                with open(local_trace_path, "r", encoding="utf-8") as f:
-                    traces = json.load(f)
-            traces.append(trace_entry)
-            with open(local_trace_path, "w", encoding="utf-8") as f:
-                json.dump(traces, f, indent=2)
+            update_document(
+                doc_id,
+                {"trace_file": sink.path, "trace_summary": sink.summary.to_dict()},
+                no_persist=True,
+            )
         except Exception as e:
-            logger.error(f"Failed to append to local prompt_trace.json for '{doc_id}': {e}")
+            logger.error(f"Failed to update local document.json with the trace summary: {e}")
 
-        # 2. Update document.json or Firestore with ArrayUnion
-        if no_persist:
-            try:
-                update_document(doc_id, {"traces": traces}, no_persist=True)
-            except Exception as e:
-                logger.error(f"Failed to update local document.json with trace: {e}")
-        else:
-            try:
-                from color_it_daily_agent.lib.database import get_db
-                from color_it_daily_agent.app_configs import configs
-
-                db = get_db()
-                doc_ref = db.collection(configs.coloring_page_collection).document(doc_id)
-                doc_ref.set(
-                    {"traces": firestore.ArrayUnion([trace_entry]), "updated_at": datetime.now(timezone.utc)},
-                    merge=True,
-                )
-                logger.info(f"📍 [TRACE LOGGED] Appended {trace_entry.get('event')} trace to Firestore doc '{doc_id}'")
-            except Exception as e:
-                logger.error(f"Failed to append trace to Firestore for doc '{doc_id}': {e}")
+    def _close_run_files(self, closed: Future) -> None:
+        """
+        Last writer item of a run (never dropped): closes its trace file and hands its Firestore
+        buffer to the flush pool. `closed` resolves once the final batch is written.
+        """
+        ctx = get_agent_context()
+        try:
+            sink = close_trace_sink(ctx.document_id)
+            if ctx.no_persist and sink is not None:
+                self._update_local_trace_summary(sink)
+        finally:
+            if ctx.no_persist:
+                _resolve(closed)
+            else:
+                finish_in_background(ctx.document_id).add_done_callback(lambda _: _resolve(closed))
+
+    async def _close_run_trace(self, invocation_context: InvocationContext) -> None:
+        ctx = get_agent_context()
+        if not ctx:
+            return
+        # A failing after_run callback also triggers on_run_error; close each run once.
+        with self._closed_lock:
+            if invocation_context.invocation_id in self._closed_invocations:
+                return
+            self._closed_invocations[invocation_context.invocation_id] = None
+            while len(self._closed_invocations) > _CLOSED_INVOCATIONS_MAX:
+                self._closed_invocations.popitem(last=False)
+
+        closed: Future = Future()
+        trace_writer.submit(ctx, self._close_run_files, closed, droppable=False)
+        done, _ = await asyncio.wait({asyncio.wrap_future(closed)}, timeout=TRACE_FLUSH_TIMEOUT_SECONDS)
+        if not done:
+            logger.warning(f"⚠️ Timed out waiting for the queued traces of doc '{ctx.document_id}'; they are written in the background.")
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        """Flushes the traces buffered while the agent ran (after they reach the writer), or refreshes the local summary."""
+        ctx = get_agent_context()
+        if ctx:
+            trace_writer.submit(ctx, self._update_local_trace_summary if ctx.no_persist else self._flush_firestore_traces)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        """Waits for the run's queued traces, then closes its trace file and Firestore buffer."""
+        await self._close_run_trace(invocation_context)
+
+    async def on_run_error_callback(self, *, invocation_context: InvocationContext, error: Exception) -> None:
+        await self._close_run_trace(invocation_context)
+
+    def _publish_agent_output_event(self, agent_name: str, output_text: Optional[str]) -> None:
+        """Publishes the stage event for an agent's final JSON answer."""
+        ctx = get_agent_context()
+        output = parse_agent_json_output(output_text) if ctx else None
+        if not output:
+            return
+
+        if agent_name == "CreativeDirector" and output.get("title"):
+            run_events.publish_run_event(
+                ctx.document_id,
+                run_events.EVENT_CONCEPT_CHOSEN,
+                title=output.get("title"),
+                description=output.get("description"),
+            )
+        elif agent_name == "Stylist" and output.get("positive_prompt"):
+            run_events.publish_run_event(
+                ctx.document_id,
+                run_events.EVENT_PROMPT_WRITTEN,
+                positive_prompt=output.get("positive_prompt"),
+            )
+        elif agent_name == "Critic" and output.get("status") in ("PASS", "REJECT"):
+            iteration = run_events.run_event_bus.count(ctx.document_id, run_events.EVENT_CRITIC_VERDICT) + 1
+            run_events.publish_run_event(
+                ctx.document_id,
+                run_events.EVENT_CRITIC_VERDICT,
+                iteration=iteration,
+                status=output.get("status"),
+                feedback=output.get("feedback"),
+            )
+
+    def _publish_tool_event(self, tool_name: str, result: Any) -> None:
+        """Publishes the stage event for a completed media or publish tool."""
+        ctx = get_agent_context()
+        if not ctx:
+            return
+        value = result.get("result") if isinstance(result, dict) else result
+
+        if tool_name == "generate_image":
+            run_events.publish_run_event(ctx.document_id, run_events.EVENT_RAW_IMAGE_READY, path=value)
+        elif tool_name == "optimize_image":
+            run_events.publish_run_event(ctx.document_id, run_events.EVENT_OPTIMIZED_IMAGE_READY, path=value)
+        elif tool_name == "publish_to_firestore" and isinstance(value, str) and value.startswith("SUCCESS"):
+            run_events.publish_run_event(ctx.document_id, run_events.EVENT_PUBLISHED, message=value)
 
     async def before_model_callback(
         self, *, callback_context: CallbackContext, llm_request: LlmRequest
@@ -148,7 +282,7 @@ class PromptTracePlugin(BasePlugin):
             "system_instruction": sys_instruction,
             "contents": contents_summary,
         }
-        self._record_trace(entry)
+        await self._record_trace(entry)
         return None
 
     async def after_model_callback(
@@ -184,7 +318,9 @@ class PromptTracePlugin(BasePlugin):
             "tokens": tokens,
             "error_message": llm_response.error_message if llm_response.error_code else None
         }
-        self._record_trace(entry)
+        await self._record_trace(entry)
+        if not function_calls and not getattr(llm_response, "partial", False):
+            self._publish_agent_output_event(callback_context.agent_name, output_text)
         return None
 
     async def before_tool_callback(
@@ -202,7 +338,7 @@ class PromptTracePlugin(BasePlugin):
             "tool_name": tool.name,
             "arguments": tool_args,
         }
-        self._record_trace(entry)
+        await self._record_trace(entry)
         return None
 
     async def after_tool_callback(
@@ -225,5 +361,6 @@ class PromptTracePlugin(BasePlugin):
             "tool_name": tool.name,
             "result_snippet": result_str,
         }
-        self._record_trace(entry)
+        await self._record_trace(entry)
+        self._publish_tool_event(tool.name, result)
         return None
@@ -0,0 +1,125 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+from color_it_daily_agent.lib.persistence import get_local_output_dir
+from color_it_daily_agent.lib.trace_summary import TraceSummary
+
+logger = logging.getLogger(__name__)
+
+TRACE_FILE_NAME = "prompt_trace.jsonl"
+# Runs traced before the JSON Lines sink wrote one JSON array, rewritten on every event.
+LEGACY_TRACE_FILE_NAME = "prompt_trace.json"
+
+
+class TraceSink:
+    """
+    Append-only JSON Lines trace file of one run (`<run dir>/prompt_trace.jsonl`).
+
+    The file is opened once and held until the run ends; each event is one line, written and
+    flushed under a lock, so recording costs the same for the first event and the five-hundredth.
+    The sink also keeps the run's `TraceSummary`. Reopening the sink of a resumed run appends
+    after the lines already there and counts them into the summary.
+    """
+
+    def __init__(self, document_id: str, path: str):
+        self.document_id = document_id
+        self.path = path
+        self.summary = TraceSummary()
+        existing = _read_jsonl(path) if os.path.exists(path) else []
+        for entry in existing:
+            self.summary.add(entry)
+        self.count = len(existing)
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() > 0 and not _ends_with_newline(path):
+            # Terminate a line torn by a killed process so the next entry starts on its own line.
+            self._file.write("\n")
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Writes one trace entry and returns its 1-based position in the run's trace."""
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.count += 1
+            self.summary.add(entry)
+            return self.count
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping unreadable trace line {number} of '{path}'.")
+    return entries
+
+
+_sinks: Dict[str, TraceSink] = {}
+_sinks_lock = threading.Lock()
+
+
+def open_trace_sink(document_id: str) -> TraceSink:
+    """Returns the open trace sink of `document_id`, opening its file on first use."""
+    sink = _sinks.get(document_id)
+    if sink is not None and not sink.closed:
+        return sink
+    with _sinks_lock:
+        sink = _sinks.get(document_id)
+        if sink is None or sink.closed:
+            path = os.path.join(get_local_output_dir(document_id), TRACE_FILE_NAME)
+            sink = TraceSink(document_id, path)
+            _sinks[document_id] = sink
+    return sink
+
+
+def close_trace_sink(document_id: str) -> Optional[TraceSink]:
+    """Closes and forgets the trace sink of `document_id` (run end). Returns it, if one was open."""
+    with _sinks_lock:
+        sink = _sinks.pop(document_id, None)
+    if sink is not None:
+        sink.close()
+        logger.debug(f"Closed trace sink '{sink.path}' after {sink.count} event(s).")
+    return sink
+
+
+def read_traces(document_id: str, run_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Reassembles a run's trace entries in order from its JSON Lines file (or from a legacy
+    `prompt_trace.json`). A torn final line, left by a process killed mid-write, is skipped.
+    """
+    run_dir = run_dir or get_local_output_dir(document_id)
+    path = os.path.join(run_dir, TRACE_FILE_NAME)
+    if not os.path.exists(path):
+        legacy_path = os.path.join(run_dir, LEGACY_TRACE_FILE_NAME)
+        if os.path.exists(legacy_path):
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return []
+
+    return _read_jsonl(path)
@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+class TraceSummary:
+    """
+    Running totals of a run's trace, small enough to live on the page document while the
+    entries themselves are stored elsewhere: event counts, token usage per agent and timings
+    (whole trace and per tool).
+    """
+
+    def __init__(self):
+        self.events = 0
+        self.by_event: Dict[str, int] = {}
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.agents: Dict[str, Dict[str, int]] = {}
+        self.tool_seconds: Dict[str, float] = {}
+        self.first_event_at: Optional[str] = None
+        self.last_event_at: Optional[str] = None
+        self._tool_started: Dict[str, datetime] = {}
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        event = entry.get("event") or "UNKNOWN"
+        agent = entry.get("agent") or "unknown"
+        timestamp = entry.get("timestamp")
+
+        self.events += 1
+        self.by_event[event] = self.by_event.get(event, 0) + 1
+        if timestamp:
+            self.first_event_at = self.first_event_at or timestamp
+            self.last_event_at = timestamp
+
+        agent_totals = self.agents.setdefault(agent, {"llm_calls": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0})
+        if event == "LLM_RESPONSE":
+            tokens = entry.get("tokens") or {}
+            input_tokens = tokens.get("input_tokens") or 0
+            output_tokens = tokens.get("output_tokens") or 0
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            agent_totals["llm_calls"] += 1
+            agent_totals["input_tokens"] += input_tokens
+            agent_totals["output_tokens"] += output_tokens
+            if entry.get("error_message"):
+                self.errors += 1
+        elif event == "TOOL_START":
+            agent_totals["tool_calls"] += 1
+            started = _parse_time(timestamp)
+            if started:
+                self._tool_started[f"{agent}/{entry.get('tool_name')}"] = started
+        elif event == "TOOL_COMPLETE":
+            tool_name = entry.get("tool_name") or "unknown"
+            started = self._tool_started.pop(f"{agent}/{tool_name}", None)
+            finished = _parse_time(timestamp)
+            if started and finished:
+                elapsed = (finished - started).total_seconds()
+                self.tool_seconds[tool_name] = round(self.tool_seconds.get(tool_name, 0.0) + elapsed, 3)
+
+    def merge(self, data: Optional[Dict[str, Any]]) -> None:
+        """Adds a previously stored summary (e.g. from before a resume) into this one."""
+        if not data:
+            return
+        self.events += data.get("events") or 0
+        self.errors += data.get("errors") or 0
+        self.input_tokens += data.get("input_tokens") or 0
+        self.output_tokens += data.get("output_tokens") or 0
+        for event, count in (data.get("by_event") or {}).items():
+            self.by_event[event] = self.by_event.get(event, 0) + count
+        for agent, totals in (data.get("agents") or {}).items():
+            mine = self.agents.setdefault(agent, {"llm_calls": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0})
+            for key, value in totals.items():
+                mine[key] = mine.get(key, 0) + (value or 0)
+        for tool_name, seconds in (data.get("tool_seconds") or {}).items():
+            self.tool_seconds[tool_name] = round(self.tool_seconds.get(tool_name, 0.0) + (seconds or 0.0), 3)
+        first, last = data.get("first_event_at"), data.get("last_event_at")
+        if first and (self.first_event_at is None or first < self.first_event_at):
+            self.first_event_at = first
+        if last and (self.last_event_at is None or last > self.last_event_at):
+            self.last_event_at = last
+
+    def to_dict(self) -> Dict[str, Any]:
+        first, last = _parse_time(self.first_event_at), _parse_time(self.last_event_at)
+        return {
+            "events": self.events,
+            "by_event": dict(self.by_event),
+            "errors": self.errors,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "agents": {agent: dict(totals) for agent, totals in self.agents.items()},
+            "tool_seconds": dict(self.tool_seconds),
+            "first_event_at": self.first_event_at,
+            "last_event_at": self.last_event_at,
+            "duration_seconds": round((last - first).total_seconds(), 3) if first and last else None,
+        }
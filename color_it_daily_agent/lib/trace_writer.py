@@ -0,0 +1,155 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Any, Optional, Tuple
+
+from color_it_daily_agent.context import AgentContext, agent_context_scope
+
+logger = logging.getLogger(__name__)
+
+# Trace items waiting for the writer thread. When full, TRACE_QUEUE_POLICY decides:
+# "drop_oldest" discards the oldest queued item right away; "block" makes the recording callback
+# wait (off the event loop) up to TRACE_QUEUE_BLOCK_SECONDS for room, then drops the oldest.
+TRACE_QUEUE_MAX_SIZE = int(os.environ.get("TRACE_QUEUE_MAX_SIZE", "1000"))
+TRACE_QUEUE_POLICY = os.environ.get("TRACE_QUEUE_POLICY", "drop_oldest").lower()
+TRACE_QUEUE_BLOCK_SECONDS = float(os.environ.get("TRACE_QUEUE_BLOCK_SECONDS", "2"))
+# How long run completion waits for the run's queued traces to be written.
+TRACE_FLUSH_TIMEOUT_SECONDS = float(os.environ.get("TRACE_FLUSH_TIMEOUT_SECONDS", "30"))
+
+# (run context, handler, handler argument, droppable)
+TraceItem = Tuple[AgentContext, Callable[[Any], None], Any, bool]
+
+
+class TraceWriter:
+    """
+    Bounded queue of trace work drained by one dedicated writer thread.
+
+    The ADK callbacks only enqueue; the writer thread runs each item's handler (local trace file,
+    document.json, Firestore buffer) in order, inside the run's AgentContext. `flush(document_id)`
+    waits until every item queued for that run so far has been written or dropped.
+    """
+
+    def __init__(self, max_size: int = TRACE_QUEUE_MAX_SIZE, policy: str = TRACE_QUEUE_POLICY):
+        self.max_size = max(1, max_size)
+        self.policy = policy
+        self._queue: Deque[TraceItem] = deque()
+        self._cond = threading.Condition()
+        self._outstanding: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.blocked = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+            self._thread.start()
+
+    def _done(self, document_id: str) -> None:
+        left = self._outstanding.get(document_id, 0) - 1
+        if left > 0:
+            self._outstanding[document_id] = left
+        else:
+            self._outstanding.pop(document_id, None)
+        self._cond.notify_all()
+
+    def _append(self, item: TraceItem) -> None:
+        """Queues `item`, dropping the oldest queued item when full. Caller holds the condition."""
+        if len(self._queue) >= self.max_size:
+            index = next((i for i, queued in enumerate(self._queue) if queued[3]), None)
+            if index is not None:
+                dropped_ctx = self._queue[index][0]
+                del self._queue[index]
+                self.dropped += 1
+                self._done(dropped_ctx.document_id)
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    logger.warning(f"⚠️ Trace queue full ({self.max_size}); dropped {self.dropped} trace item(s) so far.")
+        self._queue.append(item)
+        self.enqueued += 1
+        self._outstanding[item[0].document_id] = self._outstanding.get(item[0].document_id, 0) + 1
+        self._cond.notify_all()
+
+    def submit(self, ctx: AgentContext, handler: Callable[[Any], None], arg: Any = None, droppable: bool = True) -> bool:
+        """
+        Queues a trace item without waiting. Returns False if the queue was full (an older item was
+        dropped). Items with `droppable=False` (run completion) are never dropped.
+        """
+        with self._cond:
+            self._ensure_thread()
+            has_room = len(self._queue) < self.max_size
+            self._append((ctx, handler, arg, droppable))
+        return has_room
+
+    def _wait_for_room(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(self._queue) >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+    async def submit_async(self, ctx: AgentContext, handler: Callable[[Any], None], arg: Any = None) -> bool:
+        """`submit` for the ADK callbacks: under the "block" policy, waits for room on a worker thread."""
+        if self.policy == "block":
+            with self._cond:
+                full = len(self._queue) >= self.max_size
+            if full:
+                self.blocked += 1
+                await asyncio.to_thread(self._wait_for_room, TRACE_QUEUE_BLOCK_SECONDS)
+        return self.submit(ctx, handler, arg)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                ctx, handler, arg, _ = self._queue.popleft()
+                self._cond.notify_all()
+            try:
+                with agent_context_scope(ctx):
+                    handler(arg)
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Trace writer failed for doc '{ctx.document_id}': {e}")
+            finally:
+                with self._cond:
+                    self._done(ctx.document_id)
+
+    def flush(self, document_id: Optional[str] = None, timeout: float = TRACE_FLUSH_TIMEOUT_SECONDS) -> bool:
+        """Waits until the queued items of `document_id` (or of every run) are handled. False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._outstanding.get(document_id, 0) if document_id else self._outstanding:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "policy": self.policy,
+                "max_size": self.max_size,
+                "queued": len(self._queue),
+                "runs_pending": len(self._outstanding),
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+            }
+
+
+trace_writer = TraceWriter()
+
+
+def get_trace_writer_stats() -> Dict[str, Any]:
+    return trace_writer.stats()
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_TIMEOUT_SECONDS = float(os.environ.get("WARMUP_TIMEOUT_SECONDS", "60"))
+
+STEP_PENDING = "pending"
+STEP_OK = "ok"
+STEP_FAILED = "failed"
+STEP_SKIPPED = "skipped"
+
+
+def _warm_firestore() -> Any:
+    from color_it_daily_agent.lib.database import get_db
+
+    get_db()
+
+
+def _warm_storage() -> Any:
+    from color_it_daily_agent.lib.clients import get_storage_client
+
+    get_storage_client()
+
+
+def _warm_vertex_genai() -> Any:
+    from color_it_daily_agent.lib.clients import get_vertex_genai_client
+
+    get_vertex_genai_client()
+
+
+def _warm_input_overrides() -> Any:
+    from color_it_daily_agent.lib.firestore_config import input_override_store
+
+    input_override_store.start()
+    if input_override_store.synced_at is None:
+        raise RuntimeError(f"Could not read '{input_override_store.path}'; polling in the background.")
+    return {"version": input_override_store.version, "listening": input_override_store.listening}
+
+
+def _warm_collection_catalog() -> Any:
+    from color_it_daily_agent.lib.collections import prefetch_collection_catalog
+
+    return {"collections": prefetch_collection_catalog()}
+
+
+def _warm_micro_styles() -> Any:
+    from color_it_daily_agent.lib.micro_styles import prefetch_micro_styles
+
+    return {"micro_styles": prefetch_micro_styles()}
+
+
+def _warm_default_micro_style_pool() -> Any:
+    from color_it_daily_agent.lib.collections import DEFAULT_COLLECTION_NAME
+    from color_it_daily_agent.lib.micro_styles import get_micro_style_pool
+
+    return {"micro_styles": len(get_micro_style_pool(DEFAULT_COLLECTION_NAME))}
+
+
+def _warm_potrace() -> Any:
+    from color_it_daily_agent.generator.tools.optimize import find_potrace
+
+    path = find_potrace()
+    if not path:
+        raise RuntimeError("potrace executable not found on PATH.")
+    return {"path": path}
+
+
+# (name, function). Each runs once in a worker thread; failures are reported, never raised.
+WARMUP_STEPS: List[Tuple[str, Callable[[], Any]]] = [
+    ("firestore_client", _warm_firestore),
+    ("storage_client", _warm_storage),
+    ("vertex_genai_client", _warm_vertex_genai),
+    ("input_overrides", _warm_input_overrides),
+    ("collection_catalog", _warm_collection_catalog),
+    ("micro_style_list", _warm_micro_styles),
+    ("default_micro_style_pool", _warm_default_micro_style_pool),
+    ("potrace", _warm_potrace),
+]
+
+
+class WarmupState:
+    """
+    Tracks the background start-up warm-up.
+
+    The service accepts requests as soon as it binds; warm-up only pre-pays the first-use cost
+    of clients and catalog lookups. A failed step is logged and left to the normal lazy path,
+    so `ready` means "warm-up finished", not "every dependency is healthy".
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], Any]]]):
+        self.steps = steps
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: Dict[str, Dict[str, Any]] = {name: {"status": STEP_PENDING} for name, _ in steps}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    async def _run_step(self, name: str, func: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.to_thread(func)
+            self.results[name] = {"status": STEP_OK, "duration_seconds": round(time.perf_counter() - start, 3)}
+            if isinstance(detail, dict):
+                self.results[name].update(detail)
+            logger.info(f"🔥 [WARMUP] {name} ready in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            self.results[name] = {
+                "status": STEP_FAILED,
+                "duration_seconds": round(time.perf_counter() - start, 3),
+                "error": str(e),
+            }
+            logger.warning(f"[WARMUP] {name} failed: {e}")
+
+    async def run(self) -> None:
+        self.started_at = time.time()
+        if not WARMUP_ENABLED:
+            for name, _ in self.steps:
+                self.results[name] = {"status": STEP_SKIPPED}
+            self.finished_at = time.time()
+            return
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(self._run_step(name, func) for name, func in self.steps)),
+                timeout=WARMUP_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            for name, result in self.results.items():
+                if result["status"] == STEP_PENDING:
+                    self.results[name] = {"status": STEP_FAILED, "error": "warm-up timed out"}
+            logger.warning(f"[WARMUP] Timed out after {WARMUP_TIMEOUT_SECONDS:.0f}s")
+        finally:
+            self.finished_at = time.time()
+            logger.info(f"🔥 [WARMUP] Finished in {self.finished_at - self.started_at:.2f}s")
+
+    def start(self) -> asyncio.Task:
+        """Schedules the warm-up on the running loop (once) without waiting for it."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "enabled": WARMUP_ENABLED,
+            "duration_seconds": (
+                round(self.finished_at - self.started_at, 3) if self.ready and self.started_at else None
+            ),
+            "steps": dict(self.results),
+        }
+
+
+warmup_state = WarmupState(WARMUP_STEPS)
+
+
+def start_warmup() -> asyncio.Task:
+    return warmup_state.start()
+
+
+def get_warmup_status() -> Dict[str, Any]:
+    return warmup_state.status()
@@ -1,8 +1,10 @@
+import os
 import json
 import uuid
+import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, Any, Tuple
+from datetime import datetime, timezone
+from typing import Dict, Any, Tuple, Optional, List
 from fastapi import HTTPException
 
 from color_it_daily_agent.context import (
@@ -11,28 +13,30 @@ from color_it_daily_agent.context import (
     VALID_TARGET_AUDIENCES,
     DEFAULT_TARGET_AUDIENCE,
 )
-from color_it_daily_agent.lib.firestore_config import load_firestore_input_overrides
-from color_it_daily_agent.lib.collections import get_collection, DEFAULT_COLLECTION_NAME
-from color_it_daily_agent.lib.micro_styles import resolve_micro_style
-from color_it_daily_agent.lib.persistence import pre_create_document, get_local_output_dir
+from color_it_daily_agent.lib.firestore_config import load_versioned_input_overrides
+from color_it_daily_agent.lib.collections import get_collection, get_collections, DEFAULT_COLLECTION_NAME
+from color_it_daily_agent.lib.micro_styles import resolve_micro_style, select_random_micro_styles
+from color_it_daily_agent.lib.http_client import latency_budget
+from color_it_daily_agent.lib.idempotency import build_idempotency_key, claim_run_lease
+from color_it_daily_agent.lib.checkpoint_plugin import load_resume_checkpoints
+from color_it_daily_agent.lib.persistence import (
+    pre_create_document,
+    update_document,
+    mark_document_failed,
+    get_document,
+    get_local_output_dir,
+)
 
 logger = logging.getLogger(__name__)
 
+BATCH_MAX_PAGES = int(os.environ.get("BATCH_MAX_PAGES", "20"))
+BATCH_CONTROL_FIELDS = ("collections", "count", "max_parallel", "wait")
 
-def prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext, Dict[str, Any]]:
-    """
-    Processes the raw API input payload:
-    1. Normalizes payload field aliases (collection -> collection_name, keyword -> target_keyword, selected_style -> micro_style).
-    2. Overrides non-null fields from Firestore config document ('coloritdaily_config/agent_input').
-    3. Validates collection existence and activity.
-    4. Resolves micro_style dynamically via API endpoints (fails fast on error).
-    5. Normalizes target_audience (defaults to 'kids_3_10').
-    6. Pre-creates a Firestore (or local if no_persist) document with status='running'.
-    7. Sets up and returns the AgentContext.
-    """
+
+def _normalize_payload_aliases(input_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Copies the raw payload and maps field aliases onto their canonical names."""
     merged_payload = dict(input_payload)
 
-    # Alias normalization on input payload
     if "collection" in merged_payload and "collection_name" not in merged_payload:
         merged_payload["collection_name"] = merged_payload.get("collection")
     if "keyword" in merged_payload and "target_keyword" not in merged_payload:
@@ -40,8 +44,16 @@ def prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext
     if "selected_style" in merged_payload and "micro_style" not in merged_payload:
         merged_payload["micro_style"] = merged_payload.get("selected_style")
 
-    # 1. Load Firestore Overrides & Merge
-    firestore_overrides = load_firestore_input_overrides()
+    return merged_payload
+
+
+def _apply_firestore_overrides(
+    merged_payload: Dict[str, Any], firestore_overrides: Dict[str, Any], version: Optional[str] = None
+) -> None:
+    """Merges non-null Firestore override fields over the payload in place and records their version."""
+    if version is not None:
+        merged_payload["input_overrides_version"] = version
+        logger.info(f"⚙️ Using input overrides version {version} ({len(firestore_overrides)} field(s))")
     for k, v in firestore_overrides.items():
         if v is not None:
             if k == "selected_style" and "micro_style" not in firestore_overrides:
@@ -50,7 +62,9 @@ def prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext
                 merged_payload[k] = v
             logger.info(f"Overrode input field '{k}' with Firestore value: {v}")
 
-    # Extract & set defaults
+
+def _apply_run_defaults(merged_payload: Dict[str, Any]) -> Tuple[str, str, bool, Optional[str]]:
+    """Fills current_date, collection_name, no_persist and target_keyword defaults in place."""
     current_date = merged_payload.get("current_date") or datetime.now().strftime("%Y-%m-%d")
     merged_payload["current_date"] = current_date
 
@@ -66,30 +80,65 @@ def prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext
         merged_payload["target_keyword"] = target_keyword
         logger.info(f"🎯 Target Keyword set: '{target_keyword}'")
 
-    # 2. Validate Collection
-    collection_data = get_collection(collection_name)
+    return current_date, collection_name, no_persist, target_keyword
+
+
+def _require_collection(collection_name: str, collection_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Raises a 400 HTTPException when the collection lookup came back empty."""
     if not collection_data:
         err_msg = f"Collection '{collection_name}' does not exist or is inactive."
         logger.error(err_msg)
         raise HTTPException(status_code=400, detail=err_msg)
+    return collection_data
 
-    collection_context = collection_data.get("context")
-    collection_description = collection_data.get("description")
 
-    # 3. Resolve Micro-Style (API random selection if null/DEFAULT, or identifier lookup)
-    raw_micro_style = merged_payload.get("micro_style") or merged_payload.get("selected_style")
-    resolved_micro_style = resolve_micro_style(raw_micro_style, collection_name=collection_name)
+def _raw_micro_style_input(merged_payload: Dict[str, Any]) -> Any:
+    return merged_payload.get("micro_style") or merged_payload.get("selected_style")
 
-    micro_style_name = resolved_micro_style.get("name")
-    micro_style_unique_name = resolved_micro_style.get("unique_name")
-    micro_style_description = resolved_micro_style.get("description")
-    
-    # Store style name & description in payload for consistent JSON logging and downstream step echoing
-    merged_payload["micro_style"] = micro_style_name
-    merged_payload["micro_style_description"] = micro_style_description
-    logger.info(f"🎨 Micro-Style resolved: '{micro_style_name}' ({micro_style_unique_name})")
-
-    # Extract & normalize target_audience (API Payload / Override -> Collection Doc Default -> Fallback)
+
+def _is_random_micro_style(raw_style: Any) -> bool:
+    """Mirrors resolve_micro_style: None, empty or 'DEFAULT' means a random pick for the collection."""
+    if isinstance(raw_style, dict):
+        return False
+    return raw_style is None or not str(raw_style).strip() or str(raw_style).strip().upper() == "DEFAULT"
+
+
+def _micro_style_key(raw_style: Any) -> str:
+    if isinstance(raw_style, dict):
+        return json.dumps(raw_style, sort_keys=True, default=str)
+    return str(raw_style).strip().lower()
+
+
+def _micro_style_draw_options(merged_payload: Dict[str, Any], collection_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Keyword arguments for resolve_micro_style's local random draw (micro_style_exclude / _seed / _selection)."""
+    exclude = merged_payload.get("micro_style_exclude")
+    if exclude is not None and not isinstance(exclude, (list, tuple)):
+        exclude = [exclude]
+    return {
+        "collection_slug": collection_data.get("unique_name"),
+        "exclude": exclude,
+        "seed": merged_payload.get("micro_style_seed"),
+        "selection": merged_payload.get("micro_style_selection"),
+    }
+
+
+def _micro_style_draw_key(merged_payload: Dict[str, Any], collection_data: Dict[str, Any]) -> Tuple[str, str]:
+    """Groups batch pages that share a collection and the same draw options into one pool draw."""
+    options = _micro_style_draw_options(merged_payload, collection_data)
+    return merged_payload["collection_name"], json.dumps(options, sort_keys=True, default=str)
+
+
+def _apply_micro_style(merged_payload: Dict[str, Any], resolved_micro_style: Dict[str, Any]) -> None:
+    """Stores style name & description in payload for consistent JSON logging and downstream step echoing."""
+    merged_payload["micro_style"] = resolved_micro_style.get("name")
+    merged_payload["micro_style_description"] = resolved_micro_style.get("description")
+    logger.info(
+        f"🎨 Micro-Style resolved: '{resolved_micro_style.get('name')}' ({resolved_micro_style.get('unique_name')})"
+    )
+
+
+def _apply_target_audience(merged_payload: Dict[str, Any], collection_data: Dict[str, Any]) -> str:
+    """Extracts & normalizes target_audience (API Payload / Override -> Collection Doc Default -> Fallback)."""
     raw_audience = merged_payload.get("target_audience") or collection_data.get("target_audience")
     if raw_audience and str(raw_audience).strip().lower() in VALID_TARGET_AUDIENCES:
         target_audience = str(raw_audience).strip().lower()
@@ -98,35 +147,442 @@ def prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext
 
     merged_payload["target_audience"] = target_audience
     logger.info(f"🎯 Target Audience set: '{target_audience}'")
+    return target_audience
 
-    # 4. Generate Document ID & Pre-Create Document
-    document_id = str(uuid.uuid4())
-    pre_create_document(
-        document_id=document_id,
-        current_date=current_date,
-        collection_name=collection_name,
-        no_persist=no_persist,
-        input_payload=merged_payload,
-    )
 
-    # 5. Create & Set Agent Context
-    ctx = AgentContext(
+def _build_agent_context(
+    document_id: str,
+    merged_payload: Dict[str, Any],
+    collection_data: Dict[str, Any],
+    resolved_micro_style: Dict[str, Any],
+) -> AgentContext:
+    micro_style_name = resolved_micro_style.get("name")
+    return AgentContext(
         document_id=document_id,
-        current_date=current_date,
-        collection_name=collection_name,
-        no_persist=no_persist,
-        target_keyword=target_keyword,
-        target_audience=target_audience,
-        collection_context=collection_context,
-        collection_description=collection_description,
+        current_date=merged_payload["current_date"],
+        collection_name=merged_payload["collection_name"],
+        no_persist=merged_payload["no_persist"],
+        target_keyword=merged_payload.get("target_keyword") or None,
+        target_audience=merged_payload["target_audience"],
+        collection_context=collection_data.get("context"),
+        collection_description=collection_data.get("description"),
         collection_data=collection_data,
         micro_style=micro_style_name,
         micro_style_name=micro_style_name,
-        micro_style_unique_name=micro_style_unique_name,
-        micro_style_description=micro_style_description,
+        micro_style_unique_name=resolved_micro_style.get("unique_name"),
+        micro_style_description=resolved_micro_style.get("description"),
         micro_style_data=resolved_micro_style,
         local_output_dir=get_local_output_dir(document_id),
     )
+
+
+def _claim_and_pre_create(
+    document_id: str,
+    merged_payload: Dict[str, Any],
+    variant: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Claims the run's idempotency lease on (current_date, collection_name, target_keyword) and
+    pre-creates its document. Returns the existing run to attach to instead when a duplicate
+    request finds one in flight or completed (unless `force` is set).
+    """
+    key = build_idempotency_key(
+        merged_payload["current_date"],
+        merged_payload["collection_name"],
+        merged_payload.get("target_keyword"),
+        variant,
+    )
+    existing = claim_run_lease(
+        key,
+        document_id,
+        no_persist=merged_payload["no_persist"],
+        force=bool(merged_payload.get("force", False)),
+    )
+    if existing:
+        return existing
+
+    pre_create_document(
+        document_id=document_id,
+        current_date=merged_payload["current_date"],
+        collection_name=merged_payload["collection_name"],
+        no_persist=merged_payload["no_persist"],
+        input_payload=dict(merged_payload),
+    )
+    return None
+
+
+def _build_attached_context(existing: Dict[str, Any], merged_payload: Dict[str, Any]) -> AgentContext:
+    """Context for a duplicate request that attaches to an existing run instead of starting one."""
+    return AgentContext(
+        document_id=existing["document_id"],
+        current_date=merged_payload["current_date"],
+        collection_name=merged_payload["collection_name"],
+        no_persist=merged_payload["no_persist"],
+        target_keyword=merged_payload.get("target_keyword") or None,
+        local_output_dir=get_local_output_dir(existing["document_id"]),
+        attached=True,
+        attached_status=existing.get("status"),
+    )
+
+
+def _prepare_resume(input_payload: Dict[str, Any]) -> Tuple[AgentContext, Dict[str, Any]]:
+    """
+    Prepares a resumed run of the document named by `resume_document_id`.
+
+    The run replays the document's stored `input` (only `no_persist` and `force` are taken from
+    the new request) and reuses its document ID. Its stage checkpoints are loaded onto the
+    AgentContext so the StageCheckpointPlugin can skip the LLM and media calls whose results
+    already exist. Passed documents cannot be resumed; documents still 'running' only with `force`
+    (e.g. after the serving process died).
+    """
+    document_id = str(input_payload.get("resume_document_id")).strip()
+    no_persist = bool(input_payload.get("no_persist", False))
+    force = bool(input_payload.get("force", False))
+
+    document = get_document(document_id, no_persist)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' to resume was not found.")
+
+    status = document.get("status", "unknown")
+    if status == "PASS":
+        raise HTTPException(status_code=409, detail=f"Document '{document_id}' already passed; nothing to resume.")
+    if status == "running" and not force:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Document '{document_id}' is still running. Pass 'force': true to resume it anyway.",
+        )
+
+    merged_payload = dict(document.get("input") or {})
+    merged_payload["no_persist"] = no_persist
+    _, collection_name, _, _ = _apply_run_defaults(merged_payload)
+
+    collection_data = _require_collection(collection_name, get_collection(collection_name))
+    resolved_micro_style = resolve_micro_style(
+        _raw_micro_style_input(merged_payload),
+        collection_name=collection_name,
+        **_micro_style_draw_options(merged_payload, collection_data),
+    )
+    _apply_micro_style(merged_payload, resolved_micro_style)
+    _apply_target_audience(merged_payload, collection_data)
+
+    checkpoints = load_resume_checkpoints(document)
+
+    # Point the idempotency lease at the resumed document so duplicates attach to it.
+    key = build_idempotency_key(
+        merged_payload["current_date"], collection_name, merged_payload.get("target_keyword")
+    )
+    claim_run_lease(key, document_id, no_persist=no_persist, force=True)
+
+    update_document(document_id, {
+        "status": "running",
+        "error_message": None,
+        "input": merged_payload,
+        "resume_count": int(document.get("resume_count") or 0) + 1,
+        "resumed_at": datetime.now(timezone.utc).isoformat(),
+    }, no_persist=no_persist)
+    logger.info(
+        f"🔁 Resuming doc '{document_id}' (previous status: {status}) with checkpoints: {list(checkpoints.keys()) or 'none'}"
+    )
+
+    ctx = _build_agent_context(document_id, merged_payload, collection_data, resolved_micro_style)
+    ctx.checkpoints = dict(checkpoints)
+    ctx.resume_checkpoints = dict(checkpoints)
+    return ctx, merged_payload
+
+
+def prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext, Dict[str, Any]]:
+    """
+    Processes the raw API input payload:
+    1. Normalizes payload field aliases (collection -> collection_name, keyword -> target_keyword, selected_style -> micro_style).
+    2. Overrides non-null fields from Firestore config document ('coloritdaily_config/agent_input').
+    3. Validates collection existence and activity.
+    4. Resolves micro_style dynamically via API endpoints (fails fast on error).
+    5. Normalizes target_audience (defaults to 'kids_3_10').
+    6. Claims the (current_date, collection_name, target_keyword) idempotency lease; a duplicate
+       request gets an attached AgentContext for the in-flight or completed run (unless `force`).
+    7. Pre-creates a Firestore (or local if no_persist) document with status='running'.
+    8. Sets up and returns the AgentContext.
+
+    A payload with `resume_document_id` resumes that failed run from its stage checkpoints instead.
+    All Public API lookups of the run share one latency budget (PUBLIC_API_RUN_BUDGET_SECONDS).
+    """
+    with latency_budget():
+        return _prepare_agent_execution(input_payload)
+
+
+def _prepare_agent_execution(input_payload: Dict[str, Any]) -> Tuple[AgentContext, Dict[str, Any]]:
+    if input_payload.get("resume_document_id"):
+        ctx, merged_payload = _prepare_resume(input_payload)
+        set_agent_context(ctx)
+        return ctx, merged_payload
+
+    merged_payload = _normalize_payload_aliases(input_payload)
+
+    # 1. Load Firestore Overrides & Merge
+    _apply_firestore_overrides(merged_payload, *load_versioned_input_overrides())
+    _, collection_name, _, _ = _apply_run_defaults(merged_payload)
+
+    # 2. Validate Collection
+    collection_data = _require_collection(collection_name, get_collection(collection_name))
+
+    # 3. Resolve Micro-Style (local draw from the collection pool if null/DEFAULT, or identifier lookup)
+    resolved_micro_style = resolve_micro_style(
+        _raw_micro_style_input(merged_payload),
+        collection_name=collection_name,
+        **_micro_style_draw_options(merged_payload, collection_data),
+    )
+    _apply_micro_style(merged_payload, resolved_micro_style)
+    _apply_target_audience(merged_payload, collection_data)
+
+    # 4. Generate Document ID, Claim Idempotency Lease & Pre-Create Document
+    document_id = str(uuid.uuid4())
+    existing = _claim_and_pre_create(document_id, merged_payload)
+    if existing:
+        ctx = _build_attached_context(existing, merged_payload)
+        set_agent_context(ctx)
+        return ctx, merged_payload
+
+    # 5. Create & Set Agent Context
+    ctx = _build_agent_context(document_id, merged_payload, collection_data, resolved_micro_style)
     set_agent_context(ctx)
 
     return ctx, merged_payload
+
+
+async def prepare_agent_execution_async(input_payload: Dict[str, Any]) -> Tuple[AgentContext, Dict[str, Any]]:
+    """
+    Event-loop friendly variant of `prepare_agent_execution`.
+
+    Every blocking lookup runs in a worker thread, and independent lookups run concurrently:
+    - Phase 1: Firestore overrides || collection lookup (speculatively for the requested name;
+      re-fetched only if an override changes `collection_name`).
+    - Phase 2: micro-style resolution || (idempotency lease claim -> document pre-creation). The
+      pre-created `input` is then completed with the resolved micro-style; if resolution fails the
+      document is marked failed. Duplicate requests return an attached context without a new document.
+
+    A payload with `resume_document_id` resumes that failed run from its stage checkpoints instead.
+
+    The AgentContext is set on the caller's context so it propagates to the agent run.
+    """
+    with latency_budget():
+        return await _prepare_agent_execution_async(input_payload)
+
+
+async def _prepare_agent_execution_async(input_payload: Dict[str, Any]) -> Tuple[AgentContext, Dict[str, Any]]:
+    if input_payload.get("resume_document_id"):
+        ctx, merged_payload = await asyncio.to_thread(_prepare_resume, input_payload)
+        set_agent_context(ctx)
+        return ctx, merged_payload
+
+    merged_payload = _normalize_payload_aliases(input_payload)
+    requested_collection = merged_payload.get("collection_name") or DEFAULT_COLLECTION_NAME
+
+    # 1. Firestore Overrides || Collection
+    (firestore_overrides, overrides_version), collection_data = await asyncio.gather(
+        asyncio.to_thread(load_versioned_input_overrides),
+        asyncio.to_thread(get_collection, requested_collection),
+    )
+    _apply_firestore_overrides(merged_payload, firestore_overrides, overrides_version)
+    _, collection_name, no_persist, _ = _apply_run_defaults(merged_payload)
+
+    if collection_name != requested_collection:
+        logger.info(f"Collection overridden to '{collection_name}'; re-fetching collection metadata.")
+        collection_data = await asyncio.to_thread(get_collection, collection_name)
+
+    collection_data = _require_collection(collection_name, collection_data)
+    _apply_target_audience(merged_payload, collection_data)
+
+    # 2. Micro-Style || (Idempotency Lease -> Document Pre-Creation)
+    document_id = str(uuid.uuid4())
+    micro_style_result, claim_result = await asyncio.gather(
+        asyncio.to_thread(
+            resolve_micro_style,
+            _raw_micro_style_input(merged_payload),
+            collection_name=collection_name,
+            **_micro_style_draw_options(merged_payload, collection_data),
+        ),
+        asyncio.to_thread(_claim_and_pre_create, document_id, merged_payload),
+        return_exceptions=True,
+    )
+    if isinstance(claim_result, BaseException):
+        raise claim_result
+    if claim_result:
+        ctx = _build_attached_context(claim_result, merged_payload)
+        set_agent_context(ctx)
+        return ctx, merged_payload
+    if isinstance(micro_style_result, BaseException):
+        detail = getattr(micro_style_result, "detail", None) or str(micro_style_result)
+        await asyncio.to_thread(mark_document_failed, document_id, f"Micro-style resolution failed: {detail}", no_persist)
+        raise micro_style_result
+
+    resolved_micro_style = micro_style_result
+    _apply_micro_style(merged_payload, resolved_micro_style)
+    await asyncio.to_thread(update_document, document_id, {"input": merged_payload}, no_persist)
+
+    # 3. Create & Set Agent Context
+    ctx = _build_agent_context(document_id, merged_payload, collection_data, resolved_micro_style)
+    set_agent_context(ctx)
+
+    return ctx, merged_payload
+
+
+def _expand_batch_pages(batch_payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expands a batch payload into one raw payload per page.
+    `collections` entries may be names or per-page payload dicts; each is repeated `count` times.
+    Without `collections`, `count` pages are produced for the single `collection_name`.
+    """
+    if batch_payload.get("resume_document_id"):
+        raise HTTPException(status_code=400, detail="Batches cannot resume a run; use /run or /jobs with 'resume_document_id'.")
+
+    shared = {k: v for k, v in batch_payload.items() if k not in BATCH_CONTROL_FIELDS}
+    try:
+        count = max(1, int(batch_payload.get("count") or 1))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="'count' must be an integer.")
+
+    entries = batch_payload.get("collections")
+    if not entries:
+        entries = [{}]
+    elif not isinstance(entries, list):
+        raise HTTPException(status_code=400, detail="'collections' must be a list of collection names or payloads.")
+
+    pages = []
+    for entry in entries:
+        page = dict(shared)
+        if isinstance(entry, dict):
+            page.update(_normalize_payload_aliases(entry))
+        elif entry:
+            page["collection_name"] = str(entry)
+        for _ in range(count):
+            pages.append(_normalize_payload_aliases(page))
+
+    if len(pages) > BATCH_MAX_PAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch requests {len(pages)} pages; the limit is {BATCH_MAX_PAGES}.",
+        )
+    return pages
+
+
+async def prepare_batch_executions_async(
+    batch_payload: Dict[str, Any],
+) -> List[Tuple[Optional[AgentContext], Dict[str, Any], Optional[str]]]:
+    """
+    Prepares every page of a batch while sharing remote lookups:
+    - Firestore overrides are loaded once for the whole batch.
+    - Collections are resolved together from the collection catalog (refreshed at most once).
+    - Each distinct explicit micro-style is resolved once; pages without one draw distinct
+      styles from their collection's cached micro-style pool, honoring `micro_style_exclude`,
+      `micro_style_seed` and `micro_style_selection` (pages with different options draw separately).
+    - Idempotency leases are claimed and documents pre-created concurrently; pages that duplicate
+      an in-flight or completed run come back with an attached context.
+
+    Returns one (ctx, merged_payload, error) tuple per page. Pages that cannot be prepared
+    carry ctx=None and an error message instead of failing the whole batch.
+    The AgentContext is NOT set here; each page's run task sets its own.
+    """
+    with latency_budget():
+        return await _prepare_batch_executions_async(batch_payload)
+
+
+async def _prepare_batch_executions_async(
+    batch_payload: Dict[str, Any],
+) -> List[Tuple[Optional[AgentContext], Dict[str, Any], Optional[str]]]:
+    pages = _expand_batch_pages(batch_payload)
+
+    firestore_overrides, overrides_version = await asyncio.to_thread(load_versioned_input_overrides)
+    for page in pages:
+        _apply_firestore_overrides(page, firestore_overrides, overrides_version)
+        _apply_run_defaults(page)
+
+    # 1. Collections (once each)
+    collection_names = list(dict.fromkeys(page["collection_name"] for page in pages))
+    collections_by_name = await asyncio.to_thread(get_collections, collection_names)
+
+    # 2. Micro-styles (explicit identifiers once each, random draws once per collection pool & draw options)
+    explicit_styles: Dict[str, Any] = {}
+    random_counts: Dict[Tuple[str, str], int] = {}
+    draw_options: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for page in pages:
+        collection_data = collections_by_name.get(page["collection_name"])
+        if not collection_data:
+            continue
+        raw_style = _raw_micro_style_input(page)
+        if _is_random_micro_style(raw_style):
+            key = _micro_style_draw_key(page, collection_data)
+            random_counts[key] = random_counts.get(key, 0) + 1
+            draw_options.setdefault(key, _micro_style_draw_options(page, collection_data))
+        else:
+            explicit_styles.setdefault(_micro_style_key(raw_style), raw_style)
+
+    async def _resolve(raw_style):
+        try:
+            return await asyncio.to_thread(resolve_micro_style, raw_style)
+        except Exception as e:
+            return e
+
+    async def _draw(key: Tuple[str, str], count: int):
+        name = key[0]
+        options = dict(draw_options[key])
+        options["collection_slug"] = options.get("collection_slug") or name
+        try:
+            return await asyncio.to_thread(select_random_micro_styles, name, count, **options)
+        except Exception as e:
+            return e
+
+    explicit_keys = list(explicit_styles.keys())
+    draw_keys = list(random_counts.keys())
+    resolved = await asyncio.gather(
+        *[_resolve(explicit_styles[key]) for key in explicit_keys],
+        *[_draw(key, random_counts[key]) for key in draw_keys],
+    )
+    styles_by_key = dict(zip(explicit_keys, resolved[: len(explicit_keys)]))
+    draws_by_key = dict(zip(draw_keys, resolved[len(explicit_keys):]))
+
+    # 3. Assemble pages, claim idempotency leases & pre-create documents concurrently
+    prepared: List[Tuple[Optional[AgentContext], Dict[str, Any], Optional[str]]] = []
+    claims = []
+    variants: Dict[Tuple[str, str], int] = {}
+    for page in pages:
+        collection_name = page["collection_name"]
+        collection_data = collections_by_name.get(collection_name)
+        if not collection_data:
+            prepared.append((None, page, f"Collection '{collection_name}' does not exist or is inactive."))
+            continue
+
+        raw_style = _raw_micro_style_input(page)
+        if _is_random_micro_style(raw_style):
+            draws = draws_by_key[_micro_style_draw_key(page, collection_data)]
+            style = draws if isinstance(draws, BaseException) else draws.pop(0)
+        else:
+            style = styles_by_key[_micro_style_key(raw_style)]
+        if isinstance(style, BaseException):
+            detail = getattr(style, "detail", None) or str(style)
+            prepared.append((None, page, f"Micro-style resolution failed: {detail}"))
+            continue
+
+        _apply_micro_style(page, style)
+        _apply_target_audience(page, collection_data)
+
+        # Extra pages of the same collection & keyword get their own idempotency variant.
+        variant_key = (collection_name.lower(), str(page.get("target_keyword") or "").lower())
+        variant = variants.get(variant_key, 0)
+        variants[variant_key] = variant + 1
+
+        document_id = str(uuid.uuid4())
+        claims.append((len(prepared), asyncio.to_thread(_claim_and_pre_create, document_id, page, variant)))
+        prepared.append((_build_agent_context(document_id, page, collection_data, style), page, None))
+
+    claim_results = await asyncio.gather(*[claim for _, claim in claims], return_exceptions=True)
+    for (index, _), existing in zip(claims, claim_results):
+        ctx, page, _ = prepared[index]
+        if isinstance(existing, BaseException):
+            # Mark the page failed so a lease already claimed for it releases its key.
+            detail = getattr(existing, "detail", None) or str(existing)
+            logger.error(f"❌ Could not prepare batch page '{ctx.document_id}': {detail}")
+            await asyncio.to_thread(mark_document_failed, ctx.document_id, f"Run preparation failed: {detail}", page["no_persist"])
+            prepared[index] = (None, page, f"Run preparation failed: {detail}")
+        elif existing:
+            prepared[index] = (_build_attached_context(existing, page), page, None)
+    return prepared
@@ -2,7 +2,7 @@ import json
 import asyncio
 
 from google.adk.agents import LlmAgent, SequentialAgent
-from google.adk.models import Gemini
+from ..lib.gated_gemini import GatedGemini
 from google.adk.runners import InMemoryRunner
 
 from .instructions import get_stylist_instructions
@@ -11,7 +11,7 @@ from ..app_configs import configs
 stylist = LlmAgent(
     name="Stylist",
     instruction=get_stylist_instructions,
-    model=Gemini(model=configs.llm_model),  
+    model=GatedGemini(model=configs.llm_model),  
 )
 
 
@@ -1,6 +1,8 @@
 import logging
-from typing import Any
+from typing import Any, Optional
 from color_it_daily_agent.context import get_agent_context, DEFAULT_TARGET_AUDIENCE
+from color_it_daily_agent.lib.instruction_cache import memoized_instruction_builder
+from color_it_daily_agent.lib.context_cache import compose_instruction
 from color_it_daily_agent.creative_director.tools.history import get_recent_styles
 
 logger = logging.getLogger(__name__)
@@ -123,6 +125,26 @@ def get_stylist_instructions(
     if not target_audience:
         target_audience = DEFAULT_TARGET_AUDIENCE
 
+    micro_style_name = kwargs.get("micro_style_name")
+    micro_style_description = kwargs.get("micro_style_description")
+    if not micro_style_name and ctx:
+        micro_style_name = ctx.micro_style_name
+    if not micro_style_description and ctx:
+        micro_style_description = ctx.micro_style_description
+
+    return _build_stylist_instructions(
+        collection_context, target_keyword, target_audience, micro_style_name, micro_style_description
+    )
+
+
+@memoized_instruction_builder("stylist")
+def _build_stylist_instructions(
+    collection_context: Optional[str],
+    target_keyword: Optional[str],
+    target_audience: str,
+    micro_style_name: Optional[str],
+    micro_style_description: Optional[str],
+) -> str:
     audience_block = AUDIENCE_PROMPT_GUIDELINES.get(
         target_audience, AUDIENCE_PROMPT_GUIDELINES[DEFAULT_TARGET_AUDIENCE]
     )
@@ -138,13 +160,6 @@ def get_stylist_instructions(
             f"Ensure visual prompt elements reflect subject \"{target_keyword}\". For `visual_tags`, maintain clean, individual 1-2 word tags suitable for UI chips (e.g. ['dinosaur', 'beach']). NEVER include full multi-word query phrases like '{target_keyword}' as items in `visual_tags`."
         )
 
-    micro_style_name = kwargs.get("micro_style_name")
-    micro_style_description = kwargs.get("micro_style_description")
-    if not micro_style_name and ctx:
-        micro_style_name = ctx.micro_style_name
-    if not micro_style_description and ctx:
-        micro_style_description = ctx.micro_style_description
-
     micro_style_block = ""
     if micro_style_name and micro_style_description:
         micro_style_block = (
@@ -157,13 +172,14 @@ def get_stylist_instructions(
             f"Output `\"micro_style\": \"{micro_style_name}\"` in your response JSON."
         )
 
-    instructions = (
+    # Keyword block last: everything before it is served from the context cache.
+    instructions = compose_instruction(
         INSTRUCTIONS_TEMPLATE.format(
             audience_block=audience_block,
             collection_description_block=desc_block,
         )
-        + keyword_block
-        + micro_style_block
+        + micro_style_block,
+        keyword_block,
     )
 
     logger.info(
@@ -173,6 +189,8 @@ def get_stylist_instructions(
 
 
 
-INSTRUCTIONS_V1 = get_stylist_instructions()
-
-
+def __getattr__(name: str):
+    # Backwards-compatible alias, computed on access rather than at import.
+    if name == "INSTRUCTIONS_V1":
+        return get_stylist_instructions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,233 @@
+"""
+==============================================================================
+Color It Daily Agent - Offline Model Context Cache Check
+==============================================================================
+
+Exercises the static instruction cache (`lib/context_cache.py`) against its
+local backend, without model access, and checks:
+- Hit/miss: two requests with the same static instructions create one cache
+  (one miss, one hit), and both are rewritten to `cached_content` with
+  `system_instruction`, `tools` and `tool_config` cleared and the dynamic tail
+  moved into the first user turn.
+- Concurrency: overlapping requests for a new cache create it only once.
+- Expiry: a cache inside its refresh margin is recreated.
+- Invalidation: a GatedGemini request failing because its cache is missing forgets
+  that cache; one failing on a rate limit keeps it for the next request.
+- Deletion: a cache pruned from the map long before its expiry is deleted server-side.
+- Backoff: a failed create sends the same static part inline until the retry
+  delay has passed, without trying again.
+- Minimum size: static parts below CONTEXT_CACHE_MIN_CHARS go out inline.
+
+Nothing is sent to Gemini.
+
+Usage:
+------
+   python context-cache-check.py
+==============================================================================
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+STATIC_PART = "You are the Critic of a coloring page studio.\n" + "Check every line art rule carefully.\n" * 150
+TAIL = "\n\n### TODAY\nKeyword: lighthouse"
+
+
+def build_request(static_part: str = STATIC_PART, tail: str = TAIL):
+    from google.adk.models import LlmRequest
+    from google.genai import types
+
+    from color_it_daily_agent.lib.context_cache import compose_instruction
+
+    return LlmRequest(
+        model="gemini-cache-check",
+        contents=[types.Content(role="user", parts=[types.Part(text="Start the run.")])],
+        config=types.GenerateContentConfig(
+            system_instruction=compose_instruction(static_part, tail),
+            tools=[types.Tool(function_declarations=[
+                types.FunctionDeclaration(name="inspect_image_visually", description="Inspects the page image."),
+            ])],
+        ),
+    )
+
+
+def new_cache(rewrites_request: bool = True):
+    from color_it_daily_agent.lib.context_cache import LocalContextCacheBackend, StaticContextCache
+
+    return StaticContextCache(LocalContextCacheBackend(rewrites_request=rewrites_request), ttl_seconds=600)
+
+
+async def check_hit_and_rewrite(problems: list) -> None:
+    cache = new_cache()
+    first, second = build_request(), build_request()
+    entry = await cache.attach(first, llm=None)
+    again = await cache.attach(second, llm=None)
+
+    if sum(cache.backend.created.values()) != 1:
+        problems.append(f"hit/miss: expected 1 create, got {cache.backend.created}")
+    if (cache.misses, cache.hits) != (1, 1):
+        problems.append(f"hit/miss: expected 1 miss and 1 hit, got {cache.misses} and {cache.hits}")
+    if entry is None or again is None or entry.name != again.name:
+        problems.append("hit/miss: both requests should share one cache entry")
+    for label, request in (("first", first), ("second", second)):
+        config = request.config
+        if entry is not None and config.cached_content != entry.name:
+            problems.append(f"rewrite ({label}): cached_content is {config.cached_content!r}")
+        if config.system_instruction is not None or config.tools is not None or config.tool_config is not None:
+            problems.append(f"rewrite ({label}): system_instruction/tools/tool_config were not cleared")
+        parts = request.contents[0].parts
+        if request.contents[0].role != "user" or parts[0].text != TAIL.strip() or parts[1].text != "Start the run.":
+            problems.append(f"rewrite ({label}): dynamic tail is not the start of the first user turn")
+
+
+async def check_concurrent_create(problems: list) -> None:
+    cache = new_cache()
+    await asyncio.gather(*[cache.attach(build_request(), llm=None) for _ in range(10)])
+    if sum(cache.backend.created.values()) != 1 or cache.misses != 1 or cache.hits != 9:
+        problems.append(
+            f"concurrency: expected 1 create, 1 miss, 9 hits; got {cache.backend.created}, {cache.misses}, {cache.hits}"
+        )
+
+
+async def check_expiry(problems: list) -> None:
+    cache = new_cache()
+    entry = await cache.attach(build_request(), llm=None)
+    entry.expires_at = time.time()
+    renewed = await cache.attach(build_request(), llm=None)
+    if cache.expired != 1 or sum(cache.backend.created.values()) != 2:
+        problems.append(f"expiry: expected 1 expired and 2 creates, got {cache.expired} and {cache.backend.created}")
+    if renewed is None or renewed.name == entry.name:
+        problems.append("expiry: the expired cache was reused")
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+async def fail_gated_request(error: Exception) -> bool:
+    """Sends one GatedGemini request whose model call raises `error`. Returns whether it raised."""
+    from google.adk.models import Gemini
+
+    from color_it_daily_agent.lib import gated_gemini
+
+    async def failing_generate(self, llm_request, stream=False):
+        raise error
+        yield
+
+    original = Gemini.generate_content_async
+    Gemini.generate_content_async = failing_generate
+    try:
+        model = gated_gemini.GatedGemini(model="gemini-cache-check")
+        async for _ in model.generate_content_async(build_request()):
+            pass
+        return False
+    except type(error):
+        return True
+    finally:
+        Gemini.generate_content_async = original
+
+
+async def check_invalidate_on_error(problems: list) -> None:
+    from color_it_daily_agent.lib.context_cache import LocalContextCacheBackend, static_context_cache
+
+    static_context_cache.backend = LocalContextCacheBackend(rewrites_request=True)
+    static_context_cache.invalidate()
+
+    if not await fail_gated_request(RateLimited("429 RESOURCE_EXHAUSTED: quota exceeded for cached content")):
+        problems.append("invalidate: the rate-limited request did not raise")
+    if static_context_cache.stats()["entries"] != 1:
+        problems.append("invalidate: a rate-limited request dropped the cache it used")
+
+    if not await fail_gated_request(RuntimeError("cached content not found")):
+        problems.append("invalidate: the failing request did not raise")
+    if static_context_cache.stats()["entries"] != 0:
+        problems.append("invalidate: the cache used by the failed request is still attached to new requests")
+    await static_context_cache.attach(build_request(), llm=None)
+    if sum(static_context_cache.backend.created.values()) != 2:
+        problems.append(f"invalidate: expected a new create after the error, got {static_context_cache.backend.created}")
+
+
+async def check_delete_pruned(problems: list) -> None:
+    from color_it_daily_agent.lib import context_cache
+
+    cache = new_cache()
+    saved = context_cache.CONTEXT_CACHE_MAX_ENTRIES, context_cache.CONTEXT_CACHE_DELETE_GRACE_SECONDS
+    context_cache.CONTEXT_CACHE_MAX_ENTRIES, context_cache.CONTEXT_CACHE_DELETE_GRACE_SECONDS = 1, 0
+    try:
+        first = await cache.attach(build_request(), llm=None)
+        await cache.attach(build_request(static_part=STATIC_PART + "Also check the border.\n"), llm=None)
+        for _ in range(5):
+            await asyncio.sleep(0)
+    finally:
+        context_cache.CONTEXT_CACHE_MAX_ENTRIES, context_cache.CONTEXT_CACHE_DELETE_GRACE_SECONDS = saved
+    if first is None or cache.backend.deleted != [first.name] or cache.deleted != 1:
+        problems.append(f"delete: expected the pruned cache to be deleted, got {cache.backend.deleted}")
+
+
+async def check_backoff(problems: list) -> None:
+    cache = new_cache()
+    calls = []
+
+    async def failing_create(*args, **kwargs):
+        calls.append(1)
+        raise RuntimeError("minimum token count not reached")
+
+    cache.backend.create = failing_create
+    requests = [build_request(), build_request()]
+    results = [await cache.attach(request, llm=None) for request in requests]
+    if results != [None, None] or len(calls) != 1 or cache.errors != 1 or cache.inline != 1:
+        problems.append(
+            f"backoff: expected 1 failed create then 1 inline request, got {len(calls)} create(s), "
+            f"{cache.errors} error(s), {cache.inline} inline"
+        )
+    if any(request.config.cached_content or request.config.system_instruction is None for request in requests):
+        problems.append("backoff: requests without a cache were rewritten")
+
+
+async def check_min_chars(problems: list) -> None:
+    cache = new_cache()
+    request = build_request(static_part="Short static part.\n")
+    if await cache.attach(request, llm=None) is not None or cache.backend.created or cache.inline != 1:
+        problems.append("min size: a short static part was cached")
+
+
+CHECKS = (
+    ("hit, miss and request rewrite", check_hit_and_rewrite),
+    ("concurrent create", check_concurrent_create),
+    ("expiry", check_expiry),
+    ("invalidate on error", check_invalidate_on_error),
+    ("delete pruned cache", check_delete_pruned),
+    ("failed create backoff", check_backoff),
+    ("minimum size", check_min_chars),
+)
+
+
+async def run_checks() -> list:
+    problems = []
+    for label, check in CHECKS:
+        before = len(problems)
+        await check(problems)
+        print(f"  {'✅' if len(problems) == before else '❌'} {label}")
+    return problems
+
+
+def main() -> int:
+    os.environ.setdefault("LLM_MODEL", "gemini-cache-check")
+    print("🧊 Checking the model context cache against its local backend")
+    problems = asyncio.run(run_checks())
+    for problem in problems:
+        print(f"  ❌ {problem}")
+    if problems:
+        print(f"❌ {len(problems)} context cache problem(s).")
+        return 1
+    print("✅ Context cache hit, miss, expiry, invalidation and deletion behave as expected.")
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(main())
@@ -43,6 +43,8 @@ gcloud run deploy color-it-daily-agent \
 	--set-env-vars AGENT_VERSION="$(git rev-parse HEAD)" \
 	--set-env-vars COLORITDAILY_API_KEY="${COLORITDAILY_API_KEY}" \
 	--set-env-vars WEBSITE_BASE_URL="${WEBSITE_BASE_URL}" \
+	--set-env-vars SERVE_WEB_INTERFACE=false \
+	--no-cpu-throttling \
 	--min-instances 0 \
 	--max-instances 2 \
 	--platform managed \
@@ -0,0 +1,90 @@
+"""
+==============================================================================
+Color It Daily Agent - Offline Catalog Snapshot Export
+==============================================================================
+
+Exports the full collection and micro-style catalogs from the Public API into
+one versioned JSON snapshot:
+- `collections`: every item of GET /collections.
+- `micro_styles`: every micro-style of GET /admin/micro-styles.
+- `collection_micro_styles`: each collection's pool (GET /admin/collections/:slug/micro-styles).
+- `catalog_version`: a content hash, so an unchanged catalog always exports the same version.
+
+Point the service (or CI) at the file with CATALOG_SNAPSHOT_PATH and every
+collection and micro-style lookup is answered from it without calling the API.
+Set CATALOG_SNAPSHOT_VERSION as well to refuse any other catalog version.
+
+Usage Examples:
+---------------
+1. Export to the default file:
+   python export-catalog.py
+
+2. Export, then run locally against the snapshot (no API_BASE_URL needed):
+   python export-catalog.py --output catalog-snapshot.json
+   CATALOG_SNAPSHOT_PATH=catalog-snapshot.json uvicorn main:app --port 8080
+
+3. Print the version and counts of an existing snapshot:
+   python export-catalog.py --inspect catalog-snapshot.json
+
+Arguments:
+----------
+  --output          (Optional) Snapshot file to write. Default 'catalog-snapshot.json'.
+  --inspect         (Optional) Print the summary of this snapshot file instead of exporting.
+==============================================================================
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+
+def export_snapshot(output: str) -> int:
+    from color_it_daily_agent.lib.catalog_snapshot import build_catalog_snapshot
+
+    try:
+        data = build_catalog_snapshot()
+    except Exception as e:
+        print(f"❌ Export failed: {getattr(e, 'detail', None) or e}")
+        return 1
+
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp_path, output)
+
+    print(f"✅ Wrote catalog snapshot '{output}' (version {data['catalog_version']}):")
+    print(f"   {len(data['collections'])} collection(s), {len(data['micro_styles'])} micro-style(s), "
+          f"{len(data['collection_micro_styles'])} collection pool(s)")
+    return 0
+
+
+def inspect_snapshot(path: str) -> int:
+    from color_it_daily_agent.lib import catalog_snapshot
+
+    catalog_snapshot.CATALOG_SNAPSHOT_PATH = path
+    catalog_snapshot.CATALOG_SNAPSHOT_VERSION = ""
+    try:
+        snapshot = catalog_snapshot.get_catalog_snapshot()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print(json.dumps(snapshot.summary(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    # Exporting must read the live API, never a snapshot configured in the environment.
+    os.environ.pop("CATALOG_SNAPSHOT_PATH", None)
+
+    parser = argparse.ArgumentParser(description="Export the collection and micro-style catalogs to a JSON snapshot")
+    parser.add_argument("--output", type=str, default="catalog-snapshot.json", help="Snapshot file to write")
+    parser.add_argument("--inspect", type=str, default=None, help="Print the summary of this snapshot file")
+    args = parser.parse_args()
+
+    if args.inspect:
+        sys.exit(inspect_snapshot(args.inspect))
+    sys.exit(export_snapshot(args.output))
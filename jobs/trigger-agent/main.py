@@ -17,6 +17,10 @@ logger = logging.getLogger(__name__)
 AGENT_ENDPOINT = os.environ.get("AGENT_ENDPOINT")
 APP_NAME = os.environ.get("APP_NAME", "coloritdaily_agent")
 USER_ID = os.environ.get("USER_ID", "daily-job")
+USE_JOBS_API = os.environ.get("USE_JOBS_API", "").lower() in ("true", "1", "yes")
+BATCH_WAIT = os.environ.get("BATCH_WAIT", "").lower() in ("true", "1", "yes")
+BATCH_SUBMIT_TIMEOUT_SECONDS = float(os.environ.get("BATCH_SUBMIT_TIMEOUT_SECONDS", "60"))
+BATCH_WAIT_TIMEOUT_SECONDS = float(os.environ.get("BATCH_WAIT_TIMEOUT_SECONDS", "3300"))
 
 def get_id_token(audience):
     """
@@ -63,6 +67,12 @@ def trigger_agent(request):
     else:
         no_persist = os.environ.get("NO_PERSIST", "").lower() in ("true", "1", "yes")
 
+    use_jobs_api = bool(req_data.get("async", USE_JOBS_API))
+    force = bool(req_data.get("force", False))
+    collections = req_data.get("collections")
+    # Batches are queued to the agent's job pool unless the caller opts in to waiting for them.
+    batch_wait = bool(req_data.get("wait", BATCH_WAIT))
+
     try:
         # 1. Authenticate
         token = get_id_token(AGENT_ENDPOINT)
@@ -71,7 +81,71 @@ def trigger_agent(request):
             "Content-Type": "application/json"
         }
 
-        # 2. Create Session
+        # 2. Batch API: one request for several collections (or `count` pages), shared lookups
+        if collections or req_data.get("count"):
+            current_date_str = datetime.now().strftime("%Y-%m-%d")
+            batch_request = {"current_date": current_date_str, "wait": batch_wait}
+            if collections:
+                batch_request["collections"] = collections
+            elif collection_name:
+                batch_request["collection_name"] = collection_name
+            for key in ("count", "max_parallel"):
+                if req_data.get(key):
+                    batch_request[key] = req_data[key]
+            if target_keyword:
+                batch_request["target_keyword"] = target_keyword
+            if no_persist:
+                batch_request["no_persist"] = True
+            if force:
+                batch_request["force"] = True
+
+            batch_url = f"{AGENT_ENDPOINT}/batches"
+            logger.info(f"Submitting batch at {batch_url}: {json.dumps(batch_request)}")
+            timeout = BATCH_WAIT_TIMEOUT_SECONDS if batch_wait else BATCH_SUBMIT_TIMEOUT_SECONDS
+            resp_batch = requests.post(batch_url, headers=headers, json=batch_request, timeout=timeout)
+            resp_batch.raise_for_status()
+            batch = resp_batch.json()
+            if batch_wait:
+                logger.info(f"Batch finished: {batch.get('passed')} passed, {batch.get('failed')} failed")
+            else:
+                logger.info(f"Batch accepted: {batch.get('batch_id')} ({len(batch.get('pages') or [])} page(s) queued)")
+
+            return {
+                "status": "success" if batch_wait else "submitted",
+                "date": current_date_str,
+                "batch_id": batch.get("batch_id"),
+                "pages": batch.get("pages"),
+                "parameters_used": batch_request
+            }, 200 if batch_wait else 202
+
+        # 3. Async Job API: submit and return immediately with the pre-created document_id
+        if use_jobs_api:
+            current_date_str = datetime.now().strftime("%Y-%m-%d")
+            user_request = {"current_date": current_date_str}
+            if collection_name:
+                user_request["collection_name"] = collection_name
+            if target_keyword:
+                user_request["target_keyword"] = target_keyword
+            if no_persist:
+                user_request["no_persist"] = True
+            if force:
+                user_request["force"] = True
+
+            jobs_url = f"{AGENT_ENDPOINT}/jobs"
+            logger.info(f"Submitting agent job at {jobs_url}: {json.dumps(user_request)}")
+            resp_job = requests.post(jobs_url, headers=headers, json=user_request, timeout=60)
+            resp_job.raise_for_status()
+            job = resp_job.json()
+            logger.info(f"Agent job accepted: {job.get('document_id')}")
+
+            return {
+                "status": "submitted",
+                "date": current_date_str,
+                "document_id": job.get("document_id"),
+                "parameters_used": user_request
+            }, 202
+
+        # 4. Create Session
         session_id = str(uuid.uuid4())
         session_url = f"{AGENT_ENDPOINT}/apps/{APP_NAME}/users/{USER_ID}/sessions/{session_id}"
         
@@ -80,7 +154,7 @@ def trigger_agent(request):
         resp_session.raise_for_status()
         logger.info(f"Session created: {session_id}")
 
-        # 3. Prepare Payload
+        # 5. Prepare Payload
         now = datetime.now()
         current_date_str = now.strftime("%Y-%m-%d")
         
@@ -95,6 +169,8 @@ def trigger_agent(request):
             user_request["target_keyword"] = target_keyword
         if no_persist:
             user_request["no_persist"] = True
+        if force:
+            user_request["force"] = True
 
         payload = {
             "app_name": APP_NAME,
@@ -107,7 +183,7 @@ def trigger_agent(request):
             "streaming": False,
         }
 
-        # 4. Run Agent
+        # 6. Run Agent
         run_url = f"{AGENT_ENDPOINT}/run"
         logger.info(f"Triggering agent at {run_url} for date {current_date_str}")
         logger.info(f"Payload: {json.dumps(user_request)}")
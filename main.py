@@ -1,33 +1,89 @@
 import os
 import json
+import asyncio
 import logging
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+from fastapi import FastAPI, Request, HTTPException, Body
+from fastapi.responses import JSONResponse, StreamingResponse
 from google.adk.cli.fast_api import get_fast_api_app
 
-from color_it_daily_agent.pipeline import prepare_agent_execution
-from color_it_daily_agent.lib.persistence import mark_document_failed, get_document_status
+from color_it_daily_agent.pipeline import prepare_agent_execution_async
+from color_it_daily_agent.context import bind_run_context, release_run_context
+from color_it_daily_agent.lib.persistence import (
+    mark_document_failed,
+    get_document,
+    get_document_status,
+    LOCAL_TEMP_DIR,
+)
+from color_it_daily_agent.jobs import job_manager
+from color_it_daily_agent.batch import run_batch
+from color_it_daily_agent.lib.admission import check_admission_capacity, get_admission_metrics
+from color_it_daily_agent.lib.run_events import (
+    run_event_bus,
+    publish_run_event,
+    format_sse,
+    EVENT_RUN_STARTED,
+    EVENT_RUN_FINISHED,
+)
+from color_it_daily_agent.lib.warmup import start_warmup, get_warmup_status
+from color_it_daily_agent.lib.collections import invalidate_collection_cache, get_collection_cache_stats
+from color_it_daily_agent.lib.catalog_snapshot import get_catalog_snapshot, snapshot_mode_enabled
+from color_it_daily_agent.lib.firestore_config import input_override_store
+from color_it_daily_agent.lib.instruction_cache import get_instruction_cache_stats
+from color_it_daily_agent.lib.context_cache import get_context_cache_stats
+from color_it_daily_agent.lib.http_client import get_http_stats, get_circuit_breaker_stats, aclose_http_clients
+from color_it_daily_agent.lib.trace_writer import trace_writer, get_trace_writer_stats
+from color_it_daily_agent.lib.trace_sink import read_traces
+from color_it_daily_agent.lib.firestore_traces import read_firestore_traces, shutdown_trace_buffers
+from color_it_daily_agent.lib.micro_styles import (
+    invalidate_micro_style_registry,
+    invalidate_micro_style_pools,
+    get_micro_style_registry_stats,
+)
 
 logger = logging.getLogger("color_it_daily_agent")
 
 AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
 SESSION_SERVICE_URI = "sqlite+aiosqlite:///./sessions.db"
 ALLOWED_ORIGINS = ["*"]
-SERVE_WEB_INTERFACE = True
+# The ADK dev web UI adds start-up work; Cloud Run deployments turn it off.
+SERVE_WEB_INTERFACE = os.environ.get("SERVE_WEB_INTERFACE", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs in the background: the port binds immediately and requests are served meanwhile.
+    start_warmup()
+    yield
+    # Jobs still queued or running are cancelled and their documents marked failed.
+    await job_manager.shutdown()
+    input_override_store.stop()
+    # Traces still queued for the writer thread are written before the process exits,
+    # then every Firestore trace buffer (finished or not) is drained.
+    await asyncio.to_thread(trace_writer.flush)
+    await asyncio.to_thread(shutdown_trace_buffers)
+    await aclose_http_clients()
 
 app: FastAPI = get_fast_api_app(
     agents_dir=AGENT_DIR,
     session_service_uri=SESSION_SERVICE_URI,
     allow_origins=ALLOWED_ORIGINS,
     web=SERVE_WEB_INTERFACE,
-    extra_plugins=["color_it_daily_agent.lib.trace_plugin.PromptTracePlugin"],
+    lifespan=lifespan,
+    extra_plugins=[
+        "color_it_daily_agent.lib.context_plugin.AgentContextPlugin",
+        "color_it_daily_agent.lib.trace_plugin.PromptTracePlugin",
+        "color_it_daily_agent.lib.checkpoint_plugin.StageCheckpointPlugin",
+    ],
 )
 
 
 @app.middleware("http")
 async def process_agent_input_middleware(request: Request, call_next):
     ctx = None
+    session_id = None
     if request.method == "POST" and request.url.path.endswith("/run"):
         body_bytes = await request.body()
         if body_bytes:
@@ -47,9 +103,23 @@ async def process_agent_input_middleware(request: Request, call_next):
                 else:
                     input_payload = body_json if isinstance(body_json, dict) else {}
 
-                ctx, merged_payload = prepare_agent_execution(input_payload)
+                check_admission_capacity()
+                ctx, merged_payload = await prepare_agent_execution_async(input_payload)
+                if ctx.attached:
+                    return JSONResponse(
+                        status_code=200,
+                        content={
+                            "detail": "Duplicate run request attached to the existing run. Pass 'force': true to rerun.",
+                            "document_id": ctx.document_id,
+                            "status": ctx.attached_status,
+                            "attached": True,
+                        },
+                    )
 
                 if is_adk:
+                    session_id = body_json.get("session_id")
+                    if session_id:
+                        bind_run_context(session_id, ctx)
                     body_json["new_message"]["parts"][0]["text"] = json.dumps(merged_payload)
                     new_body_bytes = json.dumps(body_json).encode("utf-8")
                 else:
@@ -67,23 +137,29 @@ async def process_agent_input_middleware(request: Request, call_next):
             except Exception as ex:
                 logger.error(f"Error processing agent input in middleware: {ex}")
 
+    if ctx:
+        publish_run_event(ctx.document_id, EVENT_RUN_STARTED, collection_name=ctx.collection_name)
+
     try:
         response = await call_next(request)
         if ctx:
-            doc_status = get_document_status(ctx.document_id, ctx.no_persist)
+            doc_status = await asyncio.to_thread(get_document_status, ctx.document_id, ctx.no_persist)
             if response.status_code >= 400:
-                mark_document_failed(
+                await asyncio.to_thread(
+                    mark_document_failed,
                     ctx.document_id,
                     f"Execution failed with HTTP status {response.status_code}",
                     ctx.no_persist,
                 )
+                publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status="failed")
             elif doc_status != "PASS":
                 err_detail = (
                     f"Agent execution completed with status '{doc_status}' "
                     f"without publishing an approved document."
                 )
                 logger.error(f"❌ {err_detail} (doc_id={ctx.document_id})")
-                mark_document_failed(ctx.document_id, err_detail, ctx.no_persist)
+                await asyncio.to_thread(mark_document_failed, ctx.document_id, err_detail, ctx.no_persist)
+                publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status="failed", error_message=err_detail)
                 return JSONResponse(
                     status_code=500,
                     content={
@@ -92,11 +168,182 @@ async def process_agent_input_middleware(request: Request, call_next):
                         "status": "failed",
                     },
                 )
+            else:
+                publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status=doc_status)
         return response
     except Exception as exc:
         if ctx:
-            mark_document_failed(ctx.document_id, str(exc), ctx.no_persist)
+            await asyncio.to_thread(mark_document_failed, ctx.document_id, str(exc), ctx.no_persist)
+            publish_run_event(ctx.document_id, EVENT_RUN_FINISHED, status="failed", error_message=str(exc))
         raise exc
+    finally:
+        release_run_context(session_id)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(input_payload: Dict[str, Any] = Body(default_factory=dict)):
+    """
+    Submits an agent run to the in-process worker pool and returns immediately
+    with the pre-created document_id. Poll `GET /jobs/{document_id}` for status.
+    """
+    job = await job_manager.submit(input_payload)
+    return {
+        "document_id": job.document_id,
+        "job_state": job.state,
+        "attached": job.ctx.attached,
+        "status_url": f"/jobs/{job.document_id}",
+    }
+
+
+@app.get("/jobs/{document_id}")
+async def get_job(document_id: str):
+    """Returns the job state and the document's persisted `status` field."""
+    return await job_manager.get_status(document_id)
+
+
+@app.post("/batches")
+async def submit_batch(batch_payload: Dict[str, Any] = Body(default_factory=dict)):
+    """
+    Produces pages for several collections (`collections`) or several pages for one
+    collection (`count`) with shared lookups and a `max_parallel` concurrency cap.
+    """
+    return await run_batch(batch_payload)
+
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """Queue-depth and wait-time gauges for the media model, vision model and LLM gates."""
+    return get_admission_metrics()
+
+
+@app.get("/metrics/cache")
+async def cache_metrics():
+    """Age of each cached lookup and the refreshes in flight."""
+    return {
+        "collections": get_collection_cache_stats(),
+        "micro_styles": get_micro_style_registry_stats(),
+        "input_overrides": input_override_store.status(),
+        "catalog_snapshot": get_catalog_snapshot().summary() if snapshot_mode_enabled() else None,
+        "instructions": get_instruction_cache_stats(),
+        "model_context": get_context_cache_stats(),
+    }
+
+
+@app.get("/metrics/http")
+async def http_metrics():
+    """Per-endpoint outbound request counts and latency (Public API, Buffer, webhooks) and circuit breaker state."""
+    return {"endpoints": get_http_stats(), "circuit_breakers": get_circuit_breaker_stats()}
+
+
+@app.get("/metrics/traces")
+async def trace_metrics():
+    """Trace writer queue depth, written/dropped counts and the configured full-queue policy."""
+    return get_trace_writer_stats()
+
+
+@app.post("/cache/collections/invalidate")
+async def invalidate_collections(payload: Dict[str, Any] = Body(default_factory=dict)):
+    """Drops cached collections (`collection_name`, or all of them) so the next run refetches them."""
+    removed = invalidate_collection_cache(payload.get("collection_name"))
+    return {"invalidated": removed}
+
+
+@app.post("/cache/micro-styles/invalidate")
+async def invalidate_micro_styles():
+    """Drops the micro-style registry and per-collection pools so the next lookup refetches them."""
+    return {"invalidated": invalidate_micro_style_registry(), "pools": invalidate_micro_style_pools()}
+
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 200 once the start-up warm-up has finished, 503 while it is running."""
+    status = get_warmup_status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+async def _load_run_document(document_id: str):
+    """Returns the run's document from Firestore, or from its local document.json for no_persist runs."""
+    doc = await asyncio.to_thread(get_document, document_id, False)
+    if doc is None and os.path.exists(os.path.join(LOCAL_TEMP_DIR, document_id, "document.json")):
+        doc = await asyncio.to_thread(get_document, document_id, True)
+    return doc
+
+
+def _run_finished_snapshot(document_id: str, doc: Dict[str, Any], seq: int) -> Dict[str, Any]:
+    return {
+        "seq": seq,
+        "event": EVENT_RUN_FINISHED,
+        "document_id": document_id,
+        "status": doc.get("status", "unknown"),
+    }
+
+
+@app.get("/runs/{document_id}/events")
+async def stream_run_events(document_id: str, request: Request):
+    """
+    Server-sent events stream of a run's stage events (concept chosen, prompt written,
+    raw/optimized image ready, critic verdict per iteration, published, run finished).
+    Past events are replayed first; reconnecting clients resume after `Last-Event-ID`.
+
+    Stage events only reach subscribers on the instance executing the run. Elsewhere the
+    stream polls the document on every keep-alive and ends with `run_finished` once the
+    run is no longer `running`.
+    """
+    last_seq = 0
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        last_seq = int(last_event_id)
+
+    if not run_event_bus.history(document_id):
+        # Not seen by this process: only stream runs that are still pending, else report the outcome.
+        doc = await _load_run_document(document_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail=f"Run '{document_id}' not found.")
+        if doc.get("status") != "running":
+            snapshot = _run_finished_snapshot(document_id, doc, 1)
+            return StreamingResponse(iter([format_sse(snapshot)]), media_type="text/event-stream")
+
+    async def event_stream():
+        seq = last_seq
+        async for entry in run_event_bus.subscribe(document_id, last_seq=last_seq):
+            if await request.is_disconnected():
+                break
+            if entry is None and not run_event_bus.history(document_id):
+                # The run executes on another instance: its events never reach this bus.
+                doc = await _load_run_document(document_id)
+                if doc is not None and doc.get("status") != "running":
+                    yield format_sse(_run_finished_snapshot(document_id, doc, seq + 1))
+                    break
+            elif entry is not None:
+                seq = entry["seq"]
+            yield format_sse(entry)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/runs/{document_id}/traces")
+async def get_run_traces(document_id: str):
+    """
+    A run's trace entries in recording order with its `trace_summary`: read from the page's
+    `traces` subcollection, or from the local `prompt_trace.jsonl` of no_persist runs.
+    """
+    doc = await asyncio.to_thread(get_document, document_id, False)
+    if doc is not None:
+        traces = await asyncio.to_thread(read_firestore_traces, document_id)
+    elif os.path.exists(os.path.join(LOCAL_TEMP_DIR, document_id, "document.json")):
+        doc = await asyncio.to_thread(get_document, document_id, True) or {}
+        traces = await asyncio.to_thread(read_traces, document_id)
+    else:
+        raise HTTPException(status_code=404, detail=f"Run '{document_id}' not found.")
+    return {
+        "document_id": document_id,
+        "trace_summary": doc.get("trace_summary"),
+        "traces": traces,
+    }
 
 
 if __name__ == "__main__":
@@ -1,12 +1,13 @@
 import os
 import argparse
-import requests
 import psycopg2
 from google.cloud import storage
 from dotenv import load_dotenv
 import logging
 from urllib.parse import urlparse
 
+from color_it_daily_agent.lib.http_client import http_request, get_http_stats
+
 # Load environment variables
 load_dotenv("jobs/daily-push/.env")
 
@@ -35,7 +36,7 @@ def upload_to_gcs(bucket, source_url, destination_blob_name, dry_run=False):
         return f"{GCS_BASE_URL}/{destination_blob_name}"
 
     try:
-        response = requests.get(source_url, stream=True)
+        response = http_request("GET", source_url, timeout=60, endpoint="GET media source")
         response.raise_for_status()
         
         blob = bucket.blob(destination_blob_name)
@@ -123,6 +124,8 @@ def migrate(dry_run=False, limit=None):
                 logger.warning(f"No updates for page {page_id}")
                 
         logger.info(f"Migration completed. Total pages processed: {migrated_count}")
+        for endpoint, stats in get_http_stats().items():
+            logger.info(f"{endpoint}: {stats['requests']} request(s), avg {stats['seconds_avg']}s, max {stats['seconds_max']}s")
         
     except Exception as e:
         logger.error(f"Global error during migration: {e}")
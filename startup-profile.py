@@ -0,0 +1,212 @@
+"""
+==============================================================================
+Color It Daily Agent - Cold-Start Profile & Time-to-First-Request Benchmark
+==============================================================================
+
+Measures what a Cloud Run cold start pays before the service can answer:
+1. An import-time report (`python -X importtime -c "import main"`) aggregated by
+   top-level package, plus the slowest individual modules.
+2. Time-to-first-request: spawns `uvicorn main:app` on a free local port and times
+   how long until the first HTTP 200 from a cheap endpoint.
+
+Usage Examples:
+---------------
+1. Full report (imports + 3 time-to-first-request runs):
+   python startup-profile.py
+
+2. Regression gate (exit code 1 when the median time-to-first-request exceeds 6s),
+   saving the results for comparison across commits:
+   python startup-profile.py --runs 5 --max-ttfr 6 --json startup-profile.json
+
+Arguments:
+----------
+  --runs            (Optional) Number of time-to-first-request runs (median is reported). Default 3.
+  --top             (Optional) Number of slowest modules / packages to list. Default 15.
+  --path            (Optional) Endpoint polled for the first request. Default '/metrics/admission'.
+  --timeout         (Optional) Seconds to wait for the server to answer before giving up. Default 60.
+  --max-ttfr        (Optional) Fail when the median time-to-first-request exceeds this many seconds.
+  --max-import      (Optional) Fail when `import main` takes longer than this many seconds.
+  --json            (Optional) Write the measurements to this JSON file.
+  --skip-server     (Optional) Only produce the import-time report.
+==============================================================================
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from dotenv import load_dotenv
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def profile_imports(top: int) -> dict:
+    """Runs `python -X importtime -c 'import main'` and aggregates the per-module timings."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise RuntimeError("`import main` failed; see the error above.")
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+
+    by_package = {}
+    for module in modules:
+        package = module["module"].split(".")[0]
+        if package == "google":
+            package = ".".join(module["module"].split(".")[:3])
+        by_package[package] = by_package.get(package, 0.0) + module["self_ms"]
+
+    return {
+        "wall_seconds": round(wall_seconds, 3),
+        "import_main_ms": next((m["cumulative_ms"] for m in modules if m["module"] == "main"), None),
+        "slowest_modules": sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top],
+        "packages": [
+            {"package": name, "self_ms": round(ms, 1)}
+            for name, ms in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        ],
+    }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_request(path: str, timeout: float) -> float:
+    """Starts uvicorn in a fresh process and times spawn -> first HTTP 200 on `path`."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited early:\n{server.stderr.read()[-2000:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.05)
+        raise TimeoutError(f"No 200 from {url} within {timeout:.0f}s.")
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main(
+    runs: int = 3,
+    top: int = 15,
+    path: str = "/metrics/admission",
+    timeout: float = 60,
+    max_ttfr: float = None,
+    max_import: float = None,
+    json_path: str = None,
+    skip_server: bool = False,
+) -> int:
+    results = {"python": sys.version.split()[0]}
+
+    print("⏱️  Profiling `import main` (python -X importtime)...")
+    imports = profile_imports(top)
+    results["imports"] = imports
+    import_main_s = (imports["import_main_ms"] or 0) / 1000
+    print(f"\n`import main`: {import_main_s:.3f}s (process wall time {imports['wall_seconds']:.3f}s)")
+    print(f"\nSlowest modules (cumulative):")
+    for module in imports["slowest_modules"]:
+        print(f"  {module['cumulative_ms']:9.1f} ms  {'  ' * module['depth']}{module['module']}")
+    print(f"\nSelf time by package:")
+    for package in imports["packages"]:
+        print(f"  {package['self_ms']:9.1f} ms  {package['package']}")
+
+    if not skip_server:
+        print(f"\n🚀 Measuring time-to-first-request on '{path}' ({runs} run(s))...")
+        samples = []
+        for i in range(runs):
+            seconds = time_to_first_request(path, timeout)
+            samples.append(round(seconds, 3))
+            print(f"  run {i + 1}: {seconds:.3f}s")
+        results["time_to_first_request"] = {
+            "path": path,
+            "samples": samples,
+            "median_seconds": statistics.median(samples),
+        }
+        print(f"Median time-to-first-request: {statistics.median(samples):.3f}s")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to '{json_path}'")
+
+    failed = False
+    if max_import is not None and import_main_s > max_import:
+        print(f"❌ `import main` took {import_main_s:.3f}s (limit {max_import}s)")
+        failed = True
+    ttfr = results.get("time_to_first_request")
+    if max_ttfr is not None and ttfr and ttfr["median_seconds"] > max_ttfr:
+        print(f"❌ Median time-to-first-request {ttfr['median_seconds']:.3f}s exceeds limit {max_ttfr}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Cold-start import profile and time-to-first-request benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Number of time-to-first-request runs")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules / packages to list")
+    parser.add_argument("--path", type=str, default="/metrics/admission", help="Endpoint polled for the first request")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for the server to answer")
+    parser.add_argument("--max-ttfr", type=float, default=None, help="Fail above this median time-to-first-request (s)")
+    parser.add_argument("--max-import", type=float, default=None, help="Fail above this `import main` time (s)")
+    parser.add_argument("--json", type=str, default=None, help="Write measurements to this JSON file")
+    parser.add_argument("--skip-server", action="store_true", help="Only produce the import-time report")
+    args = parser.parse_args()
+
+    sys.exit(main(
+        runs=args.runs,
+        top=args.top,
+        path=args.path,
+        timeout=args.timeout,
+        max_ttfr=args.max_ttfr,
+        max_import=args.max_import,
+        json_path=args.json,
+        skip_server=args.skip_server,
+    ))
@@ -0,0 +1,402 @@
+"""
+==============================================================================
+Color It Daily Agent - Concurrent Run Isolation Stress Harness
+==============================================================================
+
+Runs N fake pipelines at once in a single process and checks that no run's
+context bleeds into another: every trace, local file, checkpoint, document
+update and stage event must land on its own `document_id`.
+
+The runs go through the real job path (`run_agent_pipeline`), the real ADK
+runner and the service's plugins (AgentContextPlugin, PromptTracePlugin,
+StageCheckpointPlugin). Only the model and the media tools are scripted:
+- A scripted LLM plays the Creative Director, Stylist, Generator and Critic,
+  echoing the run marker it finds in the session's user message.
+- Fake `generate_image`, `optimize_image` and `publish_to_firestore` tools run
+  on ADK's tool thread pool, sleep for a random time and write into the run's
+  local output directory.
+Every model call and tool call compares the AgentContext it sees against the
+marker from its own inputs. All runs are launched from a task that holds a
+decoy context, as the `/run` middleware's task would.
+
+Nothing is sent to Firestore, Cloud Storage or Gemini (runs use no_persist).
+
+Usage Examples:
+---------------
+1. 50 concurrent runs:
+   python stress-runs.py --runs 50
+
+2. Several rounds with more jitter, keeping the output for inspection:
+   python stress-runs.py --runs 30 --rounds 3 --max-delay 0.2 --keep
+
+Arguments:
+----------
+  --runs            (Optional) Number of concurrent fake runs per round. Default 20.
+  --rounds          (Optional) Number of rounds. Default 1.
+  --max-delay       (Optional) Upper bound (seconds) of the random delay in every model/tool call. Default 0.05.
+  --seed            (Optional) Random seed for reproducible interleavings.
+  --output-dir      (Optional) Local output directory (IMAGE_OUTPUT_DIR). Default: a temporary directory.
+  --keep            (Optional) Keep the output directory after the run.
+  --json            (Optional) Write the results to this JSON file.
+==============================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(name)s: %(message)s")
+
+MARKER_PATTERN = re.compile(r'"run_marker":\s*"([^"]+)"')
+
+
+class Observations:
+    """Thread-safe record of (expected document_id, observed document_id) per model/tool call."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = []
+
+    def record(self, where: str, expected: str, observed) -> None:
+        with self._lock:
+            self.calls.append({
+                "where": where,
+                "expected": expected,
+                "observed": observed,
+                "thread": threading.current_thread().name,
+            })
+
+    def mismatches(self):
+        with self._lock:
+            return [call for call in self.calls if call["expected"] != call["observed"]]
+
+
+def _find_marker(llm_request):
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            match = MARKER_PATTERN.search(getattr(part, "text", None) or "")
+            if match:
+                return match.group(1)
+    return None
+
+
+def _last_function_response(llm_request):
+    for content in reversed(llm_request.contents or []):
+        for part in reversed(content.parts or []):
+            if getattr(part, "function_response", None):
+                return part.function_response
+    return None
+
+
+def build_runner(observations: Observations, max_delay: float):
+    """Builds an ADK runner mirroring the Publisher pipeline with a scripted model and fake tools."""
+    from typing import AsyncGenerator
+
+    from google.adk.agents import LlmAgent, LoopAgent, SequentialAgent
+    from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    from color_it_daily_agent.context import get_agent_context
+    from color_it_daily_agent.jobs import APP_NAME
+    from color_it_daily_agent.lib.persistence import get_local_output_dir, update_document
+    from color_it_daily_agent.lib.context_plugin import AgentContextPlugin
+    from color_it_daily_agent.lib.trace_plugin import PromptTracePlugin
+    from color_it_daily_agent.lib.checkpoint_plugin import StageCheckpointPlugin
+
+    def _observe(where: str, marker: str) -> str:
+        ctx = get_agent_context()
+        observations.record(where, marker, ctx.document_id if ctx else None)
+        return ctx.document_id if ctx else marker
+
+    def _write(document_id: str, filename: str, content: str) -> str:
+        path = os.path.join(get_local_output_dir(document_id), filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def generate_image(positive_prompt: str) -> str:
+        """Fake media tool: writes the run marker to raw.png."""
+        marker = positive_prompt.rsplit(" ", 1)[-1]
+        time.sleep(random.uniform(0, max_delay))
+        document_id = _observe("tool:generate_image", marker)
+        return _write(document_id, "raw.png", marker)
+
+    def optimize_image(image_path: str) -> str:
+        """Fake potrace tool: copies the raw marker into optimized.png."""
+        with open(image_path, "r", encoding="utf-8") as f:
+            marker = f.read()
+        time.sleep(random.uniform(0, max_delay))
+        document_id = _observe("tool:optimize_image", marker)
+        return _write(document_id, "optimized.png", marker)
+
+    def publish_to_firestore(title: str) -> str:
+        """Fake publisher: marks the run's document as PASS."""
+        marker = title.rsplit(" ", 1)[-1]
+        time.sleep(random.uniform(0, max_delay))
+        document_id = _observe("tool:publish_to_firestore", marker)
+        update_document(document_id, {"status": "PASS", "title": title}, no_persist=True)
+        return f"SUCCESS: published {document_id}"
+
+    def _text(payload) -> LlmResponse:
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part.from_text(text=json.dumps(payload))]))
+
+    def _call(name: str, **args) -> LlmResponse:
+        return LlmResponse(content=types.Content(
+            role="model",
+            parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))],
+        ))
+
+    class ScriptedLlm(BaseLlm):
+        """Plays one pipeline agent (named by `model`) for whichever run its request belongs to."""
+
+        async def generate_content_async(
+            self, llm_request: LlmRequest, stream: bool = False
+        ) -> AsyncGenerator[LlmResponse, None]:
+            await asyncio.sleep(random.uniform(0, max_delay))
+            role = self.model
+            marker = _find_marker(llm_request)
+            _observe(f"model:{role}", marker)
+            last = _last_function_response(llm_request)
+            last_name = last.name if last else None
+            last_result = (last.response or {}).get("result") if last else None
+
+            if role == "CreativeDirector":
+                yield _text({"title": f"Concept {marker}", "description": "stress run"})
+            elif role == "Stylist":
+                yield _text({"title": f"Concept {marker}", "positive_prompt": f"line art of {marker}"})
+            elif role == "Generator":
+                if last_name == "generate_image":
+                    yield _call("optimize_image", image_path=last_result)
+                elif last_name == "optimize_image":
+                    yield _text({"positive_prompt": f"line art of {marker}", "optimized_image_path": last_result})
+                else:
+                    yield _call("generate_image", positive_prompt=f"line art of {marker}")
+            elif role == "Critic":
+                if last_name == "publish_to_firestore":
+                    yield _text({"status": "PASS", "feedback": None})
+                else:
+                    yield _call("publish_to_firestore", title=f"Concept {marker}")
+
+    def _agent(name: str, tools=None) -> LlmAgent:
+        return LlmAgent(name=name, model=ScriptedLlm(model=name), instruction=f"Stress {name}.", tools=tools or [])
+
+    studio_loop = LoopAgent(
+        name="StudioLoop",
+        sub_agents=[
+            _agent("Stylist"),
+            _agent("Generator", [generate_image, optimize_image]),
+            _agent("Critic", [publish_to_firestore]),
+        ],
+        max_iterations=1,
+    )
+    publisher = SequentialAgent(name="Publisher", sub_agents=[_agent("CreativeDirector"), studio_loop])
+    return InMemoryRunner(
+        agent=publisher,
+        app_name=APP_NAME,
+        plugins=[AgentContextPlugin(), PromptTracePlugin(), StageCheckpointPlugin()],
+    )
+
+
+def verify_run(document_id: str, all_ids: set, run_status: str) -> list:
+    """Returns the isolation problems found in one run's document, traces, files and events."""
+    from color_it_daily_agent.lib.persistence import get_document, get_local_output_dir
+    from color_it_daily_agent.lib.run_events import run_event_bus
+    from color_it_daily_agent.lib.trace_sink import read_traces
+
+    problems = []
+    foreign_ids = all_ids - {document_id}
+    run_dir = get_local_output_dir(document_id)
+
+    def _foreign(text: str):
+        return sorted(other for other in foreign_ids if other in text)
+
+    if run_status != "PASS":
+        problems.append(f"run finished with status '{run_status}'")
+
+    doc = get_document(document_id, no_persist=True)
+    if doc is None:
+        return problems + ["document.json missing"]
+    if doc.get("status") != "PASS":
+        problems.append(f"document status is '{doc.get('status')}'")
+    checkpoints = doc.get("checkpoints") or {}
+    for stage in ("raw_image_path", "optimized_image_path"):
+        path = checkpoints.get(stage)
+        if path and os.path.dirname(path) != run_dir:
+            problems.append(f"checkpoint '{stage}' points outside the run directory: {path}")
+    if document_id not in str((checkpoints.get("concept") or {}).get("title")):
+        problems.append("concept checkpoint is not this run's concept")
+    leaked = _foreign(json.dumps(doc))
+    if leaked:
+        problems.append(f"document.json mentions other runs: {leaked}")
+
+    try:
+        traces = read_traces(document_id)
+        if not traces:
+            problems.append("prompt_trace.jsonl has no entries")
+        summary = doc.get("trace_summary") or {}
+        if len(traces) != summary.get("events"):
+            problems.append(f"prompt_trace.jsonl has {len(traces)} entries, document.json counts {summary.get('events')}")
+        if os.path.dirname(doc.get("trace_file") or "") != run_dir:
+            problems.append(f"document.json trace_file points outside the run directory: {doc.get('trace_file')}")
+        if "traces" in doc:
+            problems.append("document.json embeds the trace entries")
+        leaked = _foreign(json.dumps(traces))
+        if leaked:
+            problems.append(f"prompt_trace.jsonl mentions other runs: {leaked}")
+    except Exception as e:
+        problems.append(f"prompt_trace.jsonl unreadable: {e}")
+
+    for filename in ("raw.png", "optimized.png"):
+        path = os.path.join(run_dir, filename)
+        if not os.path.exists(path):
+            problems.append(f"{filename} missing")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() != document_id:
+                problems.append(f"{filename} holds another run's output")
+
+    events = run_event_bus.history(document_id)
+    names = [event["event"] for event in events]
+    for expected in ("run_started", "concept_chosen", "raw_image_ready", "optimized_image_ready", "published", "run_finished"):
+        if expected not in names:
+            problems.append(f"missing '{expected}' event")
+    leaked = _foreign(json.dumps(events, default=str))
+    if leaked:
+        problems.append(f"stage events mention other runs: {leaked}")
+    return problems
+
+
+async def run_round(runner, runs: int) -> dict:
+    from color_it_daily_agent.context import AgentContext, get_agent_context, set_agent_context
+    from color_it_daily_agent.jobs import run_agent_pipeline
+    from color_it_daily_agent.lib.persistence import pre_create_document, get_local_output_dir
+
+    decoy = AgentContext(document_id=f"decoy-{uuid.uuid4()}", current_date="1970-01-01", no_persist=True)
+    set_agent_context(decoy)
+
+    prepared = []
+    for _ in range(runs):
+        document_id = str(uuid.uuid4())
+        ctx = AgentContext(
+            document_id=document_id,
+            current_date="2026-01-01",
+            collection_name="Stress",
+            no_persist=True,
+            local_output_dir=os.path.join(os.environ["IMAGE_OUTPUT_DIR"], document_id),
+        )
+        payload = {"current_date": ctx.current_date, "run_marker": document_id, "no_persist": True}
+        pre_create_document(document_id, ctx.current_date, ctx.collection_name, True, payload)
+        get_local_output_dir(document_id)
+        prepared.append((ctx, payload))
+
+    started = time.perf_counter()
+    statuses = await asyncio.gather(
+        *[run_agent_pipeline(ctx, payload, runner=runner) for ctx, payload in prepared],
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    all_ids = {ctx.document_id for ctx, _ in prepared} | {decoy.document_id}
+    problems = {}
+    for (ctx, _), status in zip(prepared, statuses):
+        run_problems = verify_run(ctx.document_id, all_ids, status if isinstance(status, str) else repr(status))
+        if run_problems:
+            problems[ctx.document_id] = run_problems
+    if get_agent_context() is not decoy:
+        problems["<caller>"] = ["the launching task's AgentContext was replaced by a run"]
+    return {"runs": runs, "elapsed_seconds": round(elapsed, 3), "problems": problems}
+
+
+async def stress(runs: int, rounds: int, max_delay: float) -> dict:
+    observations = Observations()
+    runner = build_runner(observations, max_delay)
+    results = []
+    for i in range(rounds):
+        result = await run_round(runner, runs)
+        results.append(result)
+        print(
+            f"  round {i + 1}: {runs} runs in {result['elapsed_seconds']:.2f}s, "
+            f"{len(result['problems'])} run(s) with problems"
+        )
+    return {"rounds": results, "calls_checked": len(observations.calls), "context_mismatches": observations.mismatches()}
+
+
+def main(
+    runs: int = 20,
+    rounds: int = 1,
+    max_delay: float = 0.05,
+    seed: int = None,
+    output_dir: str = None,
+    keep: bool = False,
+    json_path: str = None,
+) -> int:
+    if seed is not None:
+        random.seed(seed)
+    output_dir = output_dir or tempfile.mkdtemp(prefix="color-it-daily-stress-")
+    # Must be set before the package is imported: persistence reads it at import time.
+    os.environ["IMAGE_OUTPUT_DIR"] = output_dir
+    os.environ.setdefault("LLM_MODEL", "stress-scripted")
+
+    print(f"🧪 {rounds} round(s) of {runs} concurrent fake runs (output: {output_dir})")
+    try:
+        results = asyncio.run(stress(runs, rounds, max_delay))
+    finally:
+        if not keep:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    mismatches = results["context_mismatches"]
+    problems = {doc: issues for rnd in results["rounds"] for doc, issues in rnd["problems"].items()}
+    print(f"\nChecked {results['calls_checked']} model/tool calls: {len(mismatches)} context mismatch(es).")
+    for call in mismatches[:20]:
+        print(f"  ❌ {call['where']} expected '{call['expected']}' but saw '{call['observed']}' ({call['thread']})")
+    for document_id, issues in list(problems.items())[:20]:
+        for issue in issues:
+            print(f"  ❌ {document_id}: {issue}")
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"\nSaved results to '{json_path}'")
+
+    if mismatches or problems:
+        print("❌ Context bleed detected.")
+        return 1
+    print("✅ No context bleed between concurrent runs.")
+    return 0
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Concurrent run isolation stress harness")
+    parser.add_argument("--runs", type=int, default=20, help="Number of concurrent fake runs per round")
+    parser.add_argument("--rounds", type=int, default=1, help="Number of rounds")
+    parser.add_argument("--max-delay", type=float, default=0.05, help="Max random delay per model/tool call (s)")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    parser.add_argument("--output-dir", type=str, default=None, help="Local output directory (IMAGE_OUTPUT_DIR)")
+    parser.add_argument("--keep", action="store_true", help="Keep the output directory")
+    parser.add_argument("--json", type=str, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    sys.exit(main(
+        runs=args.runs,
+        rounds=args.rounds,
+        max_delay=args.max_delay,
+        seed=args.seed,
+        output_dir=args.output_dir,
+        keep=args.keep,
+        json_path=args.json,
+    ))